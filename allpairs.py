@@ -0,0 +1,139 @@
+"""Vectorized all-pairs shortest paths for small dense graphs.
+
+Floyd-Warshall on a dense NumPy adjacency matrix, in blocked form: for each
+block of pivots the pivot rows and columns are closed first, then the rest of
+the matrix is relaxed with one min-plus product against that block, a tile of
+rows at a time so the temporaries stay in cache. Next hops are carried
+through the same relaxations: whenever i -> j improves through k, i -> j
+starts the way i -> k does. Only a cycle of zero total weight can make
+next hops point round in a loop, so graphs that have one compare paths by
+distance and then by hop count, which makes every next hop strictly fewer
+hops from j.
+engine.all_pairs decides when this beats repeated Dijkstra.
+"""
+import numpy as np
+
+from engine import RunCancelled, _strong_components
+
+# Pivots per block, and the size (in elements) of one min-plus temporary
+BLOCK_SIZE = 32
+TILE_ELEMENTS = 1 << 17
+# Reduced weights up to this are zero (Johnson reweighting leaves round-off)
+ZERO_WEIGHT = 1e-9
+
+
+def _csr_arrays(graph, reduced=False):
+    offsets, targets, weights = graph.reduced_csr() if reduced else graph.csr()
+    return (np.frombuffer(offsets, dtype=np.int64), np.frombuffer(targets, dtype=np.int64),
+            np.frombuffer(weights, dtype=np.float64))
+
+
+def adjacency_matrix(graph):
+    """Dense matrix of the lightest edge from i to j (0 on the diagonal, inf if none)"""
+    n = graph.n
+    offsets, targets, weights = _csr_arrays(graph)
+    dist = np.full((n, n), np.inf)
+    np.minimum.at(dist, (np.repeat(np.arange(n), np.diff(offsets)), targets), weights)
+    diagonal = np.arange(n)
+    dist[diagonal, diagonal] = np.minimum(dist[diagonal, diagonal], 0.0)
+    return dist
+
+
+def first_hops(dist):
+    """Next-hop and hop-count matrices of the direct edges (j and 1 for every edge i -> j)"""
+    n = len(dist)
+    reachable = np.isfinite(dist)
+    next_hop = np.where(reachable, np.arange(n)[None, :], -1)
+    hops = reachable.astype(np.int32)
+    np.fill_diagonal(next_hop, np.arange(n))
+    np.fill_diagonal(hops, 0)
+    return next_hop, hops
+
+
+def has_zero_cycle(graph):
+    """Whether some cycle of edges weighs zero in total (an undirected
+    zero-weight edge is one), found as a non-trivial strongly connected
+    component of the edges whose Johnson-reduced weight is zero"""
+    offsets, targets, weights = _csr_arrays(graph, reduced=True)
+    sources = np.repeat(np.arange(graph.n), np.diff(offsets))
+    zero = (weights <= ZERO_WEIGHT) & (sources != targets)
+    if not zero.any():
+        return False
+    counts = np.bincount(sources[zero], minlength=graph.n)
+    zero_offsets = np.concatenate(([0], np.cumsum(counts)))
+    _, components = _strong_components(graph.n, zero_offsets.tolist(), targets[zero].tolist())
+    return components < graph.n
+
+
+def _improve(dist, hops, next_hop, through, through_hops, via):
+    """Take the paths in ``through`` that are shorter, or as short in fewer hops"""
+    better = through < dist
+    if hops is not None:
+        better |= (through == dist) & (through_hops < hops) & np.isfinite(through)
+        np.copyto(hops, through_hops, where=better)
+    np.copyto(dist, through, where=better)
+    np.copyto(next_hop, via, where=better)
+
+
+def floyd_warshall(graph, block_size=BLOCK_SIZE, cancel=None):
+    """All-pairs distances as (dist, next_hop) n x n arrays.
+
+    Unreachable pairs are inf with a next hop of -1. Raises ValueError when
+    the graph has a negative cycle, and RunCancelled between pivot blocks
+    once the ``cancel`` event is set.
+    """
+    dist = adjacency_matrix(graph)
+    next_hop, hops = first_hops(dist)
+    # Next hops can only chase each other around a cycle of zero weight,
+    # so other graphs skip the hop counts
+    if not has_zero_cycle(graph):
+        hops = None
+    n = graph.n
+    for lo in range(0, n, block_size):
+        if cancel is not None and cancel.is_set():
+            raise RunCancelled()
+        block = slice(lo, min(lo + block_size, n))
+
+        # Close the pivot rows and columns over the pivots in this block
+        for k in range(block.start, block.stop):
+            _improve(dist[block, :], None if hops is None else hops[block, :], next_hop[block, :],
+                     dist[block, k, None] + dist[None, k, :],
+                     None if hops is None else hops[block, k, None] + hops[None, k, :],
+                     next_hop[block, k, None])
+            _improve(dist[:, block], None if hops is None else hops[:, block], next_hop[:, block],
+                     dist[:, k, None] + dist[None, k, block],
+                     None if hops is None else hops[:, k, None] + hops[None, k, block],
+                     next_hop[:, k, None])
+
+        # Everything else goes through the block in one min-plus product;
+        # the pivot is only looked up for the entries that change
+        rows = max(1, TILE_ELEMENTS // max(n * (block.stop - block.start), 1))
+        for r in range(0, n, rows):
+            tile = slice(r, min(r + rows, n))
+            through = dist[tile, block, None] + dist[None, block, :]
+            best = through.min(axis=1)
+            current = dist[tile, :]
+            changed = best < current
+            if hops is not None:
+                changed |= (best == current) & np.isfinite(best)
+            i, j = np.nonzero(changed)
+            if not len(i):
+                continue
+            candidates = through[i, :, j]
+            if hops is None:
+                k = candidates.argmin(axis=1)
+            else:
+                # Fewest hops among the shortest, and only if fewer than now
+                candidate_hops = hops[tile, block][i] + hops[block, :][:, j].T
+                candidate_hops[candidates != best[i, j, None]] = np.iinfo(np.int32).max
+                k = candidate_hops.argmin(axis=1)
+                found = candidate_hops[np.arange(len(k)), k]
+                keep = (best[i, j] < current[i, j]) | (found < hops[tile, :][i, j])
+                i, j, k = i[keep], j[keep], k[keep]
+                hops[tile, :][i, j] = found[keep]
+            next_hop[tile, :][i, j] = next_hop[tile, block][i, k]
+            current[i, j] = best[i, j]
+
+    if (np.diagonal(dist) < 0).any():
+        raise ValueError("Graph contains a negative cycle")
+    return dist, next_hop
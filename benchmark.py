@@ -0,0 +1,461 @@
+"""Benchmark suite for the engine and the visualizer.
+
+    python benchmark.py run -o results.json [--sizes 1k,10k,100k,1m]
+    python benchmark.py compare baseline.json results.json [--threshold 0.2]
+
+`run` times graph build, single-source Dijkstra (heap and delta-stepping),
+point-to-point queries, many-to-many distance tables (contraction
+hierarchy build plus bucket table against one Dijkstra per source), report
+generation, save_state/undo, bulk selection edits and draw_graph scene
+construction on synthetic graphs, plus application cold start, and writes
+the timings (seconds) to JSON. `compare` flags every timing that got slower
+than the baseline by more than the threshold and exits with status 1 if
+there are any.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from engine import Graph, dijkstra
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def _weight(rng):
+    return float(rng.randint(1, 10))
+
+
+def grid_graph(edges, seed=0):
+    """Undirected square grid with about `edges` edges"""
+    rng = random.Random(seed)
+    side = max(2, int(math.sqrt(edges / 2)) + 1)
+    graph = Graph(directed=False)
+    for r in range(side):
+        for c in range(side):
+            graph.add_node(f"{r}_{c}", c * 60 + 30, r * 60 + 30)
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c
+            if c + 1 < side:
+                graph.add_edge(u, u + 1, _weight(rng))
+            if r + 1 < side:
+                graph.add_edge(u, u + side, _weight(rng))
+    return graph
+
+
+def geometric_graph(edges, seed=0):
+    """Undirected random geometric graph on the unit square, average degree 8"""
+    rng = random.Random(seed)
+    n = max(2, edges // 4)
+    radius = math.sqrt(8 / (math.pi * n))
+    graph = Graph(directed=False)
+    points = [(rng.random(), rng.random()) for _ in range(n)]
+    cells = {}
+    for i, (x, y) in enumerate(points):
+        graph.add_node(str(i), x * 1000, y * 1000)
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(i)
+    for i, (x, y) in enumerate(points):
+        cx, cy = int(x / radius), int(y / radius)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((cx + dx, cy + dy), ()):
+                    if j > i and (points[j][0] - x) ** 2 + (points[j][1] - y) ** 2 <= radius * radius:
+                        graph.add_edge(i, j, _weight(rng))
+    return graph
+
+
+def erdos_renyi_graph(edges, seed=0):
+    """Directed G(n, m) random graph with average out-degree 4"""
+    rng = random.Random(seed)
+    n = max(2, edges // 4)
+    graph = Graph(directed=True)
+    for i in range(n):
+        graph.add_node(str(i), rng.random() * 1000, rng.random() * 1000)
+    for _ in range(edges):
+        u = rng.randrange(n)
+        v = rng.randrange(n - 1)
+        graph.add_edge(u, v if v < u else v + 1, _weight(rng))
+    return graph
+
+
+def scale_free_graph(edges, seed=0, attach=3):
+    """Undirected Barabasi-Albert preferential-attachment graph"""
+    rng = random.Random(seed)
+    n = max(attach + 1, edges // attach)
+    graph = Graph(directed=False)
+    for i in range(n):
+        graph.add_node(str(i), rng.random() * 1000, rng.random() * 1000)
+    # Every edge endpoint is listed once, so sampling it is degree-proportional
+    endpoints = []
+    for u in range(attach + 1):
+        for v in range(u):
+            graph.add_edge(u, v, _weight(rng))
+            endpoints += (u, v)
+    for u in range(attach + 1, n):
+        chosen = set()
+        while len(chosen) < attach:
+            chosen.add(rng.choice(endpoints))
+        for v in chosen:
+            graph.add_edge(u, v, _weight(rng))
+            endpoints += (u, v)
+    return graph
+
+
+GENERATORS = {
+    'grid': grid_graph,
+    'geometric': geometric_graph,
+    'erdos_renyi': erdos_renyi_graph,
+    'scale_free': scale_free_graph,
+}
+
+
+class _Widget:
+    """Stand-in for the labels and buttons the visualizer updates"""
+
+    def config(self, **kwargs):
+        pass
+
+    def pack(self, **kwargs):
+        pass
+
+    def pack_forget(self):
+        pass
+
+
+class _Menu:
+    """Stand-in for the menus whose entries the visualizer relabels"""
+
+    def entryconfig(self, index, **kwargs):
+        pass
+
+
+class _Flag:
+    """Stand-in for a tk.BooleanVar"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class RecordingCanvas:
+    """Counts the items a draw pass creates instead of rendering them"""
+
+    def __init__(self):
+        self.items = 0
+
+    def delete(self, *tags):
+        if "all" in tags:
+            self.items = 0
+
+    def tag_lower(self, *tags):
+        pass
+
+    def _create(self, *args, **kwargs):
+        self.items += 1
+        return self.items
+
+    create_line = create_oval = create_text = create_rectangle = create_polygon = _create
+
+
+def headless_visualizer(graph, dist=None, prev=None):
+    """Build a DijkstraVisualizer over `graph` that runs without a Tk window"""
+    from main import DijkstraVisualizer, Node, Edge
+
+    app = DijkstraVisualizer.__new__(DijkstraVisualizer)
+    app.nodes = [Node(x, y, label) for label, x, y in zip(graph.labels, graph.xs, graph.ys)]
+    app.edges = [Edge(app.nodes[u], app.nodes[v], w, bool(d))
+                 for u, v, w, d in zip(graph.edge_src, graph.edge_dst,
+                                       graph.edge_weight, graph.edge_directed)]
+    app.label_index = {node.label: node for node in app.nodes}
+    app.start_node = app.nodes[0]
+    app.edge_start = None
+    app.history = []
+    app.node_radius = 20
+    app.arrow_size = 10
+    app.algorithm_complete = False
+    app.alt_paths = []
+    app.alt_index = 0
+    app.alt_frame = _Widget()
+    app.facilities = []
+    app.regions = {}
+    app.isochrone_budget = None
+    app.selection = set()
+    app.spatial = None
+    app.engine_graph = None
+    app.engine_graph_key = None
+    app.timeline = None
+    app.timeline_job = None
+    app.timeline_frame = _Widget()
+    app.live_feed = None
+    app.live_job = None
+    app.job = None
+    app.job_poll = None
+    app.cancel_btn = _Widget()
+    app.run_stats = None
+    app.stats_open = False
+    app.layout = None
+    app.layout_job = None
+    app.graph_menu = _Menu()
+    app.is_directed = _Flag(graph.directed)
+    app.canvas = RecordingCanvas()
+    app.info_label = _Widget()
+    app.report_btn = _Widget()
+
+    if dist is not None:
+        for node, d, p in zip(app.nodes, dist, prev):
+            node.distance = d
+            node.visited = d != float('inf')
+            node.previous = app.nodes[p] if p != -1 else None
+        app.algorithm_complete = True
+    return app
+
+
+def timed(func, repeat=1):
+    """Best wall-clock time of `repeat` calls, plus the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench_graph(name, size, edges, args, results):
+    prefix = f"{name}/{size}"
+    generator = GENERATORS[name]
+
+    def build():
+        graph = generator(edges, seed=args.seed)
+        graph.csr()
+        return graph
+
+    results[f"{prefix}/build"], graph = timed(build)
+    results[f"{prefix}/sssp"], (dist, prev) = timed(lambda: dijkstra(graph, 0), args.repeat)
+    bench_delta_stepping(graph, prefix, args, results)
+
+    rng = random.Random(args.seed)
+    pairs = [(rng.randrange(graph.n), rng.randrange(graph.n)) for _ in range(args.queries)]
+    total, _ = timed(lambda: [dijkstra(graph, s, target=t) for s, t in pairs])
+    results[f"{prefix}/p2p_query"] = total / len(pairs)
+    if args.table_size:
+        bench_distance_table(graph, prefix, args, results)
+
+    if edges > args.gui_max_edges:
+        return
+    app = headless_visualizer(graph, dist, prev)
+    results[f"{prefix}/report"], _ = timed(app.generate_report, args.repeat)
+    results[f"{prefix}/detailed_report"], _ = timed(app.generate_detailed_report, args.repeat)
+    results[f"{prefix}/save_state"], _ = timed(app.save_state, args.repeat)
+    results[f"{prefix}/undo"], _ = timed(app.undo)
+
+    # Bulk edits on the nodes inside the middle quarter of the layout
+    xs, ys = [node.x for node in app.nodes], [node.y for node in app.nodes]
+    box = ((3 * min(xs) + max(xs)) / 4, (3 * min(ys) + max(ys)) / 4,
+           (min(xs) + 3 * max(xs)) / 4, (min(ys) + 3 * max(ys)) / 4)
+    results[f"{prefix}/select_box"], _ = timed(lambda: app.select_box(*box), args.repeat)
+    results[f"{prefix}/bulk_scale"], _ = timed(lambda: app.scale_selection(2.0))
+    results[f"{prefix}/bulk_delete"], _ = timed(app.delete_selection)
+
+
+def bench_delta_stepping(graph, prefix, args, results):
+    """Time delta-stepping in-process and on a pool against the heap engine"""
+    try:
+        from deltastep import DeltaStepping
+    except ImportError:
+        return  # NumPy is not installed
+
+    with DeltaStepping(graph, workers=1) as solver:
+        results[f"{prefix}/delta_stepping"], _ = timed(lambda: solver.run(0), args.repeat)
+        line = (f"  sssp: heap {results[f'{prefix}/sssp']:.3f}s, "
+                f"delta-stepping {results[f'{prefix}/delta_stepping']:.3f}s (delta={solver.delta:g})")
+    if args.workers > 1:
+        with DeltaStepping(graph, workers=args.workers) as solver:
+            results[f"{prefix}/delta_stepping_pool"], _ = timed(lambda: solver.run(0), args.repeat)
+        line += f", {args.workers} workers {results[f'{prefix}/delta_stepping_pool']:.3f}s"
+    print(line)
+
+
+def bench_distance_table(graph, prefix, args, results):
+    """Time a sources x targets table from a contraction hierarchy (build
+    included) against repeated Dijkstra"""
+    try:
+        from manytomany import ContractionHierarchy
+    except ImportError:
+        return  # NumPy is not installed
+
+    rng = random.Random(args.seed)
+    count = min(args.table_size, graph.n)
+    sources, targets = rng.sample(range(graph.n), count), rng.sample(range(graph.n), count)
+    results[f"{prefix}/table_naive"], _ = timed(
+        lambda: [[dist[t] for t in targets] for dist in (dijkstra(graph, s)[0] for s in sources)])
+    results[f"{prefix}/table_hierarchy_build"], hierarchy = timed(lambda: ContractionHierarchy(graph))
+    results[f"{prefix}/table_buckets"], _ = timed(lambda: hierarchy.table(sources, targets), args.repeat)
+    total = results[f"{prefix}/table_hierarchy_build"] + results[f"{prefix}/table_buckets"]
+    results[f"{prefix}/table_total"] = total
+    method = "buckets" if hierarchy.used_buckets else "fell back to dijkstra"
+    print(f"  {count}x{count} table: repeated dijkstra {results[f'{prefix}/table_naive']:.3f}s, "
+          f"hierarchy {total:.3f}s = {results[f'{prefix}/table_hierarchy_build']:.3f}s build "
+          f"({hierarchy.shortcuts} shortcuts, core {hierarchy.core}) + "
+          f"{results[f'{prefix}/table_buckets']:.3f}s table ({method})")
+
+
+def bench_render(args, results):
+    """Time draw_graph scene construction against the number of canvas items"""
+    for size in args.render_sizes:
+        edges = SIZES[size]
+        graph = geometric_graph(edges, seed=args.seed)
+        dist, prev = dijkstra(graph, 0)
+        app = headless_visualizer(graph, dist, prev)
+        elapsed, _ = timed(app.draw_graph, args.repeat)
+        results[f"render/{size}/draw_graph"] = elapsed
+        results[f"render/{size}/items"] = app.canvas.items
+        print(f"  render/{size}: {app.canvas.items} items in {elapsed:.3f}s")
+
+
+# Runs in a fresh interpreter so that module imports are measured cold
+_STARTUP_PROBE = """
+import json
+import time
+started = time.perf_counter()
+import main
+result = {'import_main': time.perf_counter() - started}
+try:
+    root = main.tk.Tk()
+except main.tk.TclError:
+    pass  # No display: only the import time can be measured
+else:
+    app = main.DijkstraVisualizer(root)
+    root.update()
+    result['first_frame'] = time.perf_counter() - started
+    root.destroy()
+print(json.dumps(result))
+"""
+
+
+def bench_startup(args, results):
+    """Time from interpreter start to the first interactive frame"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = {}
+    for _ in range(args.startup_runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", _STARTUP_PROBE], cwd=here,
+                                capture_output=True, text=True, check=True).stdout
+        best['process'] = min(best.get('process', float('inf')), time.perf_counter() - started)
+        for key, value in json.loads(output.strip().splitlines()[-1]).items():
+            best[key] = min(best.get(key, float('inf')), value)
+    for key, value in best.items():
+        results[f"startup/{key}"] = value
+        print(f"  startup/{key}: {value:.3f}s")
+
+
+def run(args):
+    results = {}
+    if args.startup_runs:
+        print("startup ...")
+        bench_startup(args, results)
+    for name in args.graphs:
+        for size in args.sizes:
+            print(f"{name}/{size} ...")
+            bench_graph(name, size, SIZES[size], args, results)
+    if args.render_sizes:
+        print("render ...")
+        bench_render(args, results)
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, sort_keys=True)
+    print(f"Wrote {len(results)} timings to {args.output}")
+    return 0
+
+
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    print(f"{'Benchmark':<40} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    print("-" * 76)
+    for key in sorted(baseline.keys() & current.keys()):
+        # Item counts are recorded next to the timings but are not timings
+        if key.endswith("/items"):
+            continue
+        old, new = baseline[key], current[key]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > args.threshold and new - old > args.min_delta:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<40} {old:>12.6f} {new:>12.6f} {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Dijkstra engine and visualizer")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run the benchmarks and write JSON results")
+    run_parser.add_argument("-o", "--output", default="bench_results.json")
+    run_parser.add_argument("--graphs", default=",".join(GENERATORS),
+                            type=lambda s: s.split(","))
+    run_parser.add_argument("--sizes", default="1k,10k,100k", type=lambda s: s.split(","),
+                            help=f"comma separated edge counts from {', '.join(SIZES)}")
+    run_parser.add_argument("--render-sizes", default="1k,10k", type=lambda s: [x for x in s.split(",") if x],
+                            help="edge counts for the draw_graph benchmark ('' to skip)")
+    run_parser.add_argument("--gui-max-edges", type=int, default=100_000,
+                            help="skip report and undo timings above this many edges")
+    run_parser.add_argument("--startup-runs", type=int, default=3,
+                            help="cold starts to time (0 to skip)")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="processes for the pooled delta-stepping timing (1 to skip)")
+    run_parser.add_argument("--queries", type=int, default=50)
+    run_parser.add_argument("--table-size", type=int, default=500,
+                            help="sources and targets in the many-to-many table timing (0 to skip)")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+
+    compare_parser = sub.add_parser("compare", help="flag regressions against a stored baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="allowed slowdown as a fraction (0.2 = 20%%)")
+    compare_parser.add_argument("--min-delta", type=float, default=0.001,
+                                help="ignore slowdowns smaller than this many seconds")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        for size in args.sizes + args.render_sizes:
+            if size not in SIZES:
+                parser.error(f"unknown size '{size}'")
+        return run(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
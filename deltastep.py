@@ -0,0 +1,242 @@
+"""Delta-stepping single-source shortest paths for very large graphs.
+
+Tentative distances are kept in buckets of width delta. Each phase relaxes
+the light edges (weight <= delta) of every node in the current bucket at
+once, until the bucket stops refilling; the heavy edges of the nodes it
+settled are then relaxed in one more phase. A phase is a handful of NumPy
+gathers over the CSR, and large phases are split by edge count across
+worker processes that read the CSR and the distance array from shared memory
+and write their candidate updates into shared outboxes, so only slice bounds
+cross the process boundary:
+
+    from deltastep import DeltaStepping
+    with DeltaStepping(graph, workers=4) as solver:
+        dist, prev = solver.run(source)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from parallel import AttachedCSR, SharedCSR, _attach
+
+# Phases with fewer edges than this are relaxed in-process: the round trip
+# to the pool costs more than the work
+PARALLEL_MIN_EDGES = 50_000
+# Edges per worker task; a task's outbox also has room for one more node's edges
+OUTBOX_EDGES = 1 << 18
+# Auto-tuned delta aims for about this many light edges per node
+LIGHT_DEGREE = 3.0
+
+
+def auto_delta(weights, offsets):
+    """Bucket width from the weight distribution.
+
+    Meyer and Sanders use delta = 1 / d for uniform weights, so that each node
+    has about one light edge. For other distributions the same target is the
+    weight quantile at LIGHT_DEGREE / d; vectorized phases are cheap, so a few
+    light edges per node beat the extra bucket passes of a narrower delta.
+    """
+    n = len(offsets) - 1
+    if not len(weights):
+        return 1.0
+    degree = len(weights) / max(n, 1)
+    q = min(1.0, LIGHT_DEGREE / max(degree, 1.0))
+    sample = weights if len(weights) <= 1_000_000 else weights[::len(weights) // 1_000_000]
+    delta = float(np.quantile(sample, q))
+    return delta if delta > 0 else float(sample.max()) or 1.0
+
+
+def _edge_positions(offsets, nodes):
+    """CSR positions of every edge leaving ``nodes``, and the owning node of each"""
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    owners = np.repeat(nodes, counts)
+    positions = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return positions, owners
+
+
+def _candidates(offsets, targets, weights, dist, nodes, delta, light):
+    """(v, new distance, u) for the light or heavy edges of ``nodes`` that improve dist[v]"""
+    positions, owners = _edge_positions(offsets, nodes)
+    w = weights[positions]
+    keep = w <= delta if light else w > delta
+    positions, owners, w = positions[keep], owners[keep], w[keep]
+    v = targets[positions]
+    nd = dist[owners] + w
+    better = nd < dist[v]
+    return v[better], nd[better], owners[better]
+
+
+_worker = {}
+
+
+def _init_worker(n, spec, dist_name, frontier_name, outbox_names):
+    graph = AttachedCSR(n, spec)
+    offsets, targets, weights = (np.frombuffer(a, dtype=dt)
+                                 for a, dt in zip(graph.csr(), (np.int64, np.int64, np.float64)))
+    _worker.update(graph=graph, offsets=offsets, targets=targets, weights=weights)
+    blocks = [_attach(dist_name), _attach(frontier_name)] + [_attach(name) for name in outbox_names]
+    _worker['blocks'] = blocks
+    _worker['dist'] = np.ndarray(n, dtype=np.float64, buffer=blocks[0].buf)
+    _worker['frontier'] = np.ndarray(n, dtype=np.int64, buffer=blocks[1].buf)
+    _worker['outboxes'] = [_outbox_views(block) for block in blocks[2:]]
+
+
+def _outbox_views(block):
+    capacity = block.size // 24
+    return (np.ndarray(capacity, dtype=np.int64, buffer=block.buf),
+            np.ndarray(capacity, dtype=np.float64, buffer=block.buf, offset=8 * capacity),
+            np.ndarray(capacity, dtype=np.int64, buffer=block.buf, offset=16 * capacity))
+
+
+def _relax_slice(outbox, lo, hi, delta, light):
+    """Worker task: write the improving candidates of frontier[lo:hi] into an outbox"""
+    v, nd, u = _candidates(_worker['offsets'], _worker['targets'], _worker['weights'],
+                           _worker['dist'], _worker['frontier'][lo:hi], delta, light)
+    out_v, out_d, out_u = _worker['outboxes'][outbox]
+    out_v[:len(v)] = v
+    out_d[:len(v)] = nd
+    out_u[:len(v)] = u
+    return len(v)
+
+
+class DeltaStepping:
+    """Reusable delta-stepping solver; the pool and shared memory live until close()"""
+
+    def __init__(self, graph, delta=None, workers=None):
+        self.n = graph.n
+        self.potentials = graph.potentials()  # Negative weights are solved on the reduced CSR
+        self.offsets, self.targets, self.weights = (
+            np.frombuffer(a, dtype=dt) for a, dt in zip(graph.reduced_csr(), (np.int64, np.int64, np.float64)))
+        self.delta = delta or auto_delta(self.weights, self.offsets)
+        self.workers = workers or os.cpu_count() or 1
+
+        self.shared = None
+        self.pool = None
+        self.blocks = []
+        self.dist = np.full(self.n, np.inf)
+        self.frontier = np.zeros(self.n, dtype=np.int64)
+        if self.workers > 1:
+            self._start_pool(graph)
+
+    def _start_pool(self, graph):
+        degrees = np.diff(self.offsets)
+        self.capacity = OUTBOX_EDGES + (int(degrees.max()) if self.n else 0)
+        self.shared = SharedCSR(graph)
+        dist_block = shared_memory.SharedMemory(create=True, size=max(8 * self.n, 8))
+        frontier_block = shared_memory.SharedMemory(create=True, size=max(8 * self.n, 8))
+        outbox_blocks = [shared_memory.SharedMemory(create=True, size=24 * self.capacity)
+                         for _ in range(self.workers)]
+        self.blocks = [dist_block, frontier_block] + outbox_blocks
+        self.dist = np.ndarray(self.n, dtype=np.float64, buffer=dist_block.buf)
+        self.frontier = np.ndarray(self.n, dtype=np.int64, buffer=frontier_block.buf)
+        self.outboxes = [_outbox_views(block) for block in outbox_blocks]
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self.n, self.shared.spec, dist_block.name, frontier_block.name,
+                      [block.name for block in outbox_blocks]))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        # Drop the views before the blocks they point into
+        self.dist = self.frontier = self.outboxes = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _relax(self, nodes, light):
+        """All improving (v, new distance, u) candidates for the edges of ``nodes``"""
+        edges = int((self.offsets[nodes + 1] - self.offsets[nodes]).sum())
+        if self.pool is None or edges < PARALLEL_MIN_EDGES:
+            return _candidates(self.offsets, self.targets, self.weights, self.dist,
+                               nodes, self.delta, light)
+
+        # Cut the frontier into slices of about OUTBOX_EDGES edges or fewer
+        count = len(nodes)
+        self.frontier[:count] = nodes
+        ends = np.cumsum(self.offsets[nodes + 1] - self.offsets[nodes])
+        pieces = max(self.workers, -(-edges // OUTBOX_EDGES))
+        cuts = np.searchsorted(ends, np.arange(1, pieces) * (edges / pieces))
+        bounds = [0] + [int(c) for c in cuts] + [count]
+        slices = [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+        parts = []
+        for wave in range(0, len(slices), self.workers):
+            batch = slices[wave:wave + self.workers]
+            futures = [self.pool.submit(_relax_slice, i, lo, hi, self.delta, light)
+                       for i, (lo, hi) in enumerate(batch)]
+            for i, future in enumerate(futures):
+                size = future.result()
+                out_v, out_d, out_u = self.outboxes[i]
+                parts.append((out_v[:size].copy(), out_d[:size].copy(), out_u[:size].copy()))
+        return tuple(np.concatenate([p[k] for p in parts]) for k in range(3))
+
+    def run(self, source):
+        """Shortest (dist, prev) lists from node id ``source``, like engine.dijkstra"""
+        n, delta = self.n, self.delta
+        dist = self.dist
+        dist[:] = np.inf
+        prev = np.full(n, -1, dtype=np.int64)
+        dist[source] = 0.0
+        buckets = {0: [np.array([source], dtype=np.int64)]}
+
+        while buckets:
+            i = min(buckets)
+            settled = []
+            while i in buckets:
+                # Current members of bucket i (entries go stale when a node moves down)
+                nodes = np.unique(np.concatenate(buckets.pop(i)))
+                nodes = nodes[(dist[nodes] // delta) == i]
+                if not len(nodes):
+                    continue
+                settled.append(nodes)
+                self._update(self._relax(nodes, light=True), prev, buckets)
+            if settled:
+                self._update(self._relax(np.unique(np.concatenate(settled)), light=False),
+                             prev, buckets)
+
+        result = dist.copy()
+        if self.potentials is not None:
+            h = np.asarray(self.potentials)
+            result += h - h[source]
+        return result.tolist(), prev.tolist()
+
+    def _update(self, candidates, prev, buckets):
+        """Apply the best candidate per node and file the improved nodes into buckets"""
+        v, nd, u = candidates
+        if not len(v):
+            return
+        order = np.lexsort((nd, v))
+        v, nd, u = v[order], nd[order], u[order]
+        first = np.concatenate([[True], v[1:] != v[:-1]])
+        v, nd, u = v[first], nd[first], u[first]
+        better = nd < self.dist[v]
+        v, nd, u = v[better], nd[better], u[better]
+        self.dist[v] = nd
+        prev[v] = u
+        index = (nd // self.delta).astype(np.int64)
+        order = np.argsort(index, kind='stable')
+        index, v = index[order], v[order]
+        splits = np.flatnonzero(np.diff(index)) + 1
+        for bucket, members in zip(index[np.concatenate([[0], splits])].tolist(), np.split(v, splits)):
+            buckets.setdefault(bucket, []).append(members)
+
+
+def delta_stepping(graph, source, delta=None, workers=1):
+    """One-off delta-stepping run; use DeltaStepping directly to reuse the pool"""
+    with DeltaStepping(graph, delta, workers) as solver:
+        return solver.run(source)
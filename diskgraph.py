@@ -0,0 +1,389 @@
+"""Memory-mapped on-disk graphs for graphs larger than RAM.
+
+A .dgr file is a fixed header followed by 8-byte aligned little-endian
+sections: the CSR arrays (offsets int64[n + 1], targets int64[m], weights
+float64[m]), node coordinates (xs, ys float64[n]) and, unless the labels are
+the default A, B, ... sequence, the labels as UTF-8 text with their byte
+offsets (int64[n + 1]) and the node ids in label order (int64[n]). The file
+is mapped read-only and the engine reads adjacency straight from the mapped
+pages, so a query only faults in the rows it scans and a label lookup is a
+binary search touching O(log n) pages:
+
+    from diskgraph import open_graph
+    graph = open_graph("roads.dgr")
+    dist, prev = shortest_paths(graph, graph.node_id("A"))
+
+    python diskgraph.py roads.txt roads.dgr --undirected
+    python diskgraph.py graph.json graph.dgr
+
+engine.load_graph recognises .dgr files too, so server.py and parallel.py
+accept them in place of the JSON save format.
+"""
+import argparse
+import mmap
+import struct
+from array import array
+from itertools import islice
+
+import numpy as np
+
+from engine import MAPPED_GRAPH_MAGIC, bellman_ford_potentials, load_graph, node_label
+
+MAGIC = MAPPED_GRAPH_MAGIC
+FORMAT_VERSION = 1
+# magic, version, flags, n, edges, CSR entries, then 8 section offsets
+HEADER = struct.Struct("<8sIIqqq8q")
+SECTIONS = ('offsets', 'targets', 'weights', 'xs', 'ys', 'label_offsets', 'label_order', 'labels')
+
+DIRECTED = 1
+NEGATIVE_WEIGHTS = 2
+STORED_LABELS = 4
+
+# Edge list lines parsed per conversion chunk
+CHUNK_LINES = 1 << 20
+
+
+def _label_index(label):
+    """Inverse of engine.node_label (-1 for anything that is not such a label)"""
+    if not label or not label.isascii() or not label.isupper() or not label.isalpha():
+        return -1
+    index = 0
+    for ch in label:
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+class _Labels:
+    """Read-only sequence of node labels decoded on demand from the mapping"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return self.graph.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("node id out of range")
+        graph = self.graph
+        if graph.label_offsets is None:
+            return node_label(i)
+        return str(graph.label_bytes[graph.label_offsets[i]:graph.label_offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class _LabelIndex:
+    """Label -> node id lookups (``in``, [], get) without a dict of every label"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __contains__(self, label):
+        return self.get(label) is not None
+
+    def __getitem__(self, label):
+        node = self.get(label)
+        if node is None:
+            raise KeyError(label)
+        return node
+
+    def get(self, label, default=None):
+        graph = self.graph
+        if graph.label_order is None:
+            i = _label_index(label)
+            return i if 0 <= i < graph.n else default
+        # Binary search over the ids sorted by label
+        order, labels = graph.label_order, graph.labels
+        lo, hi = 0, graph.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if labels[order[mid]] < label:
+                lo = mid + 1
+            else:
+                hi = mid
+        return order[lo] if lo < graph.n and labels[order[lo]] == label else default
+
+
+class MappedGraph:
+    """Read-only graph backed by a memory-mapped .dgr file.
+
+    Exposes the parts of engine.Graph that the algorithms use (n, m, csr,
+    reverse_csr, potentials, reduced_csr, labels, index, node_id), with the
+    CSR arrays as memoryviews over the mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = HEADER.unpack_from(self.map)
+        magic, version, flags, n, edges, entries = fields[:6]
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a mapped graph file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has unsupported format version {version}")
+        starts = dict(zip(SECTIONS, fields[6:]))
+
+        self.flags = flags
+        self.directed = bool(flags & DIRECTED)
+        self.edges = edges
+        self.source = None
+        self.version = 1  # Never changes: the mapping is read-only
+        buf = memoryview(self.map)
+        self._views = [buf]
+
+        def view(name, typecode, length):
+            start = starts[name]
+            part = buf[start:start + 8 * length].cast(typecode)
+            self._views.append(part)
+            return part
+
+        self.offsets = view('offsets', 'q', n + 1)
+        self.targets = view('targets', 'q', entries)
+        self.weights = view('weights', 'd', entries)
+        self.xs = view('xs', 'd', n)
+        self.ys = view('ys', 'd', n)
+        if flags & STORED_LABELS:
+            self.label_offsets = view('label_offsets', 'q', n + 1)
+            self.label_order = view('label_order', 'q', n)
+            self.label_bytes = buf[starts['labels']:starts['labels'] + self.label_offsets[n]]
+            self._views.append(self.label_bytes)
+        else:
+            self.label_offsets = self.label_order = self.label_bytes = None
+        self.labels = _Labels(self)
+        self.index = _LabelIndex(self)
+
+        self._reverse_csr = None
+        self._potentials = None
+        self._potentials_done = False
+        self._reduced_csr = None
+
+    @property
+    def n(self):
+        return len(self.offsets) - 1
+
+    @property
+    def m(self):
+        return self.edges
+
+    def node_id(self, label):
+        """Return the id of the node with the given label (KeyError if missing)"""
+        return self.index[label]
+
+    def csr(self):
+        """(offsets, targets, weights) read straight from the mapped file"""
+        return self.offsets, self.targets, self.weights
+
+    def reverse_csr(self):
+        """Transposed adjacency, built in memory on first use"""
+        if self._reverse_csr is None:
+            offsets = np.frombuffer(self.offsets, dtype=np.int64)
+            targets = np.frombuffer(self.targets, dtype=np.int64)
+            order = np.argsort(targets, kind='stable')
+            rows = np.repeat(np.arange(self.n, dtype=np.int64), np.diff(offsets))
+            reverse = np.zeros(self.n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(targets, minlength=self.n), out=reverse[1:])
+            self._reverse_csr = (array('q', reverse.tobytes()), array('q', rows[order].tobytes()),
+                                 array('d', np.frombuffer(self.weights, dtype=np.float64)[order].tobytes()))
+        return self._reverse_csr
+
+    def potentials(self, cancel=None):
+        """Johnson potentials, or None when the converter found no negative weight"""
+        if not self._potentials_done:
+            self._potentials = bellman_ford_potentials(self, cancel) if self.flags & NEGATIVE_WEIGHTS else None
+            self._potentials_done = True
+        return self._potentials
+
+    def reduced_csr(self):
+        """csr() reweighted by the potentials; only negative-weight graphs pay for a copy"""
+        if self._reduced_csr is None:
+            h = self.potentials()
+            if h is None:
+                self._reduced_csr = self.csr()
+            else:
+                offsets = np.frombuffer(self.offsets, dtype=np.int64)
+                h = np.asarray(h)
+                rows = np.repeat(np.arange(self.n), np.diff(offsets))
+                targets = np.frombuffer(self.targets, dtype=np.int64)
+                reduced = np.frombuffer(self.weights, dtype=np.float64) + h[rows] - h[targets]
+                self._reduced_csr = (self.offsets, self.targets, array('d', np.maximum(reduced, 0.0).tobytes()))
+        return self._reduced_csr
+
+    def close(self):
+        # Views must be released before the mapping can close
+        self._reduced_csr = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_graph(path):
+    """Map a .dgr file written by write_graph or convert_edge_list"""
+    return MappedGraph(path)
+
+
+def _layout(n, entries, label_bytes):
+    """Section offsets for a file with the given sizes, and the total file size"""
+    sizes = [8 * (n + 1), 8 * entries, 8 * entries, 8 * n, 8 * n,
+             8 * (n + 1) if label_bytes is not None else 0, 8 * n if label_bytes is not None else 0,
+             label_bytes or 0]
+    starts = []
+    position = HEADER.size
+    for size in sizes:
+        starts.append(position)
+        position += -(-size // 8) * 8
+    return starts, position
+
+
+def _create(path, flags, n, edges, entries, label_bytes=None):
+    """Create a zero-filled .dgr file with its header, returning the section starts"""
+    starts, size = _layout(n, entries, label_bytes)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, n, edges, entries, *starts))
+        f.truncate(size)
+    return dict(zip(SECTIONS, starts))
+
+
+def _section(path, starts, name, dtype, length):
+    """Writable numpy.memmap over one section (a plain empty array when it is empty)"""
+    if not length:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r+', offset=starts[name], shape=(length,))
+
+
+def _write(path, starts, name, dtype, values):
+    section = _section(path, starts, name, dtype, len(values))
+    if len(values):
+        section[:] = values
+        section.flush()
+
+
+def write_graph(graph, path):
+    """Write an in-memory engine.Graph as a .dgr file"""
+    offsets, targets, weights = (np.frombuffer(a, dtype=dt)
+                                 for a, dt in zip(graph.csr(), (np.int64, np.int64, np.float64)))
+    n = graph.n
+    labels = list(graph.labels)
+    stored = labels != [node_label(i) for i in range(n)]
+    encoded = [label.encode('utf-8') for label in labels] if stored else None
+    flags = (DIRECTED if graph.directed else 0) | (NEGATIVE_WEIGHTS if len(weights) and weights.min() < 0 else 0)
+    label_bytes = None
+    if stored:
+        flags |= STORED_LABELS
+        label_bytes = sum(map(len, encoded))
+    starts = _create(path, flags, n, graph.m, len(targets), label_bytes)
+
+    for name, dtype, values in (('offsets', np.int64, offsets), ('targets', np.int64, targets),
+                                ('weights', np.float64, weights), ('xs', np.float64, graph.xs),
+                                ('ys', np.float64, graph.ys)):
+        _write(path, starts, name, dtype, values)
+    if stored:
+        _write(path, starts, 'label_offsets', np.int64, np.cumsum([0] + [len(b) for b in encoded]))
+        _write(path, starts, 'label_order', np.int64, sorted(range(n), key=labels.__getitem__))
+        _write(path, starts, 'labels', np.uint8, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def _edge_chunks(path, chunk_lines):
+    """(src, dst, weight) arrays for successive chunks of an edge list.
+
+    Lines are "u v [weight]" with whitespace or commas between fields; node
+    ids are 0-based integers, the weight defaults to 1 and lines starting
+    with # or % are comments.
+    """
+    with open(path, encoding='utf-8') as f:
+        while True:
+            lines = [line.replace(',', ' ') for line in islice(f, chunk_lines)]
+            if not lines:
+                return
+            lines = [line for line in lines if line.strip() and line.lstrip()[0] not in '#%']
+            if not lines:
+                continue
+            rows = np.loadtxt(lines, dtype=np.float64, ndmin=2)
+            weight = rows[:, 2] if rows.shape[1] > 2 else np.ones(len(rows))
+            yield rows[:, 0].astype(np.int64), rows[:, 1].astype(np.int64), weight
+
+
+def convert_edge_list(source, path, directed=True, chunk_lines=CHUNK_LINES):
+    """Convert an edge list to a .dgr file in two streaming passes.
+
+    The first pass counts out-degrees, the second writes every entry straight
+    to its CSR slot in the memory-mapped output, so only one chunk of edges
+    and the per-node counters are ever held in memory.
+    """
+    degrees = np.zeros(0, dtype=np.int64)
+    edges = 0
+    negative = False
+    for src, dst, weight in _edge_chunks(source, chunk_lines):
+        if len(src) and min(src.min(), dst.min()) < 0:
+            raise ValueError("Node ids must be non-negative integers")
+        heads = src if directed else np.concatenate([src, dst])
+        top = int(max(src.max(), dst.max())) + 1
+        if top > len(degrees):
+            degrees = np.concatenate([degrees, np.zeros(top - len(degrees), dtype=np.int64)])
+        degrees += np.bincount(heads, minlength=len(degrees))
+        edges += len(src)
+        negative = negative or bool((weight < 0).any())
+
+    n = len(degrees)
+    entries = int(degrees.sum())
+    flags = (DIRECTED if directed else 0) | (NEGATIVE_WEIGHTS if negative else 0)
+    starts = _create(path, flags, n, edges, entries)
+    offsets = _section(path, starts, 'offsets', np.int64, n + 1)
+    np.cumsum(degrees, out=offsets[1:])
+    targets = _section(path, starts, 'targets', np.int64, entries)
+    weights = _section(path, starts, 'weights', np.float64, entries)
+
+    fill = np.array(offsets[:-1])
+    for src, dst, weight in _edge_chunks(source, chunk_lines):
+        if not directed:
+            src, dst, weight = np.concatenate([src, dst]), np.concatenate([dst, src]), np.concatenate([weight, weight])
+        # Entries of the same node go to consecutive slots after its fill pointer
+        order = np.argsort(src, kind='stable')
+        src, dst, weight = src[order], dst[order], weight[order]
+        nodes, first, counts = np.unique(src, return_index=True, return_counts=True)
+        slots = fill[src] + np.arange(len(src)) - np.repeat(first, counts)
+        targets[slots] = dst
+        weights[slots] = weight
+        fill[nodes] += counts
+
+    for section in (offsets, targets, weights):
+        if isinstance(section, np.memmap):
+            section.flush()
+    return n, edges
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a graph to the memory-mapped .dgr format")
+    parser.add_argument("source", help="graph file written by File > Export Graph, or an edge list")
+    parser.add_argument("output", help="path of the .dgr file to write")
+    parser.add_argument("--undirected", action="store_true",
+                        help="treat edge list lines as undirected edges")
+    args = parser.parse_args(argv)
+
+    # Saved graphs are JSON objects; anything else is read as an edge list
+    with open(args.source, 'rb') as f:
+        is_json = f.read(64).lstrip().startswith(b'{')
+    if is_json:
+        graph = load_graph(args.source)
+        write_graph(graph, args.output)
+        n, edges = graph.n, graph.m
+    else:
+        n, edges = convert_edge_list(args.source, args.output, directed=not args.undirected)
+    print(f"Wrote {n} nodes / {edges} edges to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1400 @@
+"""Headless graph store and shortest-path engine.
+
+The visualizer, the query server and the benchmarks all share this module so
+that the algorithms can run without a Tk window.
+"""
+import heapq
+import json
+import string
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
+from itertools import islice, product
+
+INF = float('inf')
+
+GRAPH_FORMAT = "dijkstra-visualizer-graph"
+GRAPH_FORMAT_VERSION = 1
+# First bytes of a memory-mapped .dgr graph (see diskgraph)
+MAPPED_GRAPH_MAGIC = b"DJKGRAPH"
+
+# Source components whose reachable sets a ComponentIndex keeps
+REACH_CACHE_SIZE = 256
+
+# All pairs: vectorized Floyd-Warshall (NumPy, n x n matrices) beats repeated
+# Dijkstra once the adjacency has at least n^2 / FLOYD_WARSHALL_DENSITY entries
+FLOYD_WARSHALL_MAX_NODES = 3000
+FLOYD_WARSHALL_DENSITY = 50
+
+
+def _numpy():
+    """Return the numpy module, or None when it is not installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _to_array(typecode, values):
+    """Copy a sequence or NumPy array into a typed array without a Python loop"""
+    if hasattr(values, 'astype'):
+        return array(typecode, values.astype({'q': 'int64', 'd': 'float64', 'b': 'int8'}[typecode]).tobytes())
+    return array(typecode, values)
+
+
+def node_label(index):
+    """Spreadsheet-style label for a 0-based index: A..Z, AA..AZ, BA.., AAA.."""
+    label = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        label = chr(65 + rem) + label
+    return label
+
+
+def node_labels(count):
+    """The first ``count`` labels of the node_label sequence, generated in bulk"""
+    labels = []
+    length = 1
+    while len(labels) < count:
+        letters = product(string.ascii_uppercase, repeat=length)
+        labels.extend(map("".join, islice(letters, count - len(labels))))
+        length += 1
+    return labels
+
+
+class NegativeCycleError(ValueError):
+    """Raised when negative edge weights form a cycle, so shortest paths are undefined"""
+
+    def __init__(self, cycle):
+        super().__init__("Graph contains a negative cycle")
+        self.cycle = cycle  # Node ids around the cycle, in edge order
+
+
+class RunCancelled(Exception):
+    """Raised inside a long run when its cancel event is set"""
+
+
+class Graph:
+    """Compact graph store: a node table plus parallel edge arrays.
+
+    Nodes are addressed by integer id (their position in the node table) and
+    looked up by label through ``index``. A CSR (compressed sparse row) view of
+    the adjacency is built on demand and cached until the graph changes.
+    """
+
+    def __init__(self, directed=True):
+        self.directed = directed
+        self.labels = []
+        self.xs = []
+        self.ys = []
+        self.index = {}
+        self.edge_src = array('q')
+        self.edge_dst = array('q')
+        self.edge_weight = array('d')
+        self.edge_directed = array('b')
+        self.source = None  # Optional default source label kept with saved graphs
+        self.version = 0
+        self._csr = None
+        self._reverse_csr = None
+        self._slots = {}  # reverse flag -> CSR positions of each edge (see set_weight)
+        self._edge_lookup = None
+        self._potentials = None
+        self._potentials_version = -1
+        self._reduced_csr = None
+        self._components = None  # ComponentIndex, kept current by add_node and add_edge
+
+    @classmethod
+    def from_arrays(cls, src, dst, weight, xs, ys, labels=None, directed=True):
+        """Build a graph in one step from node coordinates and edge arrays.
+
+        Accepts NumPy arrays or plain sequences; nodes are labelled A, B, ...
+        unless ``labels`` is given.
+        """
+        graph = cls(directed=directed)
+        n = len(xs)
+        graph.labels = list(labels) if labels is not None else node_labels(n)
+        graph.xs = xs.tolist() if hasattr(xs, 'tolist') else list(xs)
+        graph.ys = ys.tolist() if hasattr(ys, 'tolist') else list(ys)
+        graph.index = {label: i for i, label in enumerate(graph.labels)}
+        if len(graph.index) != n:
+            raise ValueError("Node labels must be unique")
+        graph.edge_src = _to_array('q', src)
+        graph.edge_dst = _to_array('q', dst)
+        graph.edge_weight = _to_array('d', weight)
+        graph.edge_directed = array('b', [1 if directed else 0]) * len(graph.edge_src)
+        graph.version = 1
+        return graph
+
+    @property
+    def n(self):
+        return len(self.labels)
+
+    @property
+    def m(self):
+        return len(self.edge_src)
+
+    def add_node(self, label, x=0.0, y=0.0):
+        """Add a node and return its id"""
+        if label in self.index:
+            raise ValueError(f"Node '{label}' already exists")
+        node_id = len(self.labels)
+        self.labels.append(label)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.index[label] = node_id
+        self._changed()
+        if self._components is not None:
+            self._components.add_node()
+        return node_id
+
+    def add_edge(self, u, v, weight, directed=None):
+        """Add an edge between node ids u and v and return its id"""
+        if directed is None:
+            directed = self.directed
+        self.edge_src.append(u)
+        self.edge_dst.append(v)
+        self.edge_weight.append(weight)
+        self.edge_directed.append(1 if directed else 0)
+        self._changed()
+        if self._components is not None:
+            self._components.add_edge(u, v, directed)
+        return len(self.edge_src) - 1
+
+    def node_id(self, label):
+        """Return the id of the node with the given label (KeyError if missing)"""
+        return self.index[label]
+
+    def components(self):
+        """ComponentIndex answering reachability without a search"""
+        if self._components is None:
+            self._components = ComponentIndex(self)
+        return self._components
+
+    def neighbors(self, u):
+        """(v, weight) pairs for the edges leaving u, the interface astar walks"""
+        offsets, targets, weights = self.csr()
+        return [(targets[i], weights[i]) for i in range(offsets[u], offsets[u + 1])]
+
+    def find_edge(self, u, v):
+        """Ids of the edges that lead from u to v (undirected edges count both ways)"""
+        if self._edge_lookup is None:
+            lookup = {}
+            for e, (a, b, directed) in enumerate(zip(self.edge_src, self.edge_dst, self.edge_directed)):
+                lookup.setdefault((a, b), []).append(e)
+                if not directed and a != b:
+                    lookup.setdefault((b, a), []).append(e)
+            self._edge_lookup = lookup
+        return self._edge_lookup.get((u, v), [])
+
+    def set_weight(self, edge, weight):
+        """Change one edge's weight in O(1).
+
+        Cached CSR arrays are patched in place rather than rebuilt; the
+        reweighted CSR and the potentials are recomputed on next use.
+        """
+        self.edge_weight[edge] = weight
+        for reverse, cached in ((False, self._csr), (True, self._reverse_csr)):
+            if cached is not None:
+                weights = cached[2]
+                for slot in self._edge_slots(reverse)[edge]:
+                    weights[slot] = weight
+        self.version += 1
+        self._reduced_csr = None
+
+    def _edge_slots(self, reverse):
+        """Per edge, the positions of its entries in csr() (or reverse_csr())"""
+        if reverse not in self._slots:
+            offsets = (self.reverse_csr() if reverse else self.csr())[0]
+            heads, tails = (self.edge_dst, self.edge_src) if reverse else (self.edge_src, self.edge_dst)
+            # Same fill order as _build_csr: every edge at its head, then the
+            # reverse entries of undirected edges
+            fill = list(offsets[:-1])
+            slots = [[] for _ in range(self.m)]
+            for e in range(self.m):
+                slots[e].append(fill[heads[e]])
+                fill[heads[e]] += 1
+            for e in range(self.m):
+                if not self.edge_directed[e]:
+                    slots[e].append(fill[tails[e]])
+                    fill[tails[e]] += 1
+            self._slots[reverse] = slots
+        return self._slots[reverse]
+
+    def _changed(self):
+        self.version += 1
+        self._csr = None
+        self._reverse_csr = None
+        self._reduced_csr = None
+        self._slots = {}
+        self._edge_lookup = None
+
+    def csr(self):
+        """Return the forward adjacency as (offsets, targets, weights) arrays.
+
+        Undirected edges appear once in each direction. Neighbours of node u are
+        targets[offsets[u]:offsets[u + 1]].
+        """
+        if self._csr is None:
+            self._csr = self._build_csr(reverse=False)
+        return self._csr
+
+    def reverse_csr(self):
+        """Return the adjacency of the transposed graph in CSR form"""
+        if self._reverse_csr is None:
+            self._reverse_csr = self._build_csr(reverse=True)
+        return self._reverse_csr
+
+    def potentials(self, cancel=None):
+        """Johnson potentials h with w(u, v) + h[u] - h[v] >= 0 on every edge.
+
+        Returns None when no weight is negative (plain Dijkstra is already
+        correct). Raises NegativeCycleError. Cached until the graph changes.
+        """
+        if self._potentials_version != self.version:
+            self._potentials = (bellman_ford_potentials(self, cancel)
+                                if self.m and min(self.edge_weight) < 0 else None)
+            self._potentials_version = self.version
+        return self._potentials
+
+    def reduced_csr(self):
+        """Return csr() with every weight reweighted by the potentials (all >= 0)"""
+        if self._reduced_csr is None:
+            offsets, targets, weights = self.csr()
+            h = self.potentials()
+            if h is None:
+                self._reduced_csr = (offsets, targets, weights)
+            else:
+                reduced = array('d', weights)
+                for u in range(self.n):
+                    hu = h[u]
+                    for i in range(offsets[u], offsets[u + 1]):
+                        # Clamp the round-off on tight edges
+                        reduced[i] = max(0.0, weights[i] + hu - h[targets[i]])
+                self._reduced_csr = (offsets, targets, reduced)
+        return self._reduced_csr
+
+    def _build_csr(self, reverse):
+        # Entries for node u are its outgoing edges in edge order, followed by
+        # the reverse direction of its undirected edges in edge order
+        heads, tails = (self.edge_dst, self.edge_src) if reverse else (self.edge_src, self.edge_dst)
+        np = _numpy()
+        if np is not None and self.m > 5000:
+            return self._build_csr_numpy(np, heads, tails)
+
+        n = self.n
+        counts = [0] * (n + 1)
+        for e in range(self.m):
+            counts[heads[e] + 1] += 1
+            if not self.edge_directed[e]:
+                counts[tails[e] + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        offsets = array('q', counts)
+        fill = counts[:-1]
+        total = counts[n]
+        targets = array('q', bytes(8 * total))
+        weights = array('d', bytes(8 * total))
+        for e in range(self.m):
+            u = heads[e]
+            pos = fill[u]
+            targets[pos] = tails[e]
+            weights[pos] = self.edge_weight[e]
+            fill[u] = pos + 1
+        for e in range(self.m):
+            if not self.edge_directed[e]:
+                v = tails[e]
+                pos = fill[v]
+                targets[pos] = heads[e]
+                weights[pos] = self.edge_weight[e]
+                fill[v] = pos + 1
+        return offsets, targets, weights
+
+    def _build_csr_numpy(self, np, heads, tails):
+        heads = np.frombuffer(heads, dtype=np.int64)
+        tails = np.frombuffer(tails, dtype=np.int64)
+        weight = np.frombuffer(self.edge_weight, dtype=np.float64)
+        both = np.frombuffer(self.edge_directed, dtype=np.int8) == 0
+        rows = np.concatenate([heads, tails[both]])
+        cols = np.concatenate([tails, heads[both]])
+        vals = np.concatenate([weight, weight[both]])
+        order = np.argsort(rows, kind='stable')
+        offsets = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.n), out=offsets[1:])
+        return (array('q', offsets.tobytes()),
+                array('q', cols[order].tobytes()),
+                array('d', vals[order].tobytes()))
+
+
+class ComponentIndex:
+    """Which nodes can reach which, answered without running a search.
+
+    While every edge is undirected this is a union-find forest that absorbs
+    each added edge in near-constant time. Once an edge is directed it holds
+    the strongly connected components (Tarjan) and their condensation,
+    recomputed on the next query after an edge joins two different
+    components; components are numbered so that an edge never leads to a
+    higher number, which rules most unreachable pairs out with one compare.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.directed = any(graph.edge_directed)
+        self._rebuild()
+
+    def _rebuild(self):
+        graph = self.graph
+        self.dirty = False
+        self.reach = {}  # component -> bytearray of the components it reaches
+        if not self.directed:
+            self.parent = list(range(graph.n))
+            for u, v in zip(graph.edge_src, graph.edge_dst):
+                self._union(u, v)
+            return
+        offsets, targets, _ = graph.csr()
+        self.component, self.count = _strong_components(graph.n, offsets, targets)
+        downstream = [set() for _ in range(self.count)]
+        component = self.component
+        for u in range(graph.n):
+            cu = component[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                cv = component[targets[i]]
+                if cv != cu:
+                    downstream[cu].add(cv)
+        self.downstream = [list(c) for c in downstream]
+
+    def _find(self, u):
+        parent = self.parent
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return u
+
+    def _union(self, u, v):
+        ru, rv = self._find(u), self._find(v)
+        if ru != rv:
+            self.parent[max(ru, rv)] = min(ru, rv)
+
+    def add_node(self):
+        if not self.directed:
+            self.parent.append(len(self.parent))
+        elif not self.dirty:
+            # A node without edges is a component of its own, reached by nothing
+            self.component.append(self.count)
+            self.downstream.append([])
+            self.count += 1
+
+    def add_edge(self, u, v, directed):
+        if not self.directed and not directed:
+            self._union(u, v)
+        elif not self.directed:
+            self.directed = True
+            self.dirty = True
+        elif not self.dirty and self.component[u] != self.component[v]:
+            self.dirty = True
+
+    def reachable(self, u, v):
+        """True when some path leads from node u to node v"""
+        if self.dirty:
+            self._rebuild()
+        if not self.directed:
+            return self._find(u) == self._find(v)
+        cu, cv = self.component[u], self.component[v]
+        if cu == cv:
+            return True
+        if cv > cu:
+            return False
+        reach = self.reach.get(cu)
+        if reach is None:
+            if len(self.reach) >= REACH_CACHE_SIZE:
+                self.reach.clear()
+            reach = bytearray(self.count)
+            reach[cu] = 1
+            stack = [cu]
+            while stack:
+                for c in self.downstream[stack.pop()]:
+                    if not reach[c]:
+                        reach[c] = 1
+                        stack.append(c)
+            self.reach[cu] = reach
+        return bool(reach[cv])
+
+    def unreachable_from(self, source):
+        """Ids of the nodes no path from ``source`` leads to"""
+        return [v for v in range(self.graph.n) if not self.reachable(source, v)]
+
+
+def _unreachable(graph, source, target):
+    """True when the graph's component index rules out every source -> target path"""
+    components = getattr(graph, 'components', None)
+    return target is not None and components is not None and not components().reachable(source, target)
+
+
+def _strong_components(n, offsets, targets):
+    """Tarjan's algorithm without recursion: (component per node, count), with
+    components numbered in the order they complete (sinks first)"""
+    index = [-1] * n
+    low = [0] * n
+    component = [-1] * n
+    on_stack = bytearray(n)
+    stack = []
+    counter = count = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, offsets[root])]
+        while work:
+            u, i = work[-1]
+            if i < offsets[u + 1]:
+                work[-1] = (u, i + 1)
+                v = targets[i]
+                if index[v] == -1:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = 1
+                    work.append((v, offsets[v]))
+                elif on_stack[v] and index[v] < low[u]:
+                    low[u] = index[v]
+                continue
+            work.pop()
+            if work and low[u] < low[work[-1][0]]:
+                low[work[-1][0]] = low[u]
+            if low[u] == index[u]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    component[w] = count
+                    if w == u:
+                        break
+                count += 1
+    return component, count
+
+
+class RunStats:
+    """Counters and timings collected during one shortest-path run"""
+
+    LABELS = (
+        ('nodes_settled', "Nodes settled"),
+        ('edges_relaxed', "Edges relaxed"),
+        ('relaxations', "Successful relaxations"),
+        ('heap_pushes', "Heap pushes"),
+        ('heap_pops', "Heap pops"),
+        ('stale_pops', "Stale pops"),
+        ('peak_frontier', "Peak frontier size"),
+        ('compute_time', "Compute time (s)"),
+        ('render_time', "Render time (s)"),
+    )
+
+    def __init__(self):
+        self.nodes_settled = 0
+        self.edges_relaxed = 0
+        self.relaxations = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.stale_pops = 0
+        self.peak_frontier = 0
+        self.compute_time = 0.0
+        self.render_time = 0.0
+
+    def rows(self):
+        """Return (label, formatted value) pairs in display order"""
+        rows = []
+        for field, label in self.LABELS:
+            value = getattr(self, field)
+            rows.append((label, f"{value:.4f}" if isinstance(value, float) else str(value)))
+        return rows
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field, _ in self.LABELS}
+
+
+def dijkstra(graph, source, target=None, stats=None):
+    """Single-source shortest paths from node id ``source``.
+
+    Returns (dist, prev) lists indexed by node id; unreachable nodes keep an
+    infinite distance and a predecessor of -1. When ``target`` is given the
+    search stops as soon as that node is settled. Pass a RunStats as ``stats``
+    to collect counters for the run. Weights must be non-negative; see
+    shortest_paths for graphs that may have negative edges. A target in
+    another component returns at once, without a search.
+    """
+    started = time.perf_counter()
+    n = graph.n
+    dist = [INF] * n
+    prev = [-1] * n
+    if _unreachable(graph, source, target):
+        dist[source] = 0.0
+        return dist, prev
+    offsets, targets, weights = graph.csr()
+    done = [False] * n
+    dist[source] = 0.0
+    pq = [(0.0, source)]
+    # Counters are kept in locals and only written out once the loop finishes
+    pops = settled = scanned = relaxed = 0
+    peak = 1
+    while pq:
+        d, u = heapq.heappop(pq)
+        pops += 1
+        if done[u]:
+            continue
+        done[u] = True
+        settled += 1
+        if u == target:
+            break
+        start, end = offsets[u], offsets[u + 1]
+        scanned += end - start
+        for i in range(start, end):
+            v = targets[i]
+            nd = d + weights[i]
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                heapq.heappush(pq, (nd, v))
+                relaxed += 1
+        if len(pq) > peak:
+            peak = len(pq)
+    if stats is not None:
+        stats.nodes_settled += settled
+        stats.edges_relaxed += scanned
+        stats.relaxations += relaxed
+        stats.heap_pushes += relaxed + 1
+        stats.heap_pops += pops
+        stats.stale_pops += pops - settled
+        stats.peak_frontier = max(stats.peak_frontier, peak)
+        stats.compute_time += time.perf_counter() - started
+    return dist, prev
+
+
+def astar(graph, source, target, heuristic=None, stats=None):
+    """Shortest ``source`` -> ``target`` path, guided by a lower bound.
+
+    Only needs ``graph.n`` and ``graph.neighbors(u)`` -> [(v, weight)], so it
+    runs on implicit graphs whose edges are generated on demand (see
+    imagegraph.ImageGrid) as well as on Graph. ``heuristic(u)`` must never
+    overestimate the distance from u to the target; it defaults to the
+    graph's own heuristic(u, target) when it has one, and to 0 (plain
+    Dijkstra) otherwise. Weights must be non-negative. Returns (distance,
+    path of node ids), or (INF, []) when the target is unreachable.
+    """
+    started = time.perf_counter()
+    if _unreachable(graph, source, target):
+        return INF, []
+    if heuristic is None:
+        bound = getattr(graph, 'heuristic', None)
+        heuristic = (lambda u: bound(u, target)) if bound else (lambda u: 0.0)
+    neighbors = graph.neighbors
+    # Flat arrays rather than lists keep multi-megapixel grids in memory
+    dist = array('d', [INF]) * graph.n
+    prev = array('q', [-1]) * graph.n
+    done = bytearray(graph.n)
+    dist[source] = 0.0
+    pq = [(heuristic(source), 0.0, source)]
+    pops = settled = scanned = relaxed = 0
+    peak = 1
+    while pq:
+        _, d, u = heapq.heappop(pq)
+        pops += 1
+        if done[u]:
+            continue
+        done[u] = 1
+        settled += 1
+        if u == target:
+            break
+        for v, w in neighbors(u):
+            scanned += 1
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                heapq.heappush(pq, (nd + heuristic(v), nd, v))
+                relaxed += 1
+        if len(pq) > peak:
+            peak = len(pq)
+    if stats is not None:
+        stats.nodes_settled += settled
+        stats.edges_relaxed += scanned
+        stats.relaxations += relaxed
+        stats.heap_pushes += relaxed + 1
+        stats.heap_pops += pops
+        stats.stale_pops += pops - settled
+        stats.peak_frontier = max(stats.peak_frontier, peak)
+        stats.compute_time += time.perf_counter() - started
+    if dist[target] == INF:
+        return INF, []
+    return dist[target], path_to(prev, target)
+
+
+class _ReducedView:
+    """Graph-like view that hands dijkstra the reweighted CSR"""
+
+    def __init__(self, graph):
+        self.n = graph.n
+        self.graph = graph
+
+    def csr(self):
+        return self.graph.reduced_csr()
+
+
+def bellman_ford_potentials(graph, cancel=None):
+    """Distances from a virtual source joined to every node by a 0-weight edge.
+
+    Queue-based Bellman-Ford over the CSR. A node whose best path grows to n
+    edges lies behind a negative cycle, which is raised as NegativeCycleError.
+    Raises RunCancelled once the ``cancel`` event is set.
+    """
+    offsets, targets, weights = graph.csr()
+    n = graph.n
+    h = [0.0] * n
+    prev = [-1] * n
+    hops = [0] * n
+    queued = [True] * n
+    queue = deque(range(n))
+    pops = 0
+    while queue:
+        u = queue.popleft()
+        queued[u] = False
+        pops += 1
+        if cancel is not None and not pops % PROGRESS_INTERVAL and cancel.is_set():
+            raise RunCancelled()
+        hu = h[u]
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            nd = hu + weights[i]
+            if nd < h[v]:
+                h[v] = nd
+                prev[v] = u
+                hops[v] = hops[u] + 1
+                if hops[v] >= n:
+                    raise NegativeCycleError(_find_cycle(prev, v))
+                if not queued[v]:
+                    queued[v] = True
+                    queue.append(v)
+    return h
+
+
+def _find_cycle(prev, v):
+    """Node ids of a cycle on the predecessor chain from v ([] if there is none)"""
+    seen = set()
+    while v != -1 and v not in seen:
+        seen.add(v)
+        v = prev[v]
+    if v == -1:
+        return []
+    cycle = [v]
+    u = prev[v]
+    while u != v:
+        cycle.append(u)
+        u = prev[u]
+    cycle.reverse()
+    return cycle
+
+
+def shortest_paths(graph, source, target=None, stats=None):
+    """dijkstra() that also accepts negative edge weights.
+
+    With negative weights the search runs on Johnson-reweighted edges (the
+    potentials are cached on the graph, so only the first query pays for
+    Bellman-Ford) and the distances are translated back. Raises
+    NegativeCycleError when the weights admit no shortest paths.
+    """
+    if _unreachable(graph, source, target):
+        return dijkstra(graph, source, target, stats)
+    h = graph.potentials()
+    if h is None:
+        return dijkstra(graph, source, target, stats)
+    dist, prev = dijkstra(_ReducedView(graph), source, target, stats)
+    hs = h[source]
+    return [d if d == INF else d - hs + h[v] for v, d in enumerate(dist)], prev
+
+
+def nearest_sources(graph, sources, stats=None, cancel=None):
+    """Distance from the nearest of several sources to every node, in one run.
+
+    Every source is seeded at distance 0, as if a virtual super-source were
+    joined to each by a 0-weight edge, so the cost is one Dijkstra however
+    many sources there are. Returns (dist, prev, owner) lists; owner[v] is
+    the index into ``sources`` of the source that reaches v first (-1 when
+    none does). Negative weights are handled through the potentials: seeding
+    source s at -h[s] on the reduced edges ranks sources by true distance.
+    Raises RunCancelled once the ``cancel`` event is set.
+    """
+    started = time.perf_counter()
+    h = graph.potentials(cancel)
+    offsets, targets, weights = graph.reduced_csr()
+    n = graph.n
+    dist = [INF] * n
+    prev = [-1] * n
+    owner = [-1] * n
+    done = [False] * n
+    pq = []
+    for i, s in enumerate(sources):
+        d = -h[s] if h is not None else 0.0
+        if d < dist[s]:
+            dist[s] = d
+            owner[s] = i
+            pq.append((d, s))
+    heapq.heapify(pq)
+    pops = settled = scanned = relaxed = 0
+    peak = len(pq)
+    while pq:
+        d, u = heapq.heappop(pq)
+        pops += 1
+        if done[u]:
+            continue
+        done[u] = True
+        settled += 1
+        if cancel is not None and not settled % PROGRESS_INTERVAL and cancel.is_set():
+            raise RunCancelled()
+        start, end = offsets[u], offsets[u + 1]
+        scanned += end - start
+        for i in range(start, end):
+            v = targets[i]
+            nd = d + weights[i]
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                owner[v] = owner[u]
+                heapq.heappush(pq, (nd, v))
+                relaxed += 1
+        if len(pq) > peak:
+            peak = len(pq)
+    if h is not None:
+        dist = [d if d == INF else d + h[v] for v, d in enumerate(dist)]
+    if stats is not None:
+        stats.nodes_settled += settled
+        stats.edges_relaxed += scanned
+        stats.relaxations += relaxed
+        stats.heap_pushes += relaxed + len(sources)
+        stats.heap_pops += pops
+        stats.stale_pops += pops - settled
+        stats.peak_frontier = max(stats.peak_frontier, peak)
+        stats.compute_time += time.perf_counter() - started
+    return dist, prev, owner
+
+
+def isochrone(graph, source, budget, stats=None, cancel=None):
+    """Everything reachable from ``source`` within distance ``budget``.
+
+    The search stops as soon as the smallest frontier distance exceeds the
+    budget and keeps its state in dicts, so the work is proportional to the
+    region rather than to the graph. Returns (dist, prev, boundary): dist and
+    prev are dicts over the reached nodes, and boundary lists the (u, v,
+    weight) edges that leave the region, u inside and v beyond the budget.
+    With negative weights no frontier bound is valid, so the full
+    shortest-path tree is computed and cut down to the region. Raises
+    RunCancelled once the ``cancel`` event is set.
+    """
+    started = time.perf_counter()
+    offsets, targets, weights = graph.csr()
+    if graph.potentials(cancel) is not None:
+        full_dist, full_prev, _ = nearest_sources(graph, [source], stats, cancel)
+        dist = {v: d for v, d in enumerate(full_dist) if d <= budget}
+        prev = {v: full_prev[v] for v in dist}
+        settled = list(dist)
+    else:
+        dist = {source: 0.0}
+        prev = {source: -1}
+        settled = []
+        done = set()
+        pq = [(0.0, source)]
+        pops = scanned = relaxed = 0
+        peak = 1
+        while pq:
+            d, u = heapq.heappop(pq)
+            pops += 1
+            if d > budget:
+                break
+            if u in done:
+                continue
+            done.add(u)
+            settled.append(u)
+            if cancel is not None and not len(settled) % PROGRESS_INTERVAL and cancel.is_set():
+                raise RunCancelled()
+            start, end = offsets[u], offsets[u + 1]
+            scanned += end - start
+            for i in range(start, end):
+                v = targets[i]
+                nd = d + weights[i]
+                if nd <= budget and nd < dist.get(v, INF):
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(pq, (nd, v))
+                    relaxed += 1
+            if len(pq) > peak:
+                peak = len(pq)
+        if stats is not None:
+            stats.nodes_settled += len(settled)
+            stats.edges_relaxed += scanned
+            stats.relaxations += relaxed
+            stats.heap_pushes += relaxed + 1
+            stats.heap_pops += pops
+            stats.stale_pops += pops - len(settled)
+            stats.peak_frontier = max(stats.peak_frontier, peak)
+            stats.compute_time += time.perf_counter() - started
+    boundary = []
+    for u in settled:
+        for i in range(offsets[u], offsets[u + 1]):
+            if targets[i] not in dist:
+                boundary.append((u, targets[i], weights[i]))
+    return dist, prev, boundary
+
+
+class DynamicTree:
+    """Shortest-path tree from one source, repaired in place as weights change.
+
+    update() applies a batch of weight changes with one dynamic Dijkstra pass
+    (in the style of Ramalingam and Reps): the subtrees hanging off tree edges
+    that got heavier are detached and re-attached through their cheapest
+    in-edges, edges that got lighter seed improvements, and a single queue
+    settles both, so the work is proportional to the part of the tree that
+    actually changes. The repair needs non-negative weights; while any weight
+    is negative every batch falls back to a full shortest_paths run (which
+    raises NegativeCycleError when a batch creates one).
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        self.negative = graph.m > 0 and min(graph.edge_weight) < 0
+        self.dist, self.prev = shortest_paths(graph, source)
+
+    def update(self, changes):
+        """Apply {edge id: new weight} and return the ids of the nodes whose
+        distance or predecessor changed (None after a full recomputation)"""
+        graph = self.graph
+        dist, prev = self.dist, self.prev
+        src, dst, directed = graph.edge_src, graph.edge_dst, graph.edge_directed
+
+        heavier = []
+        lighter = []
+        for e, weight in changes.items():
+            old = graph.edge_weight[e]
+            if weight == old:
+                continue
+            graph.set_weight(e, weight)
+            arcs = [(src[e], dst[e])] if directed[e] else [(src[e], dst[e]), (dst[e], src[e])]
+            if weight > old:
+                # Only a tree edge getting heavier can lengthen a shortest path
+                heavier.extend(b for a, b in arcs if prev[b] == a and dist[a] + old == dist[b])
+            else:
+                lighter.extend((a, b, weight) for a, b in arcs)
+        if self.negative or any(w < 0 for _, _, w in lighter):
+            self.negative = min(graph.edge_weight) < 0
+            self.dist, self.prev = shortest_paths(graph, self.source)
+            return None
+
+        offsets, targets, weights = graph.csr()
+        touched = {}  # node -> (dist, prev) before this batch
+
+        # Detach the subtrees below heavier tree edges
+        detached = set()
+        stack = heavier
+        while stack:
+            v = stack.pop()
+            if v in detached:
+                continue
+            detached.add(v)
+            touched[v] = (dist[v], prev[v])
+            for i in range(offsets[v], offsets[v + 1]):
+                w = targets[i]
+                if prev[w] == v and w not in detached:
+                    stack.append(w)
+        for v in detached:
+            dist[v] = INF
+            prev[v] = -1
+
+        # Re-attach each detached node through its cheapest in-edge from the rest of the tree
+        pq = []
+        if detached:
+            r_offsets, r_sources, r_weights = graph.reverse_csr()
+            for v in detached:
+                best, parent = INF, -1
+                for i in range(r_offsets[v], r_offsets[v + 1]):
+                    u = r_sources[i]
+                    if u not in detached and dist[u] + r_weights[i] < best:
+                        best, parent = dist[u] + r_weights[i], u
+                if parent != -1:
+                    dist[v] = best
+                    prev[v] = parent
+                    pq.append((best, v))
+        for a, b, weight in lighter:
+            if dist[a] + weight < dist[b]:
+                touched.setdefault(b, (dist[b], prev[b]))
+                dist[b] = dist[a] + weight
+                prev[b] = a
+                pq.append((dist[b], b))
+        heapq.heapify(pq)
+
+        while pq:
+            d, u = heapq.heappop(pq)
+            if d > dist[u]:
+                continue
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                nd = d + weights[i]
+                if nd < dist[v]:
+                    touched.setdefault(v, (dist[v], prev[v]))
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(pq, (nd, v))
+
+        return {v for v, before in touched.items() if before != (dist[v], prev[v])}
+
+
+def _reduced_reverse_csr(graph):
+    """reverse_csr() with the same Johnson reweighting as reduced_csr()"""
+    offsets, sources, weights = graph.reverse_csr()
+    h = graph.potentials()
+    if h is None:
+        return offsets, sources, weights
+    reduced = array('d', weights)
+    for v in range(graph.n):
+        hv = h[v]
+        for i in range(offsets[v], offsets[v + 1]):
+            reduced[i] = max(0.0, weights[i] + h[sources[i]] - hv)
+    return offsets, sources, reduced
+
+
+class _CSRView:
+    """Graph-like wrapper around a bare (offsets, targets, weights) triple"""
+
+    def __init__(self, n, csr):
+        self.n = n
+        self._arrays = csr
+
+    def csr(self):
+        return self._arrays
+
+
+def _spur_search(csr, lower, spur, target, banned_nodes, banned_edges, limit):
+    """A* from ``spur`` to ``target`` avoiding the banned nodes and first edges.
+
+    ``lower`` (distances to the target in the full graph) stays a consistent
+    heuristic after removing nodes and edges. Returns the cumulative costs and
+    the path, or None when no path is cheaper than ``limit``.
+    """
+    offsets, targets, weights = csr
+    g = {spur: 0.0}
+    prev = {spur: -1}
+    closed = set()
+    pq = [(lower[spur], spur)]
+    while pq:
+        f, u = heapq.heappop(pq)
+        if f >= limit:
+            return None
+        if u in closed:
+            continue
+        if u == target:
+            path = path_to(prev, u)
+            return [g[v] for v in path], path
+        closed.add(u)
+        gu = g[u]
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            if v in banned_nodes or v in closed or lower[v] == INF:
+                continue
+            if u == spur and (u, v) in banned_edges:
+                continue
+            nd = gu + weights[i]
+            if nd < g.get(v, INF):
+                g[v] = nd
+                prev[v] = u
+                heapq.heappush(pq, (nd + lower[v], v))
+    return None
+
+
+def k_shortest_paths(graph, source, target, k, cancel=None):
+    """Up to ``k`` loopless source -> target paths as (cost, node ids) in cost order.
+
+    Yen's algorithm with two shortcuts. One reverse Dijkstra from the target
+    gives exact distances to it; they serve as the A* lower bound for every
+    spur search, and when the tree path from a spur node avoids the removed
+    nodes and edges it is taken as the spur path without searching at all.
+    Spur nodes whose lower bound cannot beat the current k-th candidate are
+    skipped. Negative weights are handled through the Johnson potentials.
+    Raises RunCancelled once the ``cancel`` event is set.
+    """
+    if _unreachable(graph, source, target):
+        return []
+    h = graph.potentials(cancel)
+    forward = graph.reduced_csr()
+    lower, succ = dijkstra(_CSRView(graph.n, _reduced_reverse_csr(graph)), target)
+    if lower[source] == INF:
+        return []
+
+    def tree_path(v):
+        path = [v]
+        while v != target:
+            v = succ[v]
+            path.append(v)
+        return path
+
+    first = tree_path(source)
+    found = [(lower[source], first, [lower[source] - lower[v] for v in first])]
+    candidates = []  # heap of (cost, path, cumulative costs)
+    seen = {tuple(first)}
+
+    while len(found) < k:
+        _, last, last_costs = found[-1]
+        # Only the best k - len(found) candidates can still be accepted
+        needed = k - len(found)
+        limit = heapq.nsmallest(needed, candidates)[-1][0] if len(candidates) >= needed else INF
+
+        for j in range(len(last) - 1):
+            if cancel is not None and cancel.is_set():
+                raise RunCancelled()
+            spur = last[j]
+            root = last[:j + 1]
+            root_cost = last_costs[j]
+            if root_cost + lower[spur] >= limit:
+                continue
+            banned_edges = {(p[j], p[j + 1]) for _, p, _ in found if p[:j + 1] == root}
+            banned_nodes = set(root[:-1])
+
+            # Reuse the reverse tree when its path from the spur node is still allowed
+            spur_path = None
+            if lower[spur] != INF and (spur, succ[spur]) not in banned_edges:
+                tree = tree_path(spur)
+                if banned_nodes.isdisjoint(tree):
+                    spur_path = ([lower[spur] - lower[v] for v in tree], tree)
+            if spur_path is None:
+                spur_path = _spur_search(forward, lower, spur, target, banned_nodes,
+                                         banned_edges, limit - root_cost)
+            if spur_path is None:
+                continue
+
+            costs, path = spur_path
+            path = root + path[1:]
+            if tuple(path) in seen:
+                continue
+            seen.add(tuple(path))
+            cumulative = last_costs[:j + 1] + [root_cost + c for c in costs[1:]]
+            heapq.heappush(candidates, (cumulative[-1], path, cumulative))
+
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates))
+
+    shift = 0.0 if h is None else h[target] - h[source]
+    return [(cost + shift, path) for cost, path, _ in found]
+
+
+SETTLE = 0
+RELAX = 1
+
+# A run log keeps about this many dist/prev snapshots
+RUN_LOG_CHECKPOINTS = 32
+# Settles between progress reports (and cancel checks) of a recorded run
+PROGRESS_INTERVAL = 2048
+
+
+class RunLog:
+    """Every settle and relax event of one Dijkstra run, in flat arrays.
+
+    Step s (1-based) is the s-th settle and the relaxations it caused; step 0
+    is the initial state. Relax events keep the values they overwrote, so a
+    cursor can move a few steps either way by replaying events, and full
+    dist/prev snapshots taken every ``interval`` events bound any longer seek
+    to one copy plus at most ``interval`` events.
+    """
+
+    def __init__(self, n, source, interval):
+        self.n = n
+        self.source = source
+        self.interval = interval
+        self.kind = array('b')
+        self.node = array('q')
+        self.parent = array('q')
+        self.value = array('d')
+        self.old_value = array('d')
+        self.old_parent = array('q')
+        self.bounds = array('q', [0])  # Events of step s are bounds[s - 1]:bounds[s]
+        self.settle_step = array('q', [0]) * n  # 0 = never settled
+        self.checkpoint_steps = array('q')
+        self.checkpoints = []
+
+        # Live state of the cursor
+        self.step = 0
+        self.dist = array('d', [INF]) * n
+        self.prev = array('q', [-1]) * n
+        if n:
+            self.dist[source] = 0.0
+        self._checkpoint()
+
+    @property
+    def steps(self):
+        return len(self.bounds) - 1
+
+    def _checkpoint(self):
+        self.checkpoint_steps.append(self.step)
+        self.checkpoints.append((array('d', self.dist), array('q', self.prev)))
+
+    def settled(self, node, step=None):
+        """True once ``node`` has been settled at ``step`` (default: the cursor's)"""
+        s = self.settle_step[node]
+        return 0 < s <= (self.step if step is None else step)
+
+    def settled_at(self, step):
+        """Node id settled by step ``step`` (1-based)"""
+        return self.node[self.bounds[step - 1]]
+
+    def seek(self, step):
+        """Move the cursor to ``step`` and return the ids of the nodes whose
+        distance, predecessor or settled flag may have changed, or None when
+        the state was restored from a snapshot (treat everything as changed)
+        """
+        step = max(0, min(step, self.steps))
+        lo, hi = sorted((self.bounds[self.step], self.bounds[step]))
+        if hi - lo <= self.interval:
+            changed = set(self.node[lo:hi])
+        else:
+            k = bisect_right(self.checkpoint_steps, step) - 1
+            dist, prev = self.checkpoints[k]
+            self.dist = array('d', dist)
+            self.prev = array('q', prev)
+            self.step = self.checkpoint_steps[k]
+            changed = None
+        self._replay(step)
+        return changed
+
+    def _replay(self, step):
+        dist, prev = self.dist, self.prev
+        if step >= self.step:
+            for i in range(self.bounds[self.step], self.bounds[step]):
+                if self.kind[i] == RELAX:
+                    dist[self.node[i]] = self.value[i]
+                    prev[self.node[i]] = self.parent[i]
+        else:
+            for i in range(self.bounds[self.step] - 1, self.bounds[step] - 1, -1):
+                if self.kind[i] == RELAX:
+                    dist[self.node[i]] = self.old_value[i]
+                    prev[self.node[i]] = self.old_parent[i]
+        self.step = step
+
+
+def record_run(graph, source, stats=None, progress=None, cancel=None):
+    """Run Dijkstra from ``source`` and return its RunLog, with the cursor at step 0.
+
+    Negative weights are handled as in shortest_paths; the log records the
+    true distances. ``progress`` is called with (settled, n) every
+    PROGRESS_INTERVAL settles, and the run raises RunCancelled at the next
+    report once the ``cancel`` event (a threading.Event) is set.
+    """
+    started = time.perf_counter()
+    h = graph.potentials(cancel)
+    offsets, targets, weights = graph.reduced_csr()
+    n = graph.n
+    log = RunLog(n, source, max(256, (n + len(targets)) // RUN_LOG_CHECKPOINTS))
+    kind, node, parent, value = log.kind, log.node, log.parent, log.value
+    old_value, old_parent, bounds = log.old_value, log.old_parent, log.bounds
+
+    # Search on reduced distances; h[v] - h[source] turns them into true ones
+    hs = h[source] if h is not None else 0.0
+    reduced = [INF] * n
+    dist, prev = log.dist, log.prev
+    reduced[source] = 0.0
+    pq = [(0.0, source)]
+    pops = scanned = relaxed = 0
+    peak = 1
+    since_checkpoint = 0
+    while pq:
+        d, u = heapq.heappop(pq)
+        pops += 1
+        if log.settle_step[u]:
+            continue
+        log.settle_step[u] = log.step + 1
+        kind.append(SETTLE)
+        node.append(u)
+        parent.append(prev[u])
+        value.append(dist[u])
+        old_value.append(dist[u])
+        old_parent.append(prev[u])
+        start, end = offsets[u], offsets[u + 1]
+        scanned += end - start
+        for i in range(start, end):
+            v = targets[i]
+            nd = d + weights[i]
+            if nd < reduced[v]:
+                reduced[v] = nd
+                true = nd - hs + h[v] if h is not None else nd
+                kind.append(RELAX)
+                node.append(v)
+                parent.append(u)
+                value.append(true)
+                old_value.append(dist[v])
+                old_parent.append(prev[v])
+                dist[v] = true
+                prev[v] = u
+                heapq.heappush(pq, (nd, v))
+                relaxed += 1
+        if len(pq) > peak:
+            peak = len(pq)
+        bounds.append(len(kind))
+        log.step += 1
+        since_checkpoint += end - start + 1
+        if since_checkpoint >= log.interval:
+            log._checkpoint()
+            since_checkpoint = 0
+        if not log.step % PROGRESS_INTERVAL:
+            if cancel is not None and cancel.is_set():
+                raise RunCancelled()
+            if progress:
+                progress(log.step, n)
+
+    # Park the cursor back at the start
+    log.dist = array('d', log.checkpoints[0][0])
+    log.prev = array('q', log.checkpoints[0][1])
+    log.step = 0
+    if stats is not None:
+        stats.nodes_settled += log.steps
+        stats.edges_relaxed += scanned
+        stats.relaxations += relaxed
+        stats.heap_pushes += relaxed + 1
+        stats.heap_pops += pops
+        stats.stale_pops += pops - log.steps
+        stats.peak_frontier = max(stats.peak_frontier, peak)
+        stats.compute_time += time.perf_counter() - started
+    return log
+
+
+def path_to(prev, target):
+    """Rebuild the node-id path ending at ``target`` from a predecessor list"""
+    path = []
+    current = target
+    while current != -1:
+        path.append(current)
+        current = prev[current]
+    path.reverse()
+    return path
+
+
+def _first_hops(prev, source):
+    """First node after ``source`` on the tree path to every node (-1 if unreachable)"""
+    hop = [-1] * len(prev)
+    hop[source] = source
+    for v in range(len(prev)):
+        # Walk up until a node whose first hop is known, then fill in the chain
+        chain = []
+        u = v
+        while hop[u] == -1 and prev[u] != -1:
+            chain.append(u)
+            u = prev[u]
+        first = chain[-1] if u == source and chain else hop[u]
+        for c in chain:
+            hop[c] = first
+    return hop
+
+
+class AllPairs:
+    """Distances and next hops between every pair of node ids.
+
+    ``dist[u][v]`` is the shortest distance and ``next_hop[u][v]`` the node
+    after u on that path (-1 if v is unreachable). Both are NumPy arrays when
+    Floyd-Warshall was used and lists of lists otherwise.
+    """
+
+    def __init__(self, dist, next_hop, method, elapsed=0.0):
+        self.dist = dist
+        self.next_hop = next_hop
+        self.method = method
+        self.elapsed = elapsed
+
+    def distance(self, u, v):
+        return float(self.dist[u][v])
+
+    def path(self, u, v):
+        """Node ids on the shortest u -> v path, or [] when v is unreachable"""
+        if self.next_hop[u][v] == -1:
+            return []
+        path = [u]
+        # A shortest path visits each node at most once
+        for _ in range(len(self.next_hop)):
+            if u == v:
+                return path
+            u = int(self.next_hop[u][v])
+            path.append(u)
+        if u != v:
+            raise ValueError(f"Next hops from {path[0]} do not lead to {v}")
+        return path
+
+
+def all_pairs_method(graph):
+    """'floyd-warshall' for small dense graphs when NumPy is installed, else 'dijkstra'"""
+    n = graph.n
+    if (_numpy() is not None and n <= FLOYD_WARSHALL_MAX_NODES
+            and len(graph.csr()[1]) * FLOYD_WARSHALL_DENSITY >= n * n):
+        return 'floyd-warshall'
+    return 'dijkstra'
+
+
+def all_pairs(graph, method=None, cancel=None):
+    """Shortest paths between every pair of nodes as an AllPairs.
+
+    ``method`` is 'floyd-warshall' or 'dijkstra' (one run per source, on
+    Johnson-reweighted edges when some weights are negative); by default it
+    is chosen from the graph's size and density. Raises RunCancelled once
+    the ``cancel`` event is set.
+    """
+    started = time.perf_counter()
+    graph.potentials(cancel)  # Fail early on negative cycles
+    method = method or all_pairs_method(graph)
+    if method == 'floyd-warshall':
+        from allpairs import floyd_warshall
+        dist, next_hop = floyd_warshall(graph, cancel=cancel)
+    elif method == 'dijkstra':
+        dist, next_hop = [], []
+        for source in range(graph.n):
+            if cancel is not None and cancel.is_set():
+                raise RunCancelled()
+            d, prev = shortest_paths(graph, source)
+            dist.append(d)
+            next_hop.append(_first_hops(prev, source))
+    else:
+        raise ValueError(f"Unknown all-pairs method '{method}'")
+    return AllPairs(dist, next_hop, method, time.perf_counter() - started)
+
+
+def save_graph(graph, path):
+    """Write the graph to ``path`` in the JSON save format"""
+    data = {
+        'format': GRAPH_FORMAT,
+        'version': GRAPH_FORMAT_VERSION,
+        'directed': graph.directed,
+        'source': graph.source,
+        'nodes': [{'label': label, 'x': x, 'y': y}
+                  for label, x, y in zip(graph.labels, graph.xs, graph.ys)],
+        'edges': [{'from': graph.labels[u], 'to': graph.labels[v], 'weight': w, 'directed': bool(d)}
+                  for u, v, w, d in zip(graph.edge_src, graph.edge_dst,
+                                        graph.edge_weight, graph.edge_directed)],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def load_graph(path):
+    """Read a graph written by save_graph, or map a .dgr file (see diskgraph)"""
+    with open(path, 'rb') as f:
+        mapped = f.read(len(MAPPED_GRAPH_MAGIC)) == MAPPED_GRAPH_MAGIC
+    if mapped:
+        # Only mapped graphs need NumPy
+        from diskgraph import open_graph
+        return open_graph(path)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != GRAPH_FORMAT:
+        raise ValueError(f"{path} is not a saved graph")
+    graph = Graph(directed=data.get('directed', True))
+    for node in data['nodes']:
+        graph.add_node(node['label'], node.get('x', 0.0), node.get('y', 0.0))
+    for edge in data['edges']:
+        graph.add_edge(graph.node_id(edge['from']), graph.node_id(edge['to']),
+                       float(edge['weight']), edge.get('directed', graph.directed))
+    graph.source = data.get('source')
+    return graph
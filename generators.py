@@ -0,0 +1,148 @@
+"""Vectorized random graph generators for stress testing.
+
+Every generator builds its node coordinates and edge arrays with NumPy and
+hands them straight to Graph.from_arrays, so no per-edge Python loop runs:
+
+    from generators import generate
+    graph = generate('geometric', 200_000, k=6, distribution='exponential')
+"""
+import numpy as np
+
+from engine import Graph
+
+WEIGHT_DISTRIBUTIONS = ('integer', 'uniform', 'normal', 'exponential')
+
+
+def draw_weights(rng, size, distribution='integer', low=1.0, high=10.0):
+    """Draw `size` positive edge weights in [low, high] from a named distribution"""
+    if distribution == 'integer':
+        return rng.integers(int(low), int(high) + 1, size).astype(np.float64)
+    if distribution == 'uniform':
+        return rng.uniform(low, high, size)
+    if distribution == 'normal':
+        return np.clip(rng.normal((low + high) / 2, (high - low) / 6, size), low, high)
+    if distribution == 'exponential':
+        return np.minimum(low + rng.exponential((high - low) / 4, size), high)
+    raise ValueError(f"Unknown weight distribution '{distribution}'")
+
+
+def _unique_pairs(u, v, n):
+    """Drop self-loops and duplicate undirected pairs"""
+    keep = u != v
+    lo = np.minimum(u[keep], v[keep])
+    hi = np.maximum(u[keep], v[keep])
+    keys = np.sort(lo * n + hi)
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+    return keys // n, keys % n
+
+
+def geometric_knn(n, k=6, rng=None):
+    """Random points in the unit square joined to their k nearest neighbours.
+
+    Neighbours are searched in the 3x3 block of grid cells around each point,
+    with cells sized to hold about k points, one chunk of points at a time.
+    """
+    rng = rng or np.random.default_rng()
+    xs = rng.random(n)
+    ys = rng.random(n)
+
+    side = max(1, int(np.sqrt(n / max(k, 1))))
+    cx = np.minimum((xs * side).astype(np.int64), side - 1)
+    cy = np.minimum((ys * side).astype(np.int64), side - 1)
+    cell = cy * side + cx
+
+    # Bucket the points: cell_points[c, :] lists the points in cell c, padded with -1
+    order = np.argsort(cell, kind='stable')
+    counts = np.bincount(cell, minlength=side * side)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(n) - starts[cell[order]]
+    cell_points = np.full((side * side, counts.max()), -1, dtype=np.int64)
+    cell_points[cell[order], rank] = order
+
+    offsets = np.array([(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+    src_parts, dst_parts = [], []
+    for lo in range(0, n, 50_000):
+        idx = np.arange(lo, min(lo + 50_000, n))
+        ncx = cx[idx, None] + offsets[None, :, 0]
+        ncy = cy[idx, None] + offsets[None, :, 1]
+        valid = (ncx >= 0) & (ncx < side) & (ncy >= 0) & (ncy < side)
+        ncell = np.where(valid, ncy * side + ncx, 0)
+        cand = cell_points[ncell].reshape(len(idx), -1)
+        cand[~np.repeat(valid, cell_points.shape[1], axis=1)] = -1
+
+        d2 = (xs[cand] - xs[idx, None]) ** 2 + (ys[cand] - ys[idx, None]) ** 2
+        d2[(cand < 0) | (cand == idx[:, None])] = np.inf
+        kk = min(k, cand.shape[1] - 1)
+        if kk <= 0:
+            continue
+        nearest = np.argpartition(d2, kk - 1, axis=1)[:, :kk]
+        chosen = np.take_along_axis(cand, nearest, axis=1)
+        found = np.isfinite(np.take_along_axis(d2, nearest, axis=1))
+        src_parts.append(np.repeat(idx, kk)[found.ravel()])
+        dst_parts.append(chosen[found])
+
+    src, dst = _unique_pairs(np.concatenate(src_parts or [np.empty(0, np.int64)]),
+                             np.concatenate(dst_parts or [np.empty(0, np.int64)]), n)
+    return xs, ys, src, dst
+
+
+def grid(rows, cols, diagonals=True):
+    """Rows x cols lattice, optionally with both diagonals in every square"""
+    ids = np.arange(rows * cols).reshape(rows, cols)
+    pairs = [(ids[:, :-1], ids[:, 1:]), (ids[:-1, :], ids[1:, :])]
+    if diagonals:
+        pairs += [(ids[:-1, :-1], ids[1:, 1:]), (ids[:-1, 1:], ids[1:, :-1])]
+    src = np.concatenate([a.ravel() for a, _ in pairs])
+    dst = np.concatenate([b.ravel() for _, b in pairs])
+    ys, xs = np.divmod(np.arange(rows * cols), cols)
+    return xs / max(cols - 1, 1), ys / max(rows - 1, 1), src, dst
+
+
+def preferential_attachment(n, attach=3, rng=None):
+    """Barabasi-Albert graph via the Batagelj-Brandes edge-copy model.
+
+    Slot 2j holds the new node of link j and slot 2j + 1 copies a uniformly
+    chosen earlier slot, which is degree-proportional sampling. The chains of
+    copies are resolved for all links at once by pointer jumping.
+    """
+    rng = rng or np.random.default_rng()
+    links = n * attach
+    pos = 2 * np.arange(links)
+    pick = (rng.random(links) * (pos + 1)).astype(np.int64)  # slot in [0, 2j]
+    slot = pick.copy()
+    odd = slot % 2 == 1
+    while odd.any():
+        slot[odd] = pick[(slot[odd] - 1) // 2]
+        odd = slot % 2 == 1
+    src = np.repeat(np.arange(n), attach)
+    dst = (slot // 2) // attach
+    src, dst = _unique_pairs(src, dst, n)
+    return rng.random(n), rng.random(n), src, dst
+
+
+GENERATORS = ('geometric', 'grid', 'preferential')
+
+
+def generate(model, n, k=6, distribution='integer', low=1.0, high=10.0,
+             width=1000.0, height=1000.0, margin=40.0, directed=False, seed=None):
+    """Generate a graph with about `n` nodes straight into the compact graph store.
+
+    `k` is the neighbour count for 'geometric', the links per new node for
+    'preferential' and is ignored for 'grid' (which uses diagonals). Node
+    coordinates are scaled into a width x height box.
+    """
+    rng = np.random.default_rng(seed)
+    if model == 'geometric':
+        xs, ys, src, dst = geometric_knn(n, k, rng)
+    elif model == 'grid':
+        side = max(2, int(np.sqrt(n)))
+        xs, ys, src, dst = grid(side, side, diagonals=True)
+    elif model == 'preferential':
+        xs, ys, src, dst = preferential_attachment(n, max(1, k), rng)
+    else:
+        raise ValueError(f"Unknown graph model '{model}'")
+
+    weights = draw_weights(rng, len(src), distribution, low, high)
+    xs = margin + xs * (width - 2 * margin)
+    ys = margin + ys * (height - 2 * margin)
+    return Graph.from_arrays(src, dst, weights, xs, ys, directed=directed)
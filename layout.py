@@ -0,0 +1,178 @@
+"""Force-directed auto-layout.
+
+Fruchterman-Reingold style forces computed with NumPy. Repulsion between all
+pairs uses a Barnes-Hut quadtree (O(n log n)); the tree is built from Morton
+codes and traversed level by level for every node at once, so there is no
+per-node Python loop. The layout is incremental: call ``step`` between frames
+and read ``xs``/``ys`` until ``done`` is true.
+"""
+import numpy as np
+
+# Below this many nodes the exact O(n^2) repulsion is cheaper than the tree
+EXACT_LIMIT = 1500
+# Pull towards the centre of the box, relative to the ideal edge length
+GRAVITY = 0.001
+
+
+def _segment_arange(counts):
+    """Concatenation of arange(c) for every c in counts"""
+    total = counts.sum()
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(total) - starts
+
+
+class QuadTree:
+    """Barnes-Hut quadtree stored as one sorted array of cell codes per level"""
+
+    def __init__(self, xs, ys, depth=None):
+        n = len(xs)
+        # About one body per leaf cell
+        self.depth = depth or int(min(16, max(1, np.ceil(np.log(max(n, 2)) / np.log(4)))))
+        self.x0, self.y0 = xs.min(), ys.min()
+        self.size = max(xs.max() - self.x0, ys.max() - self.y0, 1e-9) * (1 + 1e-9)
+
+        # Interleave the bits of the integer cell coordinates into Morton codes
+        scale = (1 << self.depth) / self.size
+        ix = np.minimum(((xs - self.x0) * scale).astype(np.int64), (1 << self.depth) - 1)
+        iy = np.minimum(((ys - self.y0) * scale).astype(np.int64), (1 << self.depth) - 1)
+        codes = np.zeros(n, dtype=np.int64)
+        for bit in range(self.depth):
+            codes |= ((ix >> bit) & 1) << (2 * bit)
+            codes |= ((iy >> bit) & 1) << (2 * bit + 1)
+
+        self.body_codes = []  # per level: the cell code of every body
+        self.codes = []  # per level: sorted unique cell codes
+        self.mass = []
+        self.cx = []
+        self.cy = []
+        for level in range(self.depth + 1):
+            level_codes = codes >> (2 * (self.depth - level))
+            unique, inverse = np.unique(level_codes, return_inverse=True)
+            mass = np.bincount(inverse, minlength=len(unique)).astype(np.float64)
+            self.body_codes.append(level_codes)
+            self.codes.append(unique)
+            self.mass.append(mass)
+            self.cx.append(np.bincount(inverse, weights=xs, minlength=len(unique)) / mass)
+            self.cy.append(np.bincount(inverse, weights=ys, minlength=len(unique)) / mass)
+
+        # Children of cell i at level l are cells first[l][i] .. first[l][i] + count[l][i] - 1 at level l + 1
+        self.first = []
+        self.count = []
+        for level in range(self.depth):
+            parent = self.codes[level] << 2
+            first = np.searchsorted(self.codes[level + 1], parent)
+            self.first.append(first)
+            self.count.append(np.searchsorted(self.codes[level + 1], parent + 4) - first)
+
+    def repulsion(self, xs, ys, strength, theta=1.0, chunk=20000):
+        """Sum of strength * m / d repulsive forces on every body"""
+        n = len(xs)
+        fx = np.zeros(n)
+        fy = np.zeros(n)
+        for lo in range(0, n, chunk):
+            # Active (body, cell) pairs, starting with every body against the root
+            body = np.arange(lo, min(lo + chunk, n))
+            cell = np.zeros(len(body), dtype=np.int64)
+            for level in range(self.depth + 1):
+                dx = self.cx[level][cell] - xs[body]
+                dy = self.cy[level][cell] - ys[body]
+                mass = self.mass[level][cell]
+                own = self.body_codes[level][body] == self.codes[level][cell]
+                if level == self.depth:
+                    # Leaf cells holding the body itself: use the other bodies only
+                    others = mass - own
+                    dx = np.where(own, (dx * mass) / np.maximum(others, 1), dx)
+                    dy = np.where(own, (dy * mass) / np.maximum(others, 1), dy)
+                    mass = others
+                    accept = mass > 0
+                else:
+                    width = self.size / (1 << level)
+                    accept = ~own & (width * width < theta * theta * (dx * dx + dy * dy))
+
+                d2 = np.maximum(dx[accept] ** 2 + dy[accept] ** 2, 1e-9)
+                push = strength * mass[accept] / d2
+                fx -= np.bincount(body[accept], weights=dx[accept] * push, minlength=n)
+                fy -= np.bincount(body[accept], weights=dy[accept] * push, minlength=n)
+
+                if level == self.depth:
+                    break
+                # Open the rejected cells: pair each body with every child cell
+                body, cell = body[~accept], cell[~accept]
+                counts = self.count[level][cell]
+                body = np.repeat(body, counts)
+                cell = np.repeat(self.first[level][cell], counts) + _segment_arange(counts)
+        return fx, fy
+
+
+class ForceLayout:
+    """Incremental force-directed layout inside a width x height box"""
+
+    def __init__(self, xs, ys, src, dst, width, height, margin=40.0, theta=1.0,
+                 iterations=300, seed=None):
+        self.n = len(xs)
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.theta = theta
+        self.xs = np.asarray(xs, dtype=np.float64).copy()
+        self.ys = np.asarray(ys, dtype=np.float64).copy()
+
+        # Graphs without meaningful coordinates start from a random scatter
+        if self.n and (np.ptp(self.xs) < 1e-6 or np.ptp(self.ys) < 1e-6):
+            rng = np.random.default_rng(seed)
+            self.xs = margin + rng.random(self.n) * (width - 2 * margin)
+            self.ys = margin + rng.random(self.n) * (height - 2 * margin)
+
+        area = (width - 2 * margin) * (height - 2 * margin)
+        self.k = np.sqrt(area / max(self.n, 1))
+        self.temperature = (width - 2 * margin) / 10
+        self.cooling = (0.01) ** (1 / iterations)  # Reach 1% of the start temperature
+        self.min_temperature = self.temperature * 0.01
+        self.iteration = 0
+
+    @property
+    def done(self):
+        return self.n < 2 or self.temperature <= self.min_temperature
+
+    def forces(self):
+        """Net force on every node"""
+        xs, ys, k2 = self.xs, self.ys, self.k * self.k
+        if self.n <= EXACT_LIMIT:
+            dx = xs[None, :] - xs[:, None]
+            dy = ys[None, :] - ys[:, None]
+            d2 = np.maximum(dx * dx + dy * dy, 1e-9)
+            np.fill_diagonal(d2, np.inf)
+            fx = -(dx * k2 / d2).sum(axis=1)
+            fy = -(dy * k2 / d2).sum(axis=1)
+        else:
+            fx, fy = QuadTree(xs, ys).repulsion(xs, ys, k2, self.theta)
+
+        # Attraction d^2 / k along every edge
+        dx = xs[self.dst] - xs[self.src]
+        dy = ys[self.dst] - ys[self.src]
+        pull = np.sqrt(dx * dx + dy * dy) / self.k
+        fx += np.bincount(self.src, weights=dx * pull, minlength=self.n)
+        fx -= np.bincount(self.dst, weights=dx * pull, minlength=self.n)
+        fy += np.bincount(self.src, weights=dy * pull, minlength=self.n)
+        fy -= np.bincount(self.dst, weights=dy * pull, minlength=self.n)
+
+        # Weak gravity keeps disconnected pieces on screen
+        fx += (self.width / 2 - xs) * GRAVITY * self.k
+        fy += (self.height / 2 - ys) * GRAVITY * self.k
+        return fx, fy
+
+    def step(self, iterations=1):
+        """Advance the layout; each move is capped by the cooling temperature"""
+        for _ in range(iterations):
+            if self.done:
+                break
+            fx, fy = self.forces()
+            length = np.maximum(np.sqrt(fx * fx + fy * fy), 1e-9)
+            move = np.minimum(length, self.temperature) / length
+            self.xs = np.clip(self.xs + fx * move, self.margin, self.width - self.margin)
+            self.ys = np.clip(self.ys + fy * move, self.margin, self.height - self.margin)
+            self.temperature *= self.cooling
+            self.iteration += 1
+        return self.done
@@ -0,0 +1,156 @@
+"""Live edge-weight updates from an append-only file or a local UDP socket.
+
+Each record is one line "u v weight" (node labels, fields separated by
+whitespace or commas). A feed is polled once per time window and returns
+every complete record that arrived since the last poll:
+
+    feed = open_feed("traffic.log")            # tail a file from its end
+    feed = open_feed("udp://127.0.0.1:9900")   # datagrams of one or more lines
+    for u, v, weight in feed.read():
+        ...
+
+    python livefeed.py graph.json traffic.log --source A
+"""
+import argparse
+import os
+import socket
+import time
+
+from engine import DynamicTree, NegativeCycleError, load_graph
+
+# Updates are applied in batches collected over this window
+WINDOW_MS = 100
+# Largest datagram read from a socket feed
+DATAGRAM_SIZE = 65536
+
+
+def parse_records(lines):
+    """(u, v, weight) tuples for the well-formed lines, plus the number skipped"""
+    records = []
+    skipped = 0
+    for line in lines:
+        fields = line.replace(',', ' ').split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        try:
+            u, v, weight = fields
+            records.append((u, v, float(weight)))
+        except ValueError:
+            skipped += 1
+    return records, skipped
+
+
+class FileFeed:
+    """Tails an append-only update file, like tail -f"""
+
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.file = open(path, 'rb')
+        if not from_start:
+            self.file.seek(0, os.SEEK_END)
+        self.partial = b""
+        self.skipped = 0
+
+    def read(self):
+        """Records appended since the last read; a half-written last line waits for the next one"""
+        if os.path.getsize(self.path) < self.file.tell():
+            # Truncated or replaced: start over from the top
+            self.file.close()
+            self.file = open(self.path, 'rb')
+            self.partial = b""
+        data = self.partial + self.file.read()
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        records, skipped = parse_records(line.decode('utf-8', 'replace') for line in lines)
+        self.skipped += skipped
+        return records
+
+    def close(self):
+        self.file.close()
+
+
+class SocketFeed:
+    """Drains datagrams sent to a local UDP port"""
+
+    def __init__(self, host, port):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.skipped = 0
+
+    def read(self):
+        lines = []
+        while True:
+            try:
+                data = self.socket.recv(DATAGRAM_SIZE)
+            except BlockingIOError:
+                break
+            lines.extend(data.decode('utf-8', 'replace').splitlines())
+        records, skipped = parse_records(lines)
+        self.skipped += skipped
+        return records
+
+    def close(self):
+        self.socket.close()
+
+
+def open_feed(spec, from_start=False):
+    """A FileFeed for a path, or a SocketFeed for udp://host:port"""
+    if spec.startswith("udp://"):
+        host, _, port = spec[len("udp://"):].rpartition(":")
+        return SocketFeed(host or "127.0.0.1", int(port))
+    return FileFeed(spec, from_start)
+
+
+def edge_changes(graph, records):
+    """{edge id: weight} for a batch of label records (the last record per edge
+    wins), plus the number of records that name no edge"""
+    changes = {}
+    unknown = 0
+    for u, v, weight in records:
+        edges = graph.find_edge(graph.index.get(u, -1), graph.index.get(v, -1))
+        if not edges:
+            unknown += 1
+        for e in edges:
+            changes[e] = weight
+    return changes, unknown
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a shortest-path tree current from a live update feed")
+    parser.add_argument("graph", help="graph file written by File > Export Graph")
+    parser.add_argument("feed", help="update file to tail, or udp://host:port")
+    parser.add_argument("--source", required=True, help="source node label")
+    parser.add_argument("--window-ms", type=float, default=WINDOW_MS)
+    parser.add_argument("--from-start", action="store_true", help="replay the file from its first line")
+    args = parser.parse_args(argv)
+
+    graph = load_graph(args.graph)
+    try:
+        tree = DynamicTree(graph, graph.node_id(args.source))
+    except NegativeCycleError as e:
+        print(f"Error: {e}")
+        return
+    feed = open_feed(args.feed, args.from_start)
+    print(f"Watching {args.feed} for updates to {graph.m} edges (Ctrl+C to stop)")
+    try:
+        while True:
+            started = time.perf_counter()
+            changes, unknown = edge_changes(graph, feed.read())
+            if changes:
+                changed = tree.update(changes)
+                elapsed = time.perf_counter() - started
+                print(f"{len(changes)} edge updates, "
+                      f"{'all' if changed is None else len(changed)} nodes changed, "
+                      f"{unknown} unknown edges, {elapsed * 1000:.1f} ms")
+            time.sleep(max(0.0, args.window_ms / 1000 - (time.perf_counter() - started)))
+    except KeyboardInterrupt:
+        pass
+    except NegativeCycleError as e:
+        print(f"Error: {e}")
+    finally:
+        feed.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Load test for the local query server.
+
+    python server.py graph.json &
+    python loadtest.py graph.json --requests 5000 --concurrency 50
+
+Reports p50/p99 latency and throughput. Queries draw their sources from a small
+pool (--sources) so that batching and the per-source cache get exercised.
+"""
+import argparse
+import asyncio
+import random
+import time
+from urllib.parse import quote
+
+from engine import load_graph
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def worker(host, port, queries, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for endpoint, source, target in queries:
+            request = (f"GET /{endpoint}?source={quote(source)}&target={quote(target)} HTTP/1.1\r\n"
+                       f"Host: {host}\r\n\r\n")
+            started = time.perf_counter()
+            writer.write(request.encode('latin-1'))
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                name, _, value = header.decode('latin-1').partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if b" 200 " not in status_line:
+                errors.append(status_line.decode('latin-1').strip())
+    finally:
+        writer.close()
+
+
+async def run(args, labels):
+    rng = random.Random(args.seed)
+    sources = rng.sample(labels, min(args.sources, len(labels)))
+    queries = [(rng.choice(("distance", "path")), rng.choice(sources), rng.choice(labels))
+               for _ in range(args.requests)]
+    # Deal the queries out round-robin so every connection gets an even share
+    shares = [queries[i::args.concurrency] for i in range(args.concurrency)]
+
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(args.host, args.port, share, latencies, errors)
+                           for share in shares if share))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the local shortest-path server")
+    parser.add_argument("graph", help="the graph file the server was started with")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sources", type=int, default=16,
+                        help="size of the pool that query sources are drawn from")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    labels = load_graph(args.graph).labels
+    latencies, errors, elapsed = asyncio.run(run(args, labels))
+    latencies.sort()
+
+    print(f"Requests:    {len(latencies)} ({len(errors)} errors)")
+    print(f"Concurrency: {args.concurrency}")
+    print(f"Throughput:  {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"Latency p99: {percentile(latencies, 99) * 1000:.2f} ms")
+    if errors:
+        print(f"First error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
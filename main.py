@@ -1,19 +1,65 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog, font as tkfont
 import math
-import heapq
+import queue
+import threading
+import time
 from datetime import datetime
-from PIL import Image, ImageTk, ImageGrab
 import os
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+import hashlib
+from engine import (DynamicTree, Graph, NegativeCycleError, RunCancelled, RunStats, all_pairs,
+                    isochrone, k_shortest_paths, nearest_sources, node_label, record_run, save_graph, load_graph)
+# PIL and ReportLab are imported where they are used (photos, screenshots and
+# PDF export) so that they do not slow down startup
+
+# Resized sidebar photos are dropped after the Team window has been closed this long
+PHOTO_CACHE_TTL_MS = 5 * 60 * 1000
+# Optional directory for resized thumbnails that survive restarts (unset = off)
+THUMBNAIL_CACHE_DIR = os.environ.get("DIJKSTRA_THUMBNAIL_CACHE")
+# Where profiled runs write their .prof and memory summary files
+PROFILE_DIR = os.environ.get("DIJKSTRA_PROFILE_DIR") or os.path.join(os.path.expanduser("~"), "dijkstra_profiles")
+
+MAX_LABEL_LENGTH = 6
+
+# Sources written out in full in the all-pairs report
+ALL_PAIRS_REPORT_SOURCES = 50
+
+# Timeline playback: steps per tick offered by the fast-forward button, and
+# the share of nodes above which a seek redraws the whole canvas
+TIMELINE_RATES = (1, 10, 100, 1000)
+TIMELINE_FULL_REDRAW = 0.25
+
+# Auto layout: time spent iterating per frame, and the pause between frames
+LAYOUT_FRAME_BUDGET = 0.03
+LAYOUT_FRAME_MS = 15
+
+# How often the Tk thread drains the event queue of a background job
+JOB_POLL_MS = 50
+
+# Live weight updates: batching window, and the share of nodes above which a
+# batch redraws the whole canvas
+LIVE_WINDOW_MS = 100
+LIVE_FULL_REDRAW = 0.25
+
+# (fill, outline) colours of the facility regions, reused in turn
+REGION_COLORS = [("#1abc9c", "#16a085"), ("#e67e22", "#d35400"), ("#9b59b6", "#8e44ad"),
+                 ("#e74c3c", "#c0392b"), ("#f1c40f", "#d4ac0d"), ("#2ecc71", "#27ae60"),
+                 ("#34495e", "#2c3e50"), ("#ff7eb9", "#e0609b")]
+
+# Shading of the region inside an isochrone budget
+ISOCHRONE_COLOR = "#a3e4d7"
+
+# Results table: rows shown at a time, and path length (in nodes) above which
+# the path column elides the middle
+RESULTS_PAGE_ROWS = 25
+RESULTS_PATH_PREVIEW = 12
+
+# Side of the grid cells that bucket node positions for hit tests and
+# rubber-band selection, and the share of nodes above which a drag or a
+# selection change redraws the whole canvas instead of the items it touches
+SPATIAL_CELL = 64
+DRAG_FULL_REDRAW = 0.25
+SELECTION_COLOR = "#f1c40f"
 
 class Node:
     def __init__(self, x, y, label):
@@ -31,6 +77,170 @@ class Edge:
         self.weight = weight
         self.directed = directed
 
+class BackgroundJob:
+    """Runs work(progress, cancel) on a daemon thread.
+    
+    The thread never touches Tk: progress reports, the result and any error
+    are queued as events for the Tk thread to drain with root.after.
+    """
+    # Jobs share the editor's cached engine graph, whose CSR, potentials and
+    # reduced weights are filled in lazily, so they run one at a time; a
+    # cancelled job lets go at its next cancel check
+    lock = threading.Lock()
+    
+    def __init__(self, description, work, on_done, on_error):
+        self.description = description
+        self.on_done = on_done
+        self.on_error = on_error
+        self.events = queue.Queue()
+        self.cancel = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(work,), daemon=True)
+        self.thread.start()
+    
+    def run(self, work):
+        try:
+            with BackgroundJob.lock:
+                if self.cancel.is_set():
+                    return
+                result = work(self.progress, self.cancel)
+        except RunCancelled:
+            return
+        except Exception as e:
+            self.events.put(('error', e))
+        else:
+            self.events.put(('done', result))
+    
+    def progress(self, done, total):
+        self.events.put(('progress', done, total))
+
+class ResultsModel:
+    """Destinations of a finished run for the virtual results table.
+    
+    Sorting and filtering only reorder node indices; the cells (and the path
+    text) of a row are built when the table asks for it.
+    """
+    def __init__(self, nodes, source):
+        self.nodes = nodes
+        self.source = source
+        self.rows = [i for i, node in enumerate(nodes) if node is not source]
+        self.hops = None
+        self.sort_column = 'distance'
+        self.descending = False
+        self.query = ""
+        self.order = self.rows
+        self.view = self.rows
+        self.sort('distance')
+    
+    def hop_counts(self):
+        """Edges on each node's tree path, filled in once by walking predecessors"""
+        if self.hops is None:
+            position = {node: i for i, node in enumerate(self.nodes)}
+            hops = [-1] * len(self.nodes)
+            for i in range(len(self.nodes)):
+                chain = []
+                v = i
+                while hops[v] == -1 and self.nodes[v].previous is not None:
+                    chain.append(v)
+                    v = position[self.nodes[v].previous]
+                base = max(hops[v], 0)
+                for depth, u in enumerate(reversed(chain), 1):
+                    hops[u] = base + depth
+                if hops[v] == -1:
+                    hops[v] = 0
+            self.hops = hops
+        return self.hops
+    
+    def sort(self, column, descending=False):
+        self.sort_column = column
+        self.descending = descending
+        nodes = self.nodes
+        if column == 'destination':
+            self.order = sorted(self.rows, key=lambda i: nodes[i].label, reverse=descending)
+        else:
+            # Unreachable destinations stay at the bottom either way
+            key = self.hop_counts().__getitem__ if column == 'hops' else lambda i: nodes[i].distance
+            reachable = [i for i in self.rows if nodes[i].distance != float('inf')]
+            self.order = sorted(reachable, key=key, reverse=descending) + [
+                i for i in self.rows if nodes[i].distance == float('inf')]
+        self.filter(self.query)
+    
+    def filter(self, query):
+        """Keep the rows whose label contains ``query`` (case-insensitive)"""
+        self.query = query.strip().upper()
+        if self.query:
+            self.view = [i for i in self.order if self.query in self.nodes[i].label.upper()]
+        else:
+            self.view = self.order
+    
+    def __len__(self):
+        return len(self.view)
+    
+    def node(self, k):
+        return self.nodes[self.view[k]]
+    
+    def path(self, k):
+        """Nodes from the source to row k's destination ([] when unreachable)"""
+        node = self.node(k)
+        if node.distance == float('inf'):
+            return []
+        path = []
+        while node is not None:
+            path.append(node)
+            node = node.previous
+        path.reverse()
+        return path
+    
+    def cells(self, k):
+        node = self.node(k)
+        path = self.path(k)
+        if not path:
+            return (node.label, "∞", "", "(no path)")
+        labels = [n.label for n in path]
+        if len(labels) > RESULTS_PATH_PREVIEW:
+            half = RESULTS_PATH_PREVIEW // 2
+            labels = labels[:half] + ["…"] + labels[-half:]
+        return (node.label, f"{node.distance:.1f}", len(path) - 1, " → ".join(labels))
+
+class SpatialIndex:
+    """Uniform grid over node positions for point and rectangle queries.
+    
+    Built from the current positions and thrown away whenever nodes move, so
+    a query scans the few cells it overlaps instead of every node.
+    """
+    def __init__(self, nodes, cell=SPATIAL_CELL):
+        self.cell = cell
+        self.cells = {}
+        for node in nodes:
+            key = (int(node.x // cell), int(node.y // cell))
+            self.cells.setdefault(key, []).append(node)
+    
+    def query(self, x1, y1, x2, y2):
+        """Nodes whose centre lies inside the rectangle (corners in any order)"""
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        cx1, cx2 = int(x1 // self.cell), int(x2 // self.cell)
+        cy1, cy2 = int(y1 // self.cell), int(y2 // self.cell)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.cells):
+            # Rectangle larger than the occupied area: walk the cells that exist
+            keys = [key for key in self.cells if cx1 <= key[0] <= cx2 and cy1 <= key[1] <= cy2]
+        else:
+            keys = [(cx, cy) for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)]
+        found = []
+        for key in keys:
+            for node in self.cells.get(key, ()):
+                if x1 <= node.x <= x2 and y1 <= node.y <= y2:
+                    found.append(node)
+        return found
+    
+    def nearest(self, x, y, radius):
+        """Closest node within radius of (x, y), or None"""
+        best, best_dist = None, radius * radius
+        for node in self.query(x - radius, y - radius, x + radius, y + radius):
+            d = (node.x - x) ** 2 + (node.y - y) ** 2
+            if d <= best_dist:
+                best, best_dist = node, d
+        return best
+
 class DijkstraVisualizer:
     def __init__(self, root):
         self.root = root
@@ -39,6 +249,7 @@ class DijkstraVisualizer:
         
         self.nodes = []
         self.edges = []
+        self.label_index = {}  # label -> Node, kept in sync with self.nodes
         self.node_radius = 20
         self.selected_node = None
         self.start_node = None
@@ -55,13 +266,117 @@ class DijkstraVisualizer:
         self.drag_start_x = 0
         self.drag_start_y = 0
         
+        # Nodes picked with Select mode, the rubber band being dragged out
+        # (canvas item, start corner, whether it adds to the selection), what
+        # a drag has to redraw, and the grid of node positions for hit tests
+        self.selection = set()
+        self.select_drag = None
+        self.band = None
+        self.band_start = (0, 0)
+        self.band_additive = False
+        self.drag_last = (0, 0)
+        self.drag_saved = False
+        self.drag_nodes = []
+        self.drag_edges = []
+        self.spatial = None
+        
         # Sidebar state
         self.sidebar_open = False
         self.sidebar_frame = None
         
+        # Decoded sidebar photos: (path, size, mtime) -> PhotoImage, plus
+        # (path, size) -> cache key (None when the file is missing)
+        self.photo_cache = {}
+        self.photo_keys = {}
+        self.team_windows_open = 0
+        self.photo_evict_job = None
+        
+        # Background auto layout
+        self.layout = None
+        self.layout_job = None
+        
+        # Engine graph for runs, reused (with its CSR and Johnson potentials)
+        # while the nodes and edges are unchanged
+        self.engine_graph = None
+        self.engine_graph_key = None
+        
+        # Recorded run being played back on the timeline
+        self.timeline = None
+        self.timeline_job = None
+        self.timeline_playing = False
+        self.timeline_rate = 1
+        self.timeline_incident = []
+        self.timeline_profiler = None
+        self.timeline_finished = False
+        
+        # Live weight-update feed, the tree it keeps current and its after job
+        self.live_feed = None
+        self.live_tree = None
+        self.live_job = None
+        self.live_incident = []
+        self.live_spec = "updates.log"
+        
+        # Computation running on a worker thread, and the after job polling it
+        self.job = None
+        self.job_poll = None
+        
+        # Facility nodes, and the index of the facility nearest to each node
+        # reached by the last nearest-facility run
+        self.facilities = []
+        self.regions = {}
+        
+        # Budget of the isochrone shaded on the canvas, if any
+        self.isochrone_budget = None
+        
+        # Ranked alternative paths (cost, [Node]) and the one being highlighted
+        self.alt_paths = []
+        self.alt_index = 0
+        
+        # Counters for the most recent run
+        self.run_stats = None
+        self.stats_open = False
+        
         self.setup_ui()
         
+    def setup_menu(self):
+        """Menu bar for file and graph tools that don't need a toolbar button"""
+        menubar = tk.Menu(self.root)
+        
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Open Graph...", command=self.import_graph)
+        file_menu.add_command(label="Export Graph...", command=self.export_graph)
+        file_menu.add_separator()
+        file_menu.add_command(label="Save PDF Report", command=self.download_report)
+        menubar.add_cascade(label="File", menu=file_menu)
+        
+        self.graph_menu = tk.Menu(menubar, tearoff=0)
+        self.graph_menu.add_command(label="Generate Graph...", command=self.show_generate_dialog)
+        self.graph_menu.add_command(label="Auto Layout", command=self.toggle_layout)
+        self.graph_menu.add_command(label="Live Weight Updates...", command=self.toggle_live_updates)
+        menubar.add_cascade(label="Graph", menu=self.graph_menu)
+        
+        select_menu = tk.Menu(menubar, tearoff=0)
+        select_menu.add_command(label="Select All", command=self.select_all)
+        select_menu.add_command(label="Clear Selection", command=lambda: self.set_selection(set()))
+        select_menu.add_separator()
+        select_menu.add_command(label="Scale Weights...", command=self.show_scale_dialog)
+        select_menu.add_command(label="Make Edges Directed", command=lambda: self.set_selection_direction(True))
+        select_menu.add_command(label="Make Edges Undirected", command=lambda: self.set_selection_direction(False))
+        select_menu.add_separator()
+        select_menu.add_command(label="Delete Selected Nodes", command=self.delete_selection)
+        menubar.add_cascade(label="Selection", menu=select_menu)
+        
+        analysis_menu = tk.Menu(menubar, tearoff=0)
+        analysis_menu.add_command(label="All Pairs Shortest Paths", command=self.show_all_pairs)
+        analysis_menu.add_command(label="K Shortest Paths...", command=self.show_k_paths_dialog)
+        analysis_menu.add_command(label="Isochrone...", command=self.show_isochrone_dialog)
+        menubar.add_cascade(label="Analysis", menu=analysis_menu)
+        
+        self.root.config(menu=menubar)
+    
     def setup_ui(self):
+        self.setup_menu()
+        
         # Top Control Panel - Redesigned
         control_frame = tk.Frame(self.root, bg="#2c3e50")
         control_frame.pack(side=tk.TOP, fill=tk.X)
@@ -136,6 +451,18 @@ class DijkstraVisualizer:
                                          font=("Arial", 9, "bold"), pady=5, cursor="hand2")
         self.rename_node_btn.grid(row=1, column=4, padx=3)
         
+        self.facilities_btn = tk.Button(mode_frame, text="Facilities", 
+                                        command=lambda: self.set_mode("facilities"),
+                                        bg="#95a5a6", fg="white", width=10,
+                                        font=("Arial", 9, "bold"), pady=5, cursor="hand2")
+        self.facilities_btn.grid(row=1, column=5, padx=3)
+        
+        self.select_btn = tk.Button(mode_frame, text="Select", 
+                                    command=lambda: self.set_mode("select"),
+                                    bg="#95a5a6", fg="white", width=10,
+                                    font=("Arial", 9, "bold"), pady=5, cursor="hand2")
+        self.select_btn.grid(row=1, column=6, padx=3)
+        
         # Center-left: Graph Type
         graph_type_frame = tk.Frame(buttons_row, bg="#2c3e50")
         graph_type_frame.pack(side=tk.LEFT, padx=20)
@@ -180,7 +507,7 @@ class DijkstraVisualizer:
         edit_frame.pack(side=tk.LEFT, padx=20)
         
         tk.Label(edit_frame, text="EDIT", 
-                font=("Arial", 8, "bold"), bg="#2c3e50", fg="#95a5a6").grid(row=0, column=0, columnspan=3, sticky=tk.W, pady=(0,5))
+                font=("Arial", 8, "bold"), bg="#2c3e50", fg="#95a5a6").grid(row=0, column=0, columnspan=4, sticky=tk.W, pady=(0,5))
         
         self.undo_btn = tk.Button(edit_frame, text="↶ Undo", 
                                    command=self.undo,
@@ -194,11 +521,18 @@ class DijkstraVisualizer:
                                    font=("Arial", 9, "bold"), pady=5, cursor="hand2")
         self.reset_btn.grid(row=1, column=1, padx=3)
         
+        self.cancel_btn = tk.Button(edit_frame, text="■ Cancel", 
+                                    command=self.cancel_run,
+                                    bg="#7f8c8d", fg="white", width=9,
+                                    font=("Arial", 9, "bold"), pady=5,
+                                    state=tk.DISABLED, cursor="hand2")
+        self.cancel_btn.grid(row=1, column=2, padx=3)
+        
         self.clear_btn = tk.Button(edit_frame, text="Clear All", 
                                    command=self.clear_all,
                                    bg="#e74c3c", fg="white", width=9,
                                    font=("Arial", 9, "bold"), pady=5, cursor="hand2")
-        self.clear_btn.grid(row=1, column=2, padx=3)
+        self.clear_btn.grid(row=1, column=3, padx=3)
         
         # Right: Info Buttons
         info_frame = tk.Frame(buttons_row, bg="#2c3e50")
@@ -232,6 +566,46 @@ class DijkstraVisualizer:
                                    justify=tk.LEFT)
         self.info_label.pack(side=tk.LEFT)
         
+        self.stats_toggle_btn = tk.Button(info_frame, text="▸ Run Stats",
+                                          command=self.toggle_stats_panel,
+                                          bg="#2c3e50", fg="white", relief=tk.FLAT,
+                                          font=("Arial", 9, "bold"), cursor="hand2")
+        self.stats_toggle_btn.pack(side=tk.RIGHT)
+        
+        # Prev / Next controls, shown while alternative paths are highlighted
+        self.alt_frame = tk.Frame(info_frame, bg="#34495e")
+        for text, step in (("◂ Prev Path", -1), ("Next Path ▸", 1)):
+            tk.Button(self.alt_frame, text=text, command=lambda s=step: self.show_alt_path(self.alt_index + s),
+                     bg="#8e44ad", fg="white", relief=tk.FLAT,
+                     font=("Arial", 9, "bold"), cursor="hand2").pack(side=tk.LEFT, padx=2)
+        
+        # Playback bar for a recorded run, shown while a run is loaded
+        self.timeline_frame = tk.Frame(self.root, bg="#2c3e50", padx=15, pady=6)
+        for text, step in (("⏮", -1), ("⏭", 1)):
+            tk.Button(self.timeline_frame, text=text, command=lambda s=step: self.step_timeline(s),
+                     bg="#34495e", fg="white", relief=tk.FLAT, width=3,
+                     font=("Arial", 9, "bold"), cursor="hand2").pack(side=tk.LEFT, padx=2)
+        self.play_btn = tk.Button(self.timeline_frame, text="❚❚ Pause", command=self.toggle_playback,
+                                  bg="#27ae60", fg="white", relief=tk.FLAT, width=8,
+                                  font=("Arial", 9, "bold"), cursor="hand2")
+        self.play_btn.pack(side=tk.LEFT, padx=2)
+        self.rate_btn = tk.Button(self.timeline_frame, text="⏩ ×1", command=self.cycle_timeline_rate,
+                                  bg="#34495e", fg="white", relief=tk.FLAT, width=7,
+                                  font=("Arial", 9, "bold"), cursor="hand2")
+        self.rate_btn.pack(side=tk.LEFT, padx=2)
+        self.timeline_label = tk.Label(self.timeline_frame, text="", width=16,
+                                       font=("Arial", 9), bg="#2c3e50", fg="white")
+        self.timeline_label.pack(side=tk.RIGHT)
+        self.timeline_scale = tk.Scale(self.timeline_frame, from_=0, to=0, orient=tk.HORIZONTAL,
+                                       command=lambda value: self.seek_timeline(int(value)),
+                                       bg="#2c3e50", fg="white", highlightthickness=0,
+                                       showvalue=0)
+        self.timeline_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+        
+        # Collapsible run statistics panel, built the first time it is opened
+        self.stats_frame = None
+        self.profile_var = tk.BooleanVar(value=False)
+        
         # Main container for canvas and sidebar
         self.main_container = tk.Frame(self.root)
         self.main_container.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
@@ -242,15 +616,98 @@ class DijkstraVisualizer:
         self.canvas.bind("<Button-1>", self.canvas_click)
         self.canvas.bind("<B1-Motion>", self.canvas_drag)
         self.canvas.bind("<ButtonRelease-1>", self.canvas_release)
+        self.canvas.bind("<Delete>", lambda e: self.delete_selection() if self.mode == "select" else None)
         
         self.algorithm_complete = False
         
+    def build_stats_panel(self):
+        """Create the run statistics panel widgets"""
+        self.stats_frame = tk.Frame(self.root, bg="#ecf0f1", padx=15, pady=8)
+        self.stats_labels = {}
+        for idx, (label, _) in enumerate(RunStats().rows()):
+            tk.Label(self.stats_frame, text=f"{label}:", font=("Arial", 9),
+                    bg="#ecf0f1", fg="#7f8c8d").grid(row=idx // 5, column=(idx % 5) * 2, sticky=tk.E, padx=(10, 2))
+            value_label = tk.Label(self.stats_frame, text="—", font=("Arial", 9, "bold"),
+                                   bg="#ecf0f1", fg="#2c3e50", width=8, anchor=tk.W)
+            value_label.grid(row=idx // 5, column=(idx % 5) * 2 + 1, sticky=tk.W)
+            self.stats_labels[label] = value_label
+        
+        tk.Checkbutton(self.stats_frame, text="Profile next run (cProfile + tracemalloc)",
+                      variable=self.profile_var, bg="#ecf0f1", font=("Arial", 9),
+                      activebackground="#ecf0f1").grid(row=2, column=0, columnspan=10, sticky=tk.W, pady=(5, 0))
+    
+    def toggle_stats_panel(self):
+        """Show or hide the run statistics panel"""
+        self.stats_open = not self.stats_open
+        if self.stats_open:
+            if self.stats_frame is None:
+                self.build_stats_panel()
+            self.stats_frame.pack(side=tk.TOP, fill=tk.X, before=self.main_container)
+            self.stats_toggle_btn.config(text="▾ Run Stats")
+            self.update_stats_panel()
+        else:
+            self.stats_frame.pack_forget()
+            self.stats_toggle_btn.config(text="▸ Run Stats")
+    
+    def update_stats_panel(self):
+        """Refresh the statistics panel from the current run"""
+        if not self.stats_open:
+            return
+        rows = self.run_stats.rows() if self.run_stats else [(label, "—") for label in self.stats_labels]
+        for label, value in rows:
+            self.stats_labels[label].config(text=value)
+    
+    def start_profiling(self):
+        """cProfile for the next run; tracemalloc starts when the run does"""
+        import cProfile
+        return cProfile.Profile()
+    
+    def discard_profiling(self):
+        """Stop tracemalloc for a run that was cancelled or closed before it finished"""
+        import tracemalloc
+        tracemalloc.stop()
+    
+    def save_profile(self, profiler):
+        """Write the profile and memory snapshot of the finished run to PROFILE_DIR"""
+        import pstats
+        import tracemalloc
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        profile_path = os.path.join(PROFILE_DIR, f"dijkstra_profile_{stamp}.prof")
+        summary_path = os.path.join(PROFILE_DIR, f"dijkstra_profile_{stamp}.txt")
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(profile_path)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                f.write(f"Current traced memory: {current} bytes\n")
+                f.write(f"Peak traced memory: {peak} bytes\n\n")
+                f.write("Top allocations by line:\n")
+                for stat in snapshot.statistics('lineno')[:25]:
+                    f.write(f"{stat}\n")
+                f.write("\nTop functions by cumulative time:\n")
+                stats = pstats.Stats(profile_path, stream=f)
+                stats.sort_stats('cumulative').print_stats(15)
+            messagebox.showinfo("Profile Saved", f"Run profile written to:\n\n{profile_path}\n{summary_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save the profile: {e}")
+        finally:
+            tracemalloc.stop()
+        return profile_path
+    
     def save_state(self):
         """Save current state for undo"""
+        # Any edit invalidates the node and edge indices of a running or
+        # recorded run, and of the live update feed
+        self.stop_live_updates()
+        self.cancel_job()
+        self.close_timeline()
+        position = {node: i for i, node in enumerate(self.nodes)}
         state = {
             'nodes': [(n.x, n.y, n.label) for n in self.nodes],
-            'edges': [(self.nodes.index(e.node1), self.nodes.index(e.node2), e.weight, e.directed) for e in self.edges],
-            'start_node': self.nodes.index(self.start_node) if self.start_node else None
+            'edges': [(position[e.node1], position[e.node2], e.weight, e.directed) for e in self.edges],
+            'start_node': position[self.start_node] if self.start_node else None,
+            'facilities': [position[node] for node in self.facilities]
         }
         self.history.append(state)
         if len(self.history) > 20:  # Keep only last 20 states
@@ -263,12 +720,18 @@ class DijkstraVisualizer:
             return
         
         state = self.history.pop()
+        self.stop_layout()
+        self.stop_live_updates()
+        self.cancel_job()
+        self.close_timeline()
         
         # Restore nodes
         self.nodes = []
         for x, y, label in state['nodes']:
             node = Node(x, y, label)
             self.nodes.append(node)
+        self.label_index = {node.label: node for node in self.nodes}
+        self.spatial = None
         
         # Restore edges
         self.edges = []
@@ -278,6 +741,8 @@ class DijkstraVisualizer:
         
         # Restore start node
         self.start_node = self.nodes[state['start_node']] if state['start_node'] is not None else None
+        self.facilities = [self.nodes[i] for i in state['facilities']]
+        self.selection = set()
         
         self.reset_algorithm()
         self.info_label.config(text="Undo completed")
@@ -332,7 +797,9 @@ Key Properties:
 • **Single Source:** It computes shortest paths from one specific node (the "source").
 • **Weighted Graph:** The edges must have numerical weights.
 • **Non-Negative Weights:** The algorithm *only* works correctly if all edge 
-  weights are non-negative (zero or positive).
+  weights are non-negative (zero or positive). When you enter negative weights,
+  this visualizer first runs Bellman-Ford to find node potentials and orders the
+  search by reweighted distances (Johnson's technique), or reports a negative cycle.
 • **Greedy Approach:** At each step, it visits the "closest" unvisited node 
   from the source.
 
@@ -514,18 +981,76 @@ Features:
     
     def load_photo(self, image_path, size=(120, 120)):
         """Load and resize photo, return PhotoImage or None"""
+        # Photos already seen since the last eviction are served from memory
+        # without touching the disk
+        if (image_path, size) in self.photo_keys:
+            key = self.photo_keys[(image_path, size)]
+            return self.photo_cache[key] if key else None
+        
         try:
             if os.path.exists(image_path):
-                img = Image.open(image_path)
-                img = img.resize(size, Image.Resampling.LANCZOS)
-                # Make circular (optional)
-                return ImageTk.PhotoImage(img)
+                from PIL import Image, ImageTk
+                key = (image_path, size, os.path.getmtime(image_path))
+                if key not in self.photo_cache:
+                    img = self.load_thumbnail(key)
+                    if img is None:
+                        img = Image.open(image_path)
+                        img = img.resize(size, Image.Resampling.LANCZOS)
+                        self.save_thumbnail(key, img)
+                    # Make circular (optional)
+                    self.photo_cache[key] = ImageTk.PhotoImage(img)
+                self.photo_keys[(image_path, size)] = key
+                return self.photo_cache[key]
             else:
+                self.photo_keys[(image_path, size)] = None
                 return None
         except Exception as e:
             print(f"Error loading image {image_path}: {e}")
             return None
     
+    def thumbnail_path(self, key):
+        """Path of the on-disk thumbnail for a photo cache key"""
+        image_path, (width, height), mtime = key
+        digest = hashlib.sha1(f"{os.path.abspath(image_path)}|{width}x{height}|{mtime}".encode()).hexdigest()
+        return os.path.join(THUMBNAIL_CACHE_DIR, f"{digest}.png")
+    
+    def load_thumbnail(self, key):
+        """Return the cached resized image from disk, or None"""
+        if not THUMBNAIL_CACHE_DIR:
+            return None
+        path = self.thumbnail_path(key)
+        if not os.path.exists(path):
+            return None
+        from PIL import Image
+        img = Image.open(path)
+        img.load()
+        return img
+    
+    def save_thumbnail(self, key, img):
+        """Store a resized image in the on-disk thumbnail cache"""
+        if not THUMBNAIL_CACHE_DIR:
+            return
+        try:
+            os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+            img.save(self.thumbnail_path(key), "PNG")
+        except Exception as e:
+            print(f"Note: Thumbnail cache write skipped: {e}")
+    
+    def team_window_closed(self, event, window):
+        """Schedule photo cache eviction once the last Team window is gone"""
+        if event.widget is not window:
+            return
+        self.team_windows_open -= 1
+        if self.team_windows_open == 0:
+            self.photo_evict_job = self.root.after(PHOTO_CACHE_TTL_MS, self.evict_photo_cache)
+    
+    def evict_photo_cache(self):
+        """Release the decoded sidebar photos"""
+        self.photo_evict_job = None
+        if self.team_windows_open == 0:
+            self.photo_cache.clear()
+            self.photo_keys.clear()
+    
     def show_developed_by(self):
         """Show developer information"""
         dev_window = tk.Toplevel(self.root)
@@ -543,6 +1068,13 @@ Features:
         
         dev_window.transient(self.root)
         
+        # Keep cached photos alive while the window is open
+        if self.photo_evict_job:
+            self.root.after_cancel(self.photo_evict_job)
+            self.photo_evict_job = None
+        self.team_windows_open += 1
+        dev_window.bind("<Destroy>", lambda e: self.team_window_closed(e, dev_window))
+        
         # Header
         header = tk.Frame(dev_window, bg="#2c3e50", pady=15)
         header.pack(fill=tk.X)
@@ -633,8 +1165,8 @@ STEP 1: CREATE YOUR GRAPH
 Adding Nodes:
 1. Click the "Add Node" button (it will turn blue)
 2. Click anywhere on the white canvas to place a node
-3. Nodes are automatically labeled A, B, C, D, etc.
-4. You can add up to 26 nodes
+3. Nodes are automatically labeled A, B, ..., Z, then AA, AB, etc.
+4. There is no limit on the number of nodes
 
 Adding Edges:
 1. Click the "Add Edge" button
@@ -643,6 +1175,14 @@ Adding Edges:
 4. Enter the weight/distance in the popup dialog
 5. The edge will be created with the specified weight
 
+Editing Many Nodes:
+1. Click the "Select" button
+2. Drag a box around nodes to select them (hold Shift to add to the
+   selection, or Shift-click a node to toggle it)
+3. Drag any selected node to move the whole selection
+4. Use the Selection menu to scale weights, change edge direction or
+   delete the selected nodes (or press Delete) - each is a single undo step
+
 ═══════════════════════════════════════════════════════════════════
 
 STEP 2: CONFIGURE GRAPH TYPE
@@ -669,7 +1209,8 @@ STEP 4: RUN THE ALGORITHM
    • Orange nodes = being processed
    • Purple edges = shortest path found
    • Distance labels appear above nodes
-3. A summary popup will show results
+3. A results table opens: click a heading to sort, type in "Find label"
+   to filter, and click a row to highlight that path on the canvas
 
 ═══════════════════════════════════════════════════════════════════
 
@@ -680,6 +1221,7 @@ View Report:
 • See detailed table with all shortest paths
 • View unreachable nodes (if any)
 • Check the complete path from source to each destination
+• Use Find to jump to a node in long reports
 
 ═══════════════════════════════════════════════════════════════════
 
@@ -687,9 +1229,19 @@ ADDITIONAL FEATURES
 
 Undo: Revert your last action (up to 20 steps)
 Reset: Clear algorithm results but keep your graph
+Cancel: Stop a run or all-pairs computation that is still in progress
 Clear All: Delete everything and start fresh
 Speed Control: Adjust animation speed with the slider
+Timeline: Pause, step (⏮ ⏭), fast-forward (×10, ×100, ×1000) or drag the slider to any step of the run
 Download: Save a detailed report of your results
+Graph > Generate Graph: Build a random test graph (geometric, grid or preferential attachment)
+Graph > Auto Layout: Arrange nodes with a force-directed layout (click again to stop)
+Facilities: Mark several nodes as facilities; one run colours every node by its nearest facility
+Graph > Live Weight Updates: Follow a file or UDP feed of "from to weight" records and keep the paths current
+Analysis > All Pairs Shortest Paths: Distances and paths between every pair of nodes
+Analysis > K Shortest Paths: Rank alternative routes to a target and step through them
+Analysis > Isochrone: Shade everything reachable from the source within a distance budget
+File > Open / Export Graph: Load or save the graph as JSON
 
 ═══════════════════════════════════════════════════════════════════
 
@@ -728,10 +1280,17 @@ Solution: Try Reset or Clear All to restart
             messagebox.showwarning("Warning", "Please run Dijkstra's algorithm first before generating report")
             return
         
-        if not REPORTLAB_AVAILABLE:
+        try:
+            from reportlab.lib.pagesizes import A4
+            from reportlab.lib.units import inch
+            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, PageBreak
+            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+            from reportlab.lib.enums import TA_CENTER
+            from PIL import Image
+        except ImportError:
             messagebox.showerror("Missing Library", 
-                               "ReportLab is required to generate PDF reports.\n\n"
-                               "Please install it using:\npip install reportlab")
+                               "ReportLab and Pillow are required to generate PDF reports.\n\n"
+                               "Please install them using:\npip install reportlab pillow")
             return
         
         try:
@@ -847,16 +1406,7 @@ Solution: Try Reset or Clear All to restart
             story.append(Spacer(1, 0.2*inch))
             
             # Get results
-            reachable = []
-            unreachable = []
-            
-            for node in self.nodes:
-                if node == self.start_node:
-                    continue
-                if node.distance == float('inf'):
-                    unreachable.append(node)
-                else:
-                    reachable.append(node)
+            reachable, unreachable = self.split_reachable()
             
             reachable.sort(key=lambda x: x.distance)
             
@@ -1002,6 +1552,7 @@ Solution: Try Reset or Clear All to restart
             height = self.canvas.winfo_height()
             
             # Capture screenshot
+            from PIL import ImageGrab
             screenshot = ImageGrab.grab(bbox=(x, y, x + width, y + height))
             
             # Use unique filename with timestamp to avoid conflicts
@@ -1013,6 +1564,328 @@ Solution: Try Reset or Clear All to restart
             print(f"Error capturing canvas: {e}")
             return None
     
+    def build_graph(self):
+        """Build an engine graph from the current canvas nodes and edges"""
+        graph = Graph(directed=self.is_directed.get())
+        ids = {}
+        for node in self.nodes:
+            ids[node] = graph.add_node(node.label, node.x, node.y)
+        for edge in self.edges:
+            graph.add_edge(ids[edge.node1], ids[edge.node2], edge.weight, edge.directed)
+        graph.source = self.start_node.label if self.start_node else None
+        return graph
+    
+    def export_graph(self):
+        """Save the graph as JSON (the format server.py loads)"""
+        if not self.nodes:
+            messagebox.showwarning("Warning", "Please add some nodes first")
+            return
+        
+        filename = filedialog.asksaveasfilename(defaultextension=".json",
+                                                filetypes=[("Graph files", "*.json")],
+                                                initialfile="graph.json")
+        if not filename:
+            return
+        
+        try:
+            save_graph(self.build_graph(), filename)
+            self.info_label.config(text=f"Graph exported: {filename}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export graph:\n{str(e)}")
+    
+    def import_graph(self):
+        """Replace the canvas contents with a graph saved by export_graph"""
+        filename = filedialog.askopenfilename(filetypes=[("Graph files", "*.json")])
+        if not filename:
+            return
+        
+        try:
+            graph = load_graph(filename)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open graph:\n{str(e)}")
+            return
+        
+        self.set_graph(graph)
+        self.info_label.config(text=f"Graph opened: {filename} ({len(self.nodes)} nodes, {len(self.edges)} edges)")
+    
+    def set_graph(self, graph):
+        """Replace the canvas contents with an engine graph (undoable)"""
+        self.stop_layout()
+        self.save_state()
+        self.nodes = [Node(x, y, label) for label, x, y in zip(graph.labels, graph.xs, graph.ys)]
+        self.label_index = {node.label: node for node in self.nodes}
+        self.spatial = None
+        self.edges = [Edge(self.nodes[u], self.nodes[v], w, bool(d))
+                      for u, v, w, d in zip(graph.edge_src, graph.edge_dst,
+                                            graph.edge_weight, graph.edge_directed)]
+        self.start_node = self.nodes[graph.node_id(graph.source)] if graph.source in graph.index else None
+        self.edge_start = None
+        self.selection = set()
+        self.is_directed.set(graph.directed)
+        self.reset_algorithm()
+    
+    def toggle_layout(self):
+        """Start or stop the background force-directed layout"""
+        if self.layout is not None:
+            self.stop_layout()
+            self.info_label.config(text="Auto layout stopped")
+            return
+        
+        if len(self.nodes) < 2:
+            messagebox.showwarning("Warning", "Please add at least two nodes first")
+            return
+        
+        try:
+            from layout import ForceLayout
+        except ImportError:
+            messagebox.showerror("Missing Library", 
+                               "NumPy is required for auto layout.\n\n"
+                               "Please install it using:\npip install numpy")
+            return
+        
+        self.save_state()
+        position = {node: i for i, node in enumerate(self.nodes)}
+        self.layout = ForceLayout([n.x for n in self.nodes], [n.y for n in self.nodes],
+                                  [position[e.node1] for e in self.edges],
+                                  [position[e.node2] for e in self.edges],
+                                  max(self.canvas.winfo_width(), 200),
+                                  max(self.canvas.winfo_height(), 200))
+        self.graph_menu.entryconfig(1, label="Stop Layout")
+        self.info_label.config(text="Auto layout running - Choose Graph > Stop Layout to keep the current positions")
+        self.layout_job = self.root.after(0, self.layout_step)
+    
+    def layout_step(self):
+        """Advance the layout for about one frame, then redraw"""
+        started = time.perf_counter()
+        while not self.layout.done and time.perf_counter() - started < LAYOUT_FRAME_BUDGET:
+            self.layout.step()
+        
+        for node, x, y in zip(self.nodes, self.layout.xs.tolist(), self.layout.ys.tolist()):
+            node.x = x
+            node.y = y
+        self.spatial = None
+        self.draw_graph()
+        
+        if self.layout.done:
+            self.stop_layout()
+            self.info_label.config(text="Auto layout finished")
+        else:
+            self.layout_job = self.root.after(LAYOUT_FRAME_MS, self.layout_step)
+    
+    def stop_layout(self):
+        """Stop the background layout, keeping the current positions"""
+        if self.layout_job is not None:
+            self.root.after_cancel(self.layout_job)
+        self.layout = None
+        self.layout_job = None
+        self.graph_menu.entryconfig(1, label="Auto Layout")
+    
+    def toggle_live_updates(self):
+        """Ask for an update feed and keep the shortest-path tree current, or stop"""
+        if self.live_feed is not None:
+            self.stop_live_updates()
+            self.info_label.config(text="Live updates stopped")
+            return
+        
+        if not self.start_node:
+            messagebox.showwarning("Warning", "Please set a source node first")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Live Weight Updates")
+        dialog.geometry("380x150")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        tk.Label(dialog, text="Update file to tail, or udp://127.0.0.1:PORT\n"
+                              "(one \"from to weight\" record per line)", font=("Arial", 10)).pack(pady=(10, 0))
+        spec_frame = tk.Frame(dialog)
+        spec_frame.pack(pady=5)
+        spec_var = tk.StringVar(value=self.live_spec)
+        entry = tk.Entry(spec_frame, textvariable=spec_var, font=("Arial", 11), width=28)
+        entry.pack(side=tk.LEFT)
+        entry.focus()
+        
+        def browse():
+            filename = filedialog.askopenfilename(parent=dialog)
+            if filename:
+                spec_var.set(filename)
+        
+        tk.Button(spec_frame, text="...", command=browse).pack(side=tk.LEFT, padx=3)
+        
+        def ok():
+            spec = spec_var.get().strip()
+            if not spec:
+                return
+            dialog.destroy()
+            self.start_live_updates(spec)
+        
+        entry.bind("<Return>", lambda e: ok())
+        tk.Button(dialog, text="Start", command=ok, bg="#27ae60", fg="white", width=10).pack(pady=5)
+    
+    def start_live_updates(self, spec):
+        """Solve once, then repair the tree from the feed every LIVE_WINDOW_MS"""
+        from livefeed import open_feed
+        self.reset_algorithm()
+        try:
+            feed = open_feed(spec)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not open update feed:\n{e}")
+            return
+        
+        # A private engine graph: the feed changes its weights in place
+        graph = self.build_graph()
+        try:
+            tree = DynamicTree(graph, graph.node_id(self.start_node.label))
+        except NegativeCycleError:
+            feed.close()
+            messagebox.showerror("Negative Cycle", "The edge weights contain a negative cycle")
+            return
+        
+        self.live_spec = spec
+        self.live_feed = feed
+        self.live_tree = tree
+        position = {node: i for i, node in enumerate(self.nodes)}
+        self.live_incident = [[] for _ in self.nodes]
+        for index, edge in enumerate(self.edges):
+            self.live_incident[position[edge.node1]].append(index)
+            self.live_incident[position[edge.node2]].append(index)
+        for i in range(len(self.nodes)):
+            self.apply_live_state(i)
+        self.draw_graph()
+        self.algorithm_complete = True
+        self.report_btn.config(state=tk.NORMAL)
+        self.graph_menu.entryconfig(2, label="Stop Live Updates")
+        self.info_label.config(text=f"Live: watching {spec}")
+        self.live_job = self.root.after(LIVE_WINDOW_MS, self.live_step)
+    
+    def apply_live_state(self, i):
+        """Copy node i's distance and predecessor from the live tree"""
+        tree = self.live_tree
+        node = self.nodes[i]
+        node.distance = tree.dist[i]
+        node.visited = tree.dist[i] != float('inf')
+        node.previous = self.nodes[tree.prev[i]] if tree.prev[i] != -1 else None
+    
+    def live_step(self):
+        """Apply one window's worth of updates and refresh what they changed"""
+        from livefeed import edge_changes
+        started = time.perf_counter()
+        self.live_job = None
+        try:
+            changes, unknown = edge_changes(self.live_tree.graph, self.live_feed.read())
+            changed = self.live_tree.update(changes) if changes else set()
+        except (OSError, NegativeCycleError) as e:
+            self.stop_live_updates()
+            messagebox.showerror("Live Updates Stopped", str(e))
+            return
+        
+        if changes:
+            for e, weight in changes.items():
+                self.edges[e].weight = weight
+            if changed is None or len(changed) > len(self.nodes) * LIVE_FULL_REDRAW:
+                for i in range(len(self.nodes)):
+                    self.apply_live_state(i)
+                self.draw_graph()
+            else:
+                # Reweighted edges, plus the nodes whose distance or tree edge moved
+                edges = set(changes)
+                for i in changed:
+                    self.apply_live_state(i)
+                    edges.update(self.live_incident[i])
+                for index in edges:
+                    self.redraw_edge(index)
+                for i in changed:
+                    self.redraw_node(i)
+            elapsed = time.perf_counter() - started
+            self.info_label.config(text=f"Live: {len(changes)} edge updates, "
+                                        f"{len(self.nodes) if changed is None else len(changed)} nodes changed "
+                                        f"({elapsed * 1000:.0f} ms)"
+                                        + (f", {unknown} unknown edges" if unknown else ""))
+        self.live_job = self.root.after(LIVE_WINDOW_MS, self.live_step)
+    
+    def stop_live_updates(self):
+        """Stop following the feed; the canvas keeps the last weights and tree"""
+        if self.live_feed is None:
+            return
+        if self.live_job is not None:
+            self.root.after_cancel(self.live_job)
+        self.live_feed.close()
+        self.live_feed = None
+        self.live_tree = None
+        self.live_job = None
+        self.live_incident = []
+        self.graph_menu.entryconfig(2, label="Live Weight Updates...")
+    
+    def show_generate_dialog(self):
+        """Ask for generator settings and replace the graph with a random one"""
+        try:
+            from generators import GENERATORS, WEIGHT_DISTRIBUTIONS, generate
+        except ImportError:
+            messagebox.showerror("Missing Library", 
+                               "NumPy is required to generate graphs.\n\n"
+                               "Please install it using:\npip install numpy")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Generate Graph")
+        dialog.geometry("340x300")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        model_var = tk.StringVar(value=GENERATORS[0])
+        nodes_var = tk.StringVar(value="30")
+        k_var = tk.StringVar(value="3")
+        dist_var = tk.StringVar(value=WEIGHT_DISTRIBUTIONS[0])
+        low_var = tk.StringVar(value="1")
+        high_var = tk.StringVar(value="10")
+        seed_var = tk.StringVar(value="")
+        
+        fields = [
+            ("Model:", ttk.Combobox(dialog, textvariable=model_var, values=GENERATORS, state="readonly", width=15)),
+            ("Nodes:", tk.Entry(dialog, textvariable=nodes_var, width=17)),
+            ("Neighbours / links (k):", tk.Entry(dialog, textvariable=k_var, width=17)),
+            ("Weight distribution:", ttk.Combobox(dialog, textvariable=dist_var, values=WEIGHT_DISTRIBUTIONS,
+                                                  state="readonly", width=15)),
+            ("Min weight:", tk.Entry(dialog, textvariable=low_var, width=17)),
+            ("Max weight:", tk.Entry(dialog, textvariable=high_var, width=17)),
+            ("Seed (optional):", tk.Entry(dialog, textvariable=seed_var, width=17)),
+        ]
+        for row, (text, widget) in enumerate(fields):
+            tk.Label(dialog, text=text, font=("Arial", 10)).grid(row=row, column=0, sticky=tk.E, padx=10, pady=4)
+            widget.grid(row=row, column=1, sticky=tk.W, padx=10, pady=4)
+        
+        def ok():
+            try:
+                n = int(nodes_var.get())
+                k = int(k_var.get())
+                low = float(low_var.get())
+                high = float(high_var.get())
+                seed = int(seed_var.get()) if seed_var.get().strip() else None
+            except ValueError:
+                messagebox.showerror("Error", "Please enter valid numbers")
+                return
+            if n < 2 or k < 1 or not 0 < low <= high:
+                messagebox.showerror("Error", "Need at least 2 nodes, k >= 1 and 0 < min weight <= max weight")
+                return
+            
+            width = max(self.canvas.winfo_width(), 200)
+            height = max(self.canvas.winfo_height(), 200)
+            graph = generate(model_var.get(), n, k=k, distribution=dist_var.get(), low=low, high=high,
+                             width=width, height=height, directed=self.is_directed.get(), seed=seed)
+            if graph.m > 20000 and not messagebox.askyesno(
+                    "Large Graph", f"The generated graph has {graph.m} edges and may take a while "
+                                   f"to draw.\n\nLoad it onto the canvas anyway?", parent=dialog):
+                return
+            dialog.destroy()
+            self.set_graph(graph)
+            self.info_label.config(text=f"Generated {model_var.get()} graph: {graph.n} nodes, {graph.m} edges")
+        
+        btn_frame = tk.Frame(dialog)
+        btn_frame.grid(row=len(fields), column=0, columnspan=2, pady=10)
+        tk.Button(btn_frame, text="Generate", command=ok, width=10).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Cancel", command=dialog.destroy, width=10).pack(side=tk.LEFT, padx=5)
+    
     def generate_detailed_report(self):
         """Generate detailed step-by-step report"""
         report = "=" * 80 + "\n"
@@ -1052,16 +1925,7 @@ Solution: Try Reset or Clear All to restart
         report += "\n" + "=" * 80 + "\n\n"
         
         # Results
-        reachable = []
-        unreachable = []
-        
-        for node in self.nodes:
-            if node == self.start_node:
-                continue
-            if node.distance == float('inf'):
-                unreachable.append(node)
-            else:
-                reachable.append(node)
+        reachable, unreachable = self.split_reachable()
         
         reachable.sort(key=lambda x: x.distance)
         
@@ -1122,6 +1986,14 @@ Solution: Try Reset or Clear All to restart
             report += f"• Shortest Distance: {min(n.distance for n in reachable):.1f} (to node {min(reachable, key=lambda n: n.distance).label})\n"
             report += f"• Longest Distance: {max(n.distance for n in reachable):.1f} (to node {max(reachable, key=lambda n: n.distance).label})\n"
         
+        # Run statistics
+        if self.run_stats:
+            report += "\n" + "=" * 80 + "\n\n"
+            report += "STEP 7: RUN STATISTICS\n"
+            report += "-" * 80 + "\n"
+            for label, value in self.run_stats.rows():
+                report += f"{label + ':':<28} {value}\n"
+        
         report += "\n" + "=" * 80 + "\n"
         report += "END OF REPORT\n"
         report += "=" * 80 + "\n"
@@ -1132,6 +2004,10 @@ Solution: Try Reset or Clear All to restart
         # Update all existing edges
         for edge in self.edges:
             edge.directed = self.is_directed.get()
+        self.clear_alt_paths()
+        self.stop_live_updates()
+        self.cancel_job()
+        self.close_timeline()
         self.draw_graph()
         
         if self.is_directed.get():
@@ -1142,6 +2018,8 @@ Solution: Try Reset or Clear All to restart
     def set_mode(self, mode):
         self.mode = mode
         self.edge_start = None
+        if mode != "select":
+            self.set_selection(set())  # Bulk edits only apply in select mode
         
         # Update button colors
         self.add_node_btn.config(bg="#95a5a6")
@@ -1149,6 +2027,8 @@ Solution: Try Reset or Clear All to restart
         self.set_start_btn.config(bg="#95a5a6")
         self.move_node_btn.config(bg="#95a5a6")
         self.rename_node_btn.config(bg="#95a5a6")
+        self.facilities_btn.config(bg="#95a5a6")
+        self.select_btn.config(bg="#95a5a6")
         
         if mode == "add_node":
             self.add_node_btn.config(bg="#3498db")
@@ -1171,6 +2051,16 @@ Solution: Try Reset or Clear All to restart
             self.rename_node_btn.config(bg="#3498db")
             self.info_label.config(text="Mode: Rename Node - Click a node to rename it")
             self.canvas.config(cursor="hand2")
+        elif mode == "facilities":
+            self.facilities_btn.config(bg="#3498db")
+            self.info_label.config(text="Mode: Facilities - Click nodes to mark or unmark them; "
+                                        "every node is coloured by its nearest facility")
+            self.canvas.config(cursor="hand2")
+        elif mode == "select":
+            self.select_btn.config(bg="#3498db")
+            self.info_label.config(text="Mode: Select - Drag a box around nodes (Shift adds), drag a selected "
+                                        "node to move them all, Selection menu for bulk edits")
+            self.canvas.config(cursor="arrow")
     
     def canvas_click(self, event):
         if self.mode == "add_node":
@@ -1183,29 +2073,230 @@ Solution: Try Reset or Clear All to restart
             self.start_move_node(event.x, event.y)
         elif self.mode == "rename_node":
             self.rename_node(event.x, event.y)
+        elif self.mode == "facilities":
+            self.toggle_facility(event.x, event.y)
+        elif self.mode == "select":
+            self.canvas.focus_set()  # For the Delete key
+            self.select_press(event)
     
     def canvas_drag(self, event):
         if self.mode == "move_node" and self.dragging_node:
-            self.dragging_node.x = event.x
-            self.dragging_node.y = event.y
-            self.draw_graph()
+            self.drag_by(event.x - self.dragging_node.x, event.y - self.dragging_node.y)
+        elif self.mode == "select" and self.select_drag == "band":
+            x, y = self.band_start
+            self.canvas.coords(self.band, x, y, event.x, event.y)
+        elif self.mode == "select" and self.select_drag == "move":
+            if not self.drag_saved:
+                # One undo record for the whole drag, taken once it really moves
+                self.stop_layout()
+                self.save_state()
+                self.drag_saved = True
+            x, y = self.drag_last
+            self.drag_last = (event.x, event.y)
+            self.drag_by(event.x - x, event.y - y)
     
     def canvas_release(self, event):
         if self.mode == "move_node" and self.dragging_node:
             self.dragging_node = None
+            self.spatial = None
             self.info_label.config(text="Node moved - Click and drag another node to move it")
+        elif self.mode == "select" and self.select_drag == "band":
+            self.canvas.delete(self.band)
+            self.band = None
+            self.select_drag = None
+            x, y = self.band_start
+            self.select_box(x, y, event.x, event.y, self.band_additive)
+        elif self.mode == "select" and self.select_drag == "move":
+            self.select_drag = None
+            if self.drag_saved:
+                self.spatial = None
+                self.info_label.config(text=f"Moved {len(self.drag_nodes)} nodes")
     
-    def add_node(self, x, y):
-        self.save_state()
-        label = chr(65 + len(self.nodes))  # A, B, C, ...
-        if len(self.nodes) >= 26:
-            messagebox.showwarning("Limit", "Maximum 26 nodes allowed")
+    def select_press(self, event):
+        """Start a rubber band on empty canvas, or a move of the selected nodes"""
+        node = self.get_node_at(event.x, event.y)
+        additive = bool(event.state & 0x0001)  # Shift held
+        if node is not None and additive:
+            self.set_selection(self.selection ^ {node})
+            return
+        if node is not None:
+            if node not in self.selection:
+                self.set_selection({node})
+            self.begin_drag(list(self.selection))
+            self.drag_last = (event.x, event.y)
+            self.drag_saved = False
+            self.select_drag = "move"
+            return
+        if not additive:
+            self.set_selection(set())
+        self.band_start = (event.x, event.y)
+        self.band_additive = additive
+        self.band = self.canvas.create_rectangle(event.x, event.y, event.x, event.y,
+                                                 outline="#3498db", dash=(4, 2), tags="band")
+        self.select_drag = "band"
+    
+    def spatial_index(self):
+        """Grid over the current node positions, rebuilt after they change"""
+        if self.spatial is None:
+            self.spatial = SpatialIndex(self.nodes)
+        return self.spatial
+    
+    def select_box(self, x1, y1, x2, y2, additive=False):
+        """Select the nodes inside a rectangle, or add them to the selection"""
+        found = set(self.spatial_index().query(x1, y1, x2, y2))
+        self.set_selection(self.selection | found if additive else found)
+        self.info_label.config(text=f"{len(self.selection)} nodes selected")
+    
+    def select_all(self):
+        if self.mode != "select":
+            self.set_mode("select")
+        self.set_selection(set(self.nodes))
+        self.info_label.config(text=f"{len(self.selection)} nodes selected")
+    
+    def set_selection(self, nodes):
+        """Replace the selection, redrawing only the nodes whose highlight changed"""
+        changed = self.selection ^ nodes
+        self.selection = nodes
+        if not changed:
+            return
+        if len(changed) > len(self.nodes) * DRAG_FULL_REDRAW:
+            self.draw_graph()
+            return
+        for index, node in enumerate(self.nodes):
+            if node in changed:
+                self.redraw_node(index)
+    
+    def begin_drag(self, nodes):
+        """Remember the canvas items a drag of ``nodes`` has to update"""
+        moving = set(nodes)
+        self.drag_nodes = [i for i, node in enumerate(self.nodes) if node in moving]
+        self.drag_edges = [i for i, edge in enumerate(self.edges)
+                           if edge.node1 in moving or edge.node2 in moving]
+    
+    def drag_by(self, dx, dy):
+        """Move the dragged nodes, shifting their items and redrawing only their edges"""
+        if not dx and not dy:
+            return
+        for i in self.drag_nodes:
+            node = self.nodes[i]
+            node.x += dx
+            node.y += dy
+        # Isochrone shading follows every edge, so it needs a full redraw
+        if self.isochrone_budget is not None or len(self.drag_nodes) > len(self.nodes) * DRAG_FULL_REDRAW:
+            self.draw_graph()
+            return
+        for i in self.drag_nodes:
+            self.canvas.move(f"node{i}", dx, dy)
+        for i in self.drag_edges:
+            self.redraw_edge(i)
+    
+    def selected_edges(self):
+        """Indices of the edges with both ends selected"""
+        return [i for i, edge in enumerate(self.edges)
+                if edge.node1 in self.selection and edge.node2 in self.selection]
+    
+    def show_scale_dialog(self):
+        if not self.selected_edges():
+            messagebox.showwarning("Warning", "Select at least two connected nodes first")
             return
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Scale Weights")
+        dialog.geometry("300x120")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        tk.Label(dialog, text="Multiply selected edge weights by:", font=("Arial", 11)).pack(pady=10)
+        factor_var = tk.StringVar(value="2")
+        entry = tk.Entry(dialog, textvariable=factor_var, font=("Arial", 12), width=15)
+        entry.pack(pady=5)
+        entry.focus()
+        entry.select_range(0, tk.END)
         
+        def ok():
+            try:
+                factor = float(factor_var.get())
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid number")
+                return
+            if not math.isfinite(factor):
+                messagebox.showerror("Error", "Factor must be a finite number")
+                return
+            dialog.destroy()
+            self.scale_selection(factor)
+        
+        btn_frame = tk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        tk.Button(btn_frame, text="OK", command=ok, width=10).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Cancel", command=dialog.destroy, width=10).pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", lambda e: ok())
+    
+    def scale_selection(self, factor):
+        """Multiply the weights of the edges inside the selection (one undo step)"""
+        indices = self.selected_edges()
+        if not indices:
+            return
+        self.stop_layout()
+        self.save_state()
+        for i in indices:
+            self.edges[i].weight *= factor
+        self.reset_algorithm()
+        self.info_label.config(text=f"Scaled {len(indices)} edge weights by {factor:g}")
+    
+    def set_selection_direction(self, directed):
+        """Make the edges inside the selection directed or undirected (one undo step)"""
+        indices = self.selected_edges()
+        if not indices:
+            messagebox.showwarning("Warning", "Select at least two connected nodes first")
+            return
+        self.stop_layout()
+        self.save_state()
+        for i in indices:
+            self.edges[i].directed = directed
+        self.reset_algorithm()
+        kind = "directed" if directed else "undirected"
+        self.info_label.config(text=f"Made {len(indices)} edges {kind}")
+    
+    def delete_selection(self):
+        """Remove the selected nodes and their edges (one undo step)"""
+        if not self.selection:
+            return
+        self.stop_layout()
+        self.save_state()
+        removed = self.selection
+        self.nodes = [node for node in self.nodes if node not in removed]
+        self.edges = [edge for edge in self.edges
+                      if edge.node1 not in removed and edge.node2 not in removed]
+        self.label_index = {node.label: node for node in self.nodes}
+        self.spatial = None
+        if self.start_node in removed:
+            self.start_node = None
+        if self.edge_start in removed:
+            self.edge_start = None
+        self.facilities = [node for node in self.facilities if node not in removed]
+        self.selection = set()
+        self.reset_algorithm()
+        self.info_label.config(text=f"Deleted {len(removed)} nodes")
+    
+    def add_node(self, x, y):
+        self.stop_layout()
+        self.save_state()
+        label = self.next_label()
         node = Node(x, y, label)
         self.nodes.append(node)
+        self.label_index[label] = node
+        self.spatial = None
         self.draw_graph()
     
+    def next_label(self):
+        """First unused label from A, B, ..., Z, AA, AB, ... after the existing nodes"""
+        index = len(self.nodes)
+        label = node_label(index)
+        # Renamed nodes may already hold the natural next label
+        while label in self.label_index:
+            index += 1
+            label = node_label(index)
+        return label
+    
     def select_for_edge(self, x, y):
         clicked_node = self.get_node_at(x, y)
         if clicked_node:
@@ -1220,6 +2311,7 @@ Solution: Try Reset or Clear All to restart
                         self.save_state()
                         edge = Edge(self.edge_start, clicked_node, weight, directed=self.is_directed.get())
                         self.edges.append(edge)
+                        self.clear_alt_paths()
                         edge_type = "→" if self.is_directed.get() else "↔"
                         self.info_label.config(text=f"Edge created: {self.edge_start.label} {edge_type} {clicked_node.label} (weight: {weight})")
                 else:
@@ -1246,8 +2338,8 @@ Solution: Try Reset or Clear All to restart
         def ok():
             try:
                 val = float(weight_var.get())
-                if val <= 0:
-                    messagebox.showerror("Error", "Weight must be positive")
+                if not math.isfinite(val):
+                    messagebox.showerror("Error", "Weight must be a finite number")
                     return
                 result[0] = val
                 dialog.destroy()
@@ -1268,16 +2360,31 @@ Solution: Try Reset or Clear All to restart
         if node:
             self.save_state()
             self.start_node = node
-            self.info_label.config(text=f"Source node set to: {node.label}")
+            unreachable = len(self.split_reachable()[1])
+            self.info_label.config(text=f"Source node set to: {node.label}"
+                                        + (f" ({unreachable} nodes cannot be reached from it)" if unreachable else ""))
             self.draw_graph()
     
+    def toggle_facility(self, x, y):
+        """Mark or unmark a facility, then recolour the regions"""
+        node = self.get_node_at(x, y)
+        if node:
+            self.save_state()
+            if node in self.facilities:
+                self.facilities.remove(node)
+            else:
+                self.facilities.append(node)
+            self.run_facilities()
+    
     def start_move_node(self, x, y):
         node = self.get_node_at(x, y)
         if node:
+            self.stop_layout()
             self.save_state()
             self.dragging_node = node
             self.drag_start_x = x
             self.drag_start_y = y
+            self.begin_drag([node])
             self.info_label.config(text=f"Moving node {node.label} - Drag to new position")
     
     def rename_node(self, x, y):
@@ -1301,17 +2408,19 @@ Solution: Try Reset or Clear All to restart
                 if not new_name:
                     messagebox.showerror("Error", "Node name cannot be empty")
                     return
-                if len(new_name) > 3:
-                    messagebox.showerror("Error", "Node name must be 3 characters or less")
+                if len(new_name) > MAX_LABEL_LENGTH:
+                    messagebox.showerror("Error", f"Node name must be {MAX_LABEL_LENGTH} characters or less")
                     return
                 # Check if name already exists
-                if any(n.label == new_name and n != node for n in self.nodes):
+                if self.label_index.get(new_name, node) is not node:
                     messagebox.showerror("Error", f"Node '{new_name}' already exists")
                     return
                 
                 self.save_state()
                 old_name = node.label
+                del self.label_index[old_name]
                 node.label = new_name
+                self.label_index[new_name] = node
                 self.info_label.config(text=f"Node renamed: {old_name} → {new_name}")
                 self.draw_graph()
                 dialog.destroy()
@@ -1323,14 +2432,10 @@ Solution: Try Reset or Clear All to restart
             entry.bind("<Return>", lambda e: ok())
     
     def get_node_at(self, x, y):
-        for node in self.nodes:
-            dist = math.sqrt((node.x - x)**2 + (node.y - y)**2)
-            if dist <= self.node_radius:
-                return node
-        return None
+        return self.spatial_index().nearest(x, y, self.node_radius)
     
     # --- MODIFIED: draw_arrow now curves ALL directed edges ---
-    def draw_arrow(self, x1, y1, x2, y2, color="#bdc3c7", width=2, is_shortest_path=False):
+    def draw_arrow(self, x1, y1, x2, y2, color="#bdc3c7", width=2, is_shortest_path=False, tags=()):
         # Calculate direction and length
         dx = x2 - x1
         dy = y2 - y1
@@ -1373,7 +2478,7 @@ Solution: Try Reset or Clear All to restart
             line_coords = (start_x, start_y, ctrl_x, ctrl_y, end_x, end_y)
             
             # We know it's directed, so always draw arrow
-            self.canvas.create_line(line_coords, fill=color, width=width, smooth=True,
+            self.canvas.create_line(line_coords, fill=color, width=width, smooth=True, tags=tags,
                                    arrow=tk.LAST, arrowshape=(self.arrow_size, self.arrow_size+2, self.arrow_size-2))
 
             # Weight position: slightly further than control point
@@ -1406,12 +2511,12 @@ Solution: Try Reset or Clear All to restart
 
             if show_arrow:
                 self.canvas.create_line(start_x, start_y, end_x, end_y, 
-                                       fill=color, width=width, arrow=tk.LAST,
+                                       fill=color, width=width, arrow=tk.LAST, tags=tags,
                                        arrowshape=(self.arrow_size, self.arrow_size+2, self.arrow_size-2))
             else:
                 # This will be for undirected, non-shortest-path lines
                 self.canvas.create_line(start_x, start_y, end_x, end_y, 
-                                       fill=color, width=width)
+                                       fill=color, width=width, tags=tags)
             
             # Weight position: midpoint of straight line, offset slightly
             mx = (x1 + x2) / 2 + 15 * unx
@@ -1423,73 +2528,151 @@ Solution: Try Reset or Clear All to restart
     def draw_graph(self):
         self.canvas.delete("all")
         
+        if self.isochrone_budget is not None:
+            self.draw_isochrone()
+        
+        alt_edges = self.alt_edge_set()
+        
         # Draw edges
-        for edge in self.edges:
-            x1, y1 = edge.node1.x, edge.node1.y
-            x2, y2 = edge.node2.x, edge.node2.y
-            
-            color = "#bdc3c7"
-            width = 2
-            
-            # Check if this edge is part of shortest path
-            is_shortest_path = False
-            if edge.node2.previous == edge.node1 and edge.node2.visited:
-                is_shortest_path = True
-                color = "#8e44ad"
-                width = 4
-            elif not edge.directed and edge.node1.previous == edge.node2 and edge.node1.visited:
-                is_shortest_path = True
-                color = "#8e44ad"
-                width = 4
-            
-            # --- REMOVED BIDIRECTIONAL LOGIC ---
-
-            # Draw arrow/curve and get weight position
-            wx, wy = self.draw_arrow(x1, y1, x2, y2, color, width, is_shortest_path)
-            
-            # Draw weight
-            self.canvas.create_oval(wx-15, wy-15, wx+15, wy+15, 
-                                   fill="white", outline=color, width=2)
-            self.canvas.create_text(wx, wy, text=str(int(edge.weight)), 
-                                   font=("Arial", 10, "bold"))
+        for index, edge in enumerate(self.edges):
+            self.draw_edge(index, edge, alt_edges)
         
         # Draw nodes
+        for index, node in enumerate(self.nodes):
+            self.draw_node(index, node)
+    # --- END MODIFICATION ---
+    
+    def draw_isochrone(self):
+        """Shade the region within the isochrone budget underneath the graph.
+        
+        Each edge is covered from every reached end for as far as the budget
+        left at that end allows, so the shading stops partway along the
+        boundary edges.
+        """
+        budget = self.isochrone_budget
+        radius = self.node_radius * 1.8
         for node in self.nodes:
-            color = "#3498db"
-            outline = "#2980b9"
-            
-            if node == self.start_node:
-                color = "#27ae60"
-                outline = "#229954"
-            elif node.visited:
-                color = "#f39c12"
-                outline = "#d68910"
-            
-            if node == self.edge_start:
-                outline = "#8e44ad"
+            if node.visited:
+                self.canvas.create_oval(node.x - radius, node.y - radius, node.x + radius, node.y + radius,
+                                        fill=ISOCHRONE_COLOR, outline="", tags="isochrone")
+        for edge in self.edges:
+            ends = [(edge.node1, edge.node2)]
+            if not edge.directed:
+                ends.append((edge.node2, edge.node1))
+            for a, b in ends:
+                if not a.visited:
+                    continue
+                reach = 1.0 if edge.weight <= 0 else min(1.0, (budget - a.distance) / edge.weight)
+                self.canvas.create_line(a.x, a.y, a.x + (b.x - a.x) * reach, a.y + (b.y - a.y) * reach,
+                                        fill=ISOCHRONE_COLOR, width=self.node_radius,
+                                        capstyle=tk.ROUND, tags="isochrone")
+    
+    def alt_edge_set(self):
+        """Edges of the alternative path being browsed, or None"""
+        # An alternative path being browsed replaces the shortest-path tree highlight
+        if not self.alt_paths:
+            return None
+        path = self.alt_paths[self.alt_index][1]
+        return set(zip(path, path[1:]))
+    
+    def draw_edge(self, index, edge, alt_edges):
+        """Draw one edge and its weight, tagged edge<index> so it can be redrawn alone"""
+        x1, y1 = edge.node1.x, edge.node1.y
+        x2, y2 = edge.node2.x, edge.node2.y
+        tags = (f"edge{index}", "edge")
+        
+        color = "#bdc3c7"
+        width = 2
+        
+        # Check if this edge is part of shortest path
+        is_shortest_path = False
+        if alt_edges is not None:
+            if (edge.node1, edge.node2) in alt_edges or (
+                    not edge.directed and (edge.node2, edge.node1) in alt_edges):
+                is_shortest_path = True
+                color = "#8e44ad"
                 width = 4
+        elif edge.node2.previous == edge.node1 and edge.node2.visited:
+            is_shortest_path = True
+            color = "#8e44ad"
+            width = 4
+        elif not edge.directed and edge.node1.previous == edge.node2 and edge.node1.visited:
+            is_shortest_path = True
+            color = "#8e44ad"
+            width = 4
+        
+        # Tree edges of a nearest-facility run take the colour of their region
+        if is_shortest_path and alt_edges is None and self.regions:
+            child = edge.node2 if edge.node2.previous == edge.node1 else edge.node1
+            color = REGION_COLORS[self.regions[child] % len(REGION_COLORS)][1]
+        
+        # Draw arrow/curve and get weight position
+        wx, wy = self.draw_arrow(x1, y1, x2, y2, color, width, is_shortest_path, tags)
+        
+        # Draw weight
+        self.canvas.create_oval(wx-15, wy-15, wx+15, wy+15, 
+                               fill="white", outline=color, width=2, tags=tags)
+        self.canvas.create_text(wx, wy, text=str(int(edge.weight)), 
+                               font=("Arial", 10, "bold"), tags=tags)
+    
+    def draw_node(self, index, node):
+        """Draw one node with its label and distance, tagged node<index>"""
+        tags = (f"node{index}", "node")
+        color = "#3498db"
+        outline = "#2980b9"
+        
+        if self.regions:
+            if node in self.regions:
+                color, outline = REGION_COLORS[self.regions[node] % len(REGION_COLORS)]
             else:
-                width = 3
-            
-            self.canvas.create_oval(node.x - self.node_radius, 
-                                   node.y - self.node_radius,
-                                   node.x + self.node_radius, 
-                                   node.y + self.node_radius,
-                                   fill=color, outline=outline, width=width)
-            
-            self.canvas.create_text(node.x, node.y, text=node.label, 
-                                   font=("Arial", 14, "bold"), fill="white")
-            
-            # Display distance if calculated
-            if node.distance != float('inf') and node != self.start_node:
-                self.canvas.create_text(node.x, node.y - self.node_radius - 15, 
-                                       text=f"d={node.distance:.1f}", 
-                                       font=("Arial", 9, "bold"), fill="#e74c3c")
-            elif node == self.start_node and node.distance == 0:
-                self.canvas.create_text(node.x, node.y - self.node_radius - 15, 
-                                       text="d=0", 
-                                       font=("Arial", 9, "bold"), fill="#27ae60")
-    # --- END MODIFICATION ---
+                color, outline = "#bdc3c7", "#95a5a6"
+        elif node == self.start_node:
+            color = "#27ae60"
+            outline = "#229954"
+        elif node.visited:
+            color = "#f39c12"
+            outline = "#d68910"
+        
+        if node == self.edge_start:
+            outline = "#8e44ad"
+            width = 4
+        elif node in self.selection:
+            outline = SELECTION_COLOR
+            width = 5
+        elif node in self.facilities:
+            outline = "#2c3e50"
+            width = 5
+        else:
+            width = 3
+        
+        self.canvas.create_oval(node.x - self.node_radius, 
+                               node.y - self.node_radius,
+                               node.x + self.node_radius, 
+                               node.y + self.node_radius,
+                               fill=color, outline=outline, width=width, tags=tags)
+        
+        self.canvas.create_text(node.x, node.y, text=node.label, 
+                               font=("Arial", 14, "bold"), fill="white", tags=tags)
+        
+        # Display distance if calculated
+        if node.distance != float('inf') and node != self.start_node:
+            self.canvas.create_text(node.x, node.y - self.node_radius - 15, 
+                                   text=f"d={node.distance:.1f}", 
+                                   font=("Arial", 9, "bold"), fill="#e74c3c", tags=tags)
+        elif node == self.start_node and node.distance == 0:
+            self.canvas.create_text(node.x, node.y - self.node_radius - 15, 
+                                   text="d=0", 
+                                   font=("Arial", 9, "bold"), fill="#27ae60", tags=tags)
+    
+    def redraw_edge(self, index):
+        """Replace one edge's canvas items, keeping them underneath the nodes"""
+        self.canvas.delete(f"edge{index}")
+        self.draw_edge(index, self.edges[index], self.alt_edge_set())
+        self.canvas.tag_lower(f"edge{index}", "node")
+    
+    def redraw_node(self, index):
+        self.canvas.delete(f"node{index}")
+        self.draw_node(index, self.nodes[index])
     
     def run_dijkstra(self):
         if not self.start_node:
@@ -1501,93 +2684,442 @@ Solution: Try Reset or Clear All to restart
             return
         
         self.reset_algorithm()
-        self.start_node.distance = 0
-        self.algorithm_complete = False
         
-        pq = [(0, id(self.start_node), self.start_node)]
+        stats = RunStats()
+        profiler = self.start_profiling() if self.profile_var.get() else None
+        
+        # The whole run is computed up front into an event log on a worker
+        # thread; the animation is a playback of that log
+        graph = self.solver_graph()
+        source = self.nodes.index(self.start_node)
+        
+        def work(progress, cancel):
+            if profiler:
+                # Traced from the worker, so a job cancelled while it waits
+                # for the job lock never starts tracemalloc
+                import tracemalloc
+                tracemalloc.start()
+                profiler.enable()
+            try:
+                return record_run(graph, source, stats, progress, cancel)
+            finally:
+                if profiler:
+                    profiler.disable()
+                    if cancel.is_set():
+                        self.discard_profiling()
+        
+        def failed(error):
+            if profiler:
+                self.save_profile(profiler)
+            self.show_run_error(error)
+        
+        self.start_job(f"Computing shortest paths from {self.start_node.label}", work,
+                       lambda log: self.start_playback(log, stats, profiler), failed)
+    
+    def show_run_error(self, error):
+        """Error dialog for a failed run, naming the cycle if there is one"""
+        if not isinstance(error, NegativeCycleError):
+            messagebox.showerror("Error", f"Run failed: {error}")
+            return
+        cycle = " → ".join(self.nodes[i].label for i in error.cycle + error.cycle[:1])
+        messagebox.showerror("Negative Cycle",
+                           "The edge weights contain a negative cycle, so shortest paths "
+                           f"are not defined.\n\nCycle: {cycle}")
+    
+    def run_facilities(self):
+        """Label every node with its nearest facility in one multi-source run"""
+        self.reset_algorithm()
+        if not self.facilities:
+            self.info_label.config(text="No facilities marked - Click nodes to mark them")
+            return
         
-        def step():
-            if not pq:
-                self.algorithm_complete = True
-                self.report_btn.config(state=tk.NORMAL)
-                self.show_results()
-                return
-            
-            current_dist, _, current = heapq.heappop(pq)
-            
-            if current.visited:
-                self.root.after(self.speed_var.get(), step)
-                return
-            
-            current.visited = True
-            self.info_label.config(text=f"Processing node {current.label} (distance: {current.distance:.1f})")
+        stats = RunStats()
+        graph = self.solver_graph()
+        position = {node: i for i, node in enumerate(self.nodes)}
+        sources = [position[node] for node in self.facilities]
+        
+        def done(result):
+            dist, prev, owner = result
+            self.regions = {}
+            for i, node in enumerate(self.nodes):
+                node.distance = dist[i]
+                node.visited = owner[i] != -1
+                node.previous = self.nodes[prev[i]] if prev[i] != -1 else None
+                if owner[i] != -1:
+                    self.regions[node] = owner[i]
+            self.run_stats = stats
+            self.update_stats_panel()
+            
+            sizes = [0] * len(self.facilities)
+            for region in self.regions.values():
+                sizes[region] += 1
+            summary = ", ".join(f"{node.label}: {size}" for node, size in zip(self.facilities, sizes))
+            unreachable = len(self.nodes) - len(self.regions)
+            self.info_label.config(text=f"{len(self.facilities)} facilities - nodes per region: {summary}"
+                                        + (f" | {unreachable} unreachable" if unreachable else ""))
             self.draw_graph()
-            
-            # Get neighbors based on graph type
-            neighbors = []
-            for edge in self.edges:
-                if edge.directed:
-                    # Directed: only follow edges from current node
-                    if edge.node1 == current:
-                        neighbors.append((edge.node2, edge.weight))
-                else:
-                    # Undirected: follow edges in both directions
-                    if edge.node1 == current:
-                        neighbors.append((edge.node2, edge.weight))
-                    elif edge.node2 == current:
-                        neighbors.append((edge.node1, edge.weight))
-            
-            for neighbor, weight in neighbors:
-                if not neighbor.visited:
-                    new_dist = current.distance + weight
-                    if new_dist < neighbor.distance:
-                        neighbor.distance = new_dist
-                        neighbor.previous = current
-                        heapq.heappush(pq, (new_dist, id(neighbor), neighbor))
-            
-            self.root.after(self.speed_var.get(), step)
         
-        step()
+        self.start_job(f"Finding the nearest of {len(sources)} facilities",
+                       lambda progress, cancel: nearest_sources(graph, sources, stats, cancel),
+                       done, self.show_run_error)
     
-    def show_results(self):
-        reachable = []
-        unreachable = []
+    def start_playback(self, log, stats, profiler):
+        """Load a recorded run into the timeline and start playing it"""
+        self.run_stats = stats
+        self.timeline = log
+        self.timeline_profiler = profiler
+        self.timeline_finished = False
+        position = {node: i for i, node in enumerate(self.nodes)}
+        self.timeline_incident = [[] for _ in self.nodes]
+        for index, edge in enumerate(self.edges):
+            self.timeline_incident[position[edge.node1]].append(index)
+            self.timeline_incident[position[edge.node2]].append(index)
+        
+        self.timeline_scale.config(to=log.steps)
+        self.timeline_frame.pack(side=tk.TOP, fill=tk.X, before=self.main_container)
+        self.seek_timeline(0, redraw=True)
+        self.timeline_playing = False
+        self.toggle_playback()
+    
+    def solver_graph(self):
+        """Engine graph of the canvas, rebuilt only when nodes or edges changed.
+        
+        Reusing it keeps its CSR and Johnson potentials cached between runs.
+        """
+        key = (tuple(node.label for node in self.nodes),
+               tuple((e.node1.label, e.node2.label, e.weight, e.directed) for e in self.edges))
+        if key != self.engine_graph_key:
+            self.engine_graph = self.build_graph()
+            self.engine_graph_key = key
+        return self.engine_graph
+    
+    def seek_timeline(self, step, redraw=False):
+        """Show the recorded run as it was after ``step`` settles"""
+        log = self.timeline
+        if log is None:
+            return
+        step = max(0, min(step, log.steps))
+        if step == log.step and not redraw:
+            return
         
-        for node in self.nodes:
-            if node == self.start_node:
+        started = time.perf_counter()
+        if self.timeline_profiler:
+            self.timeline_profiler.enable()
+        changed = log.seek(step)
+        if redraw or changed is None or len(changed) > len(self.nodes) * TIMELINE_FULL_REDRAW:
+            for i in range(len(self.nodes)):
+                self.apply_timeline_state(i)
+            self.draw_graph()
+        else:
+            # Only the touched nodes and the edges around them are redrawn
+            edges = set()
+            for i in changed:
+                self.apply_timeline_state(i)
+                edges.update(self.timeline_incident[i])
+            for index in edges:
+                self.redraw_edge(index)
+            for i in changed:
+                self.redraw_node(i)
+        if self.timeline_profiler:
+            self.timeline_profiler.disable()
+        self.run_stats.render_time += time.perf_counter() - started
+        
+        self.timeline_scale.set(log.step)
+        self.timeline_label.config(text=f"Step {log.step} / {log.steps}")
+        if log.step:
+            current = self.nodes[log.settled_at(log.step)]
+            self.info_label.config(text=f"Processing node {current.label} (distance: {current.distance:.1f})")
+        else:
+            self.info_label.config(text=f"Ready to play from {self.start_node.label}")
+        self.update_stats_panel()
+        
+        self.algorithm_complete = log.step == log.steps
+        self.report_btn.config(state=tk.NORMAL if self.algorithm_complete else tk.DISABLED)
+        if self.algorithm_complete and self.timeline_playing:
+            self.pause_playback()
+        if self.algorithm_complete and not self.timeline_finished:
+            self.timeline_finished = True
+            if self.timeline_profiler:
+                self.save_profile(self.timeline_profiler)
+                self.timeline_profiler = None
+            self.show_results()
+    
+    def apply_timeline_state(self, i):
+        """Copy node i's distance, predecessor and settled flag from the timeline cursor"""
+        log = self.timeline
+        node = self.nodes[i]
+        node.distance = log.dist[i]
+        node.visited = log.settled(i)
+        node.previous = self.nodes[log.prev[i]] if log.prev[i] != -1 else None
+    
+    def toggle_playback(self):
+        """Play or pause the recorded run"""
+        if self.timeline is None:
+            return
+        if self.timeline_playing:
+            self.pause_playback()
+            return
+        if self.timeline.step == self.timeline.steps:
+            self.seek_timeline(0)
+        self.timeline_playing = True
+        self.play_btn.config(text="❚❚ Pause")
+        self.timeline_job = self.root.after(self.speed_var.get(), self.timeline_tick)
+    
+    def pause_playback(self):
+        if self.timeline_job is not None:
+            self.root.after_cancel(self.timeline_job)
+        self.timeline_job = None
+        self.timeline_playing = False
+        self.play_btn.config(text="▶ Play")
+    
+    def timeline_tick(self):
+        """Advance playback by the current rate, then schedule the next tick"""
+        self.timeline_job = None
+        self.seek_timeline(self.timeline.step + self.timeline_rate)
+        if self.timeline_playing:
+            self.timeline_job = self.root.after(self.speed_var.get(), self.timeline_tick)
+    
+    def step_timeline(self, delta):
+        """Pause and move one step backward or forward"""
+        if self.timeline is None:
+            return
+        self.pause_playback()
+        self.seek_timeline(self.timeline.step + delta)
+    
+    def cycle_timeline_rate(self):
+        """Switch fast-forward between 1, 10, 100 and 1000 steps per tick"""
+        index = TIMELINE_RATES.index(self.timeline_rate)
+        self.timeline_rate = TIMELINE_RATES[(index + 1) % len(TIMELINE_RATES)]
+        self.rate_btn.config(text=f"⏩ ×{self.timeline_rate}")
+    
+    def close_timeline(self):
+        """Stop playback and drop the recorded run, keeping what is on the canvas"""
+        if self.timeline is None:
+            return
+        self.pause_playback()
+        self.timeline = None
+        self.timeline_incident = []
+        if self.timeline_profiler:
+            self.discard_profiling()  # Closed before the end, so nothing is saved
+        self.timeline_profiler = None
+        self.timeline_frame.pack_forget()
+    
+    def start_job(self, description, work, on_done, on_error=None):
+        """Run work(progress, cancel) off the Tk thread, then call on_done(result) here.
+        
+        Any job already running is cancelled first. Errors go to on_error,
+        or to an error dialog by default.
+        """
+        self.cancel_job()
+        self.job = BackgroundJob(description, work, on_done, on_error)
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.info_label.config(text=f"{description}...")
+        self.job_poll = self.root.after(JOB_POLL_MS, self.poll_job)
+    
+    def poll_job(self):
+        """Drain the running job's events: show progress, deliver its result"""
+        job = self.job
+        self.job_poll = None
+        progress = None
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                progress = event
                 continue
-            if node.distance == float('inf'):
-                unreachable.append(node.label)
+            self.job = None
+            self.cancel_btn.config(state=tk.DISABLED)
+            if event[0] == 'done':
+                job.on_done(event[1])
+            elif job.on_error:
+                job.on_error(event[1])
             else:
-                reachable.append((node.label, node.distance))
-        
-        # Sort by distance
-        reachable.sort(key=lambda x: x[1])
-        
-        result_msg = f"Dijkstra's Algorithm Complete!\n\n"
-        result_msg += f"Source Node: {self.start_node.label}\n"
-        result_msg += f"Graph Type: {'Directed' if self.is_directed.get() else 'Undirected'}\n\n"
+                messagebox.showerror("Error", str(event[1]))
+            return
         
-        if reachable:
-            result_msg += "✓ Reachable Nodes:\n"
-            for label, dist in reachable:
-                result_msg += f"  {self.start_node.label} → {label}: {dist:.1f}\n"
+        if progress:
+            _, done, total = progress
+            self.info_label.config(text=f"{job.description}... {done:,} / {total:,} nodes "
+                                        f"({100 * done / max(total, 1):.0f}%)")
+        self.job_poll = self.root.after(JOB_POLL_MS, self.poll_job)
+    
+    def cancel_job(self):
+        """Abort the running job, if any; its late events are never read.
+        
+        Returns True when a job was cancelled.
+        """
+        if self.job is None:
+            return False
+        self.job.cancel.set()
+        if self.job_poll is not None:
+            self.root.after_cancel(self.job_poll)
+        self.job = None
+        self.job_poll = None
+        self.cancel_btn.config(state=tk.DISABLED)
+        return True
+    
+    def cancel_run(self):
+        if self.cancel_job():
+            self.info_label.config(text="Run cancelled")
+    
+    def split_reachable(self):
+        """Nodes other than the source as (reachable, unreachable) lists.
+        
+        Reachability comes from the engine graph's component index, not from
+        the distances of a finished run.
+        """
+        graph = self.solver_graph()
+        components = graph.components()
+        source = self.nodes.index(self.start_node)
+        reachable = []
+        unreachable = []
+        for i, node in enumerate(self.nodes):
+            if node is self.start_node:
+                continue
+            if components.reachable(source, i):
+                reachable.append(node)
+            else:
+                unreachable.append(node)
+        return reachable, unreachable
+    
+    def show_results(self):
+        """Open the results table for the run that just finished"""
+        reachable, unreachable = self.split_reachable()
+        self.info_label.config(text="Algorithm complete! Click 'Show Report' for detailed analysis.")
+        self.show_results_table(f"Source Node: {self.start_node.label} | "
+                                f"Graph Type: {'Directed' if self.is_directed.get() else 'Undirected'} | "
+                                f"{len(reachable):,} reachable, {len(unreachable):,} unreachable")
+    
+    def show_results_table(self, subtitle):
+        """Sortable, searchable results table that only ever holds one page of rows.
+        
+        The Treeview gets RESULTS_PAGE_ROWS items, refilled from a
+        ResultsModel as the scrollbar moves, so tens of thousands of
+        destinations open instantly. Selecting a row highlights its path.
+        """
+        model = ResultsModel(self.nodes, self.start_node)
+        window = tk.Toplevel(self.root)
+        window.title("Dijkstra Results")
+        window.geometry("760x640")
+        window.transient(self.root)
+        
+        header_frame = tk.Frame(window, bg="#2c3e50", pady=15)
+        header_frame.pack(fill=tk.X)
+        tk.Label(header_frame, text="Dijkstra's Algorithm Complete!",
+                font=("Arial", 16, "bold"), bg="#2c3e50", fg="white").pack()
+        tk.Label(header_frame, text=subtitle,
+                font=("Arial", 11), bg="#2c3e50", fg="white").pack(pady=5)
         
-        if unreachable:
-            result_msg += f"\n✗ Unreachable Nodes: {', '.join(unreachable)}\n"
-            result_msg += "  (No path exists from source to these nodes)"
+        search_frame = tk.Frame(window)
+        search_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        tk.Label(search_frame, text="Find label:", font=("Arial", 10)).pack(side=tk.LEFT)
+        query_var = tk.StringVar()
+        tk.Entry(search_frame, textvariable=query_var, width=20).pack(side=tk.LEFT, padx=5)
+        count_label = tk.Label(search_frame, text="", font=("Arial", 10))
+        count_label.pack(side=tk.RIGHT)
+        
+        table_frame = tk.Frame(window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        columns = (("destination", "Destination", 110), ("distance", "Distance", 90),
+                   ("hops", "Hops", 60), ("path", "Path", 460))
+        tree = ttk.Treeview(table_frame, columns=[c[0] for c in columns], show="headings",
+                            height=RESULTS_PAGE_ROWS, selectmode="browse")
+        scrollbar = tk.Scrollbar(table_frame, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        top = [0]
+        
+        def refresh():
+            total = len(model)
+            top[0] = max(0, min(top[0], total - RESULTS_PAGE_ROWS))
+            tree.delete(*tree.get_children())
+            for k in range(top[0], min(total, top[0] + RESULTS_PAGE_ROWS)):
+                tree.insert("", tk.END, iid=str(k), values=model.cells(k))
+            if total:
+                scrollbar.set(top[0] / total, min(1.0, (top[0] + RESULTS_PAGE_ROWS) / total))
+            else:
+                scrollbar.set(0.0, 1.0)
+            count_label.config(text=f"{total:,} of {len(model.rows):,} destinations")
         
-        self.info_label.config(text="Algorithm complete! Click 'Show Report' for detailed analysis.")
-        messagebox.showinfo("Dijkstra Results", result_msg)
+        def scroll(*args):
+            if args[0] == "moveto":
+                top[0] = int(float(args[1]) * len(model))
+            else:
+                top[0] += int(args[1]) * (RESULTS_PAGE_ROWS if args[2] == "pages" else 1)
+            refresh()
+        
+        def step(delta):
+            # Arrow keys move the selection and page the rows in at the edges
+            selected = tree.selection()
+            k = int(selected[0]) + delta if selected else top[0]
+            if not 0 <= k < len(model):
+                return "break"
+            if not top[0] <= k < top[0] + RESULTS_PAGE_ROWS:
+                top[0] = k if delta < 0 else k - RESULTS_PAGE_ROWS + 1
+                refresh()
+            tree.selection_set(str(k))
+            tree.see(str(k))
+            return "break"
+        
+        def sort(column):
+            model.sort(column, descending=model.sort_column == column and not model.descending)
+            top[0] = 0
+            refresh()
+        
+        def select(event):
+            selected = tree.selection()
+            if selected:
+                path = model.path(int(selected[0]))
+                if path:
+                    self.alt_paths = [(path[-1].distance, path)]
+                    self.show_alt_path(0)
+        
+        for column, text, width in columns:
+            tree.heading(column, text=text,
+                         command=(lambda c=column: sort(c)) if column != "path" else "")
+            tree.column(column, width=width, anchor=tk.W, stretch=column == "path")
+        scrollbar.config(command=scroll)
+        tree.bind("<<TreeviewSelect>>", select)
+        tree.bind("<Down>", lambda e: step(1))
+        tree.bind("<Up>", lambda e: step(-1))
+        tree.bind("<Next>", lambda e: scroll("scroll", 1, "pages"))
+        tree.bind("<Prior>", lambda e: scroll("scroll", -1, "pages"))
+        tree.bind("<MouseWheel>", lambda e: scroll("scroll", -1 if e.delta > 0 else 1, "units"))
+        tree.bind("<Button-4>", lambda e: scroll("scroll", -1, "units"))
+        tree.bind("<Button-5>", lambda e: scroll("scroll", 1, "units"))
+        
+        def search(*args):
+            model.filter(query_var.get())
+            top[0] = 0
+            refresh()
+        query_var.trace_add("write", search)
+        refresh()
+        
+        tk.Button(window, text="Close", command=window.destroy,
+                 bg="#e74c3c", fg="white", font=("Arial", 11), padx=20, pady=5).pack(pady=(0, 10))
     
     def show_report(self):
         if not self.algorithm_complete:
             messagebox.showwarning("Warning", "Please run Dijkstra's algorithm first")
             return
         
-        # Create report window
+        self.show_text_window("Dijkstra Algorithm - Detailed Report", "Shortest Path Report",
+                              f"Source Node: {self.start_node.label} | "
+                              f"Graph Type: {'Directed' if self.is_directed.get() else 'Undirected'}",
+                              self.generate_report())
+    
+    def show_text_window(self, title, heading, subtitle, text):
+        """Read-only report window with a header bar, a Find box and a Close button.
+        
+        Only the lines that fit in the window are ever inserted into the Text
+        widget; scrolling swaps in another slice, so very long reports open
+        and scroll without holding the whole text in Tk.
+        """
+        lines = text.split("\n")
         report_window = tk.Toplevel(self.root)
-        report_window.title("Dijkstra Algorithm - Detailed Report")
+        report_window.title(title)
         report_window.geometry("700x600")
         report_window.transient(self.root)
         
@@ -1595,29 +3127,95 @@ Solution: Try Reset or Clear All to restart
         header_frame = tk.Frame(report_window, bg="#2c3e50", pady=15)
         header_frame.pack(fill=tk.X)
         
-        tk.Label(header_frame, text="Shortest Path Report", 
+        tk.Label(header_frame, text=heading, 
                 font=("Arial", 16, "bold"), bg="#2c3e50", fg="white").pack()
-        tk.Label(header_frame, text=f"Source Node: {self.start_node.label} | "
-                                   f"Graph Type: {'Directed' if self.is_directed.get() else 'Undirected'}",
+        tk.Label(header_frame, text=subtitle,
                 font=("Arial", 11), bg="#2c3e50", fg="white").pack(pady=5)
         
+        # Close button and Find box
+        bottom_frame = tk.Frame(report_window)
+        bottom_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=10)
+        tk.Button(bottom_frame, text="Close", command=report_window.destroy,
+                 bg="#e74c3c", fg="white", font=("Arial", 11), padx=20, pady=5).pack(side=tk.RIGHT)
+        tk.Label(bottom_frame, text="Find:", font=("Arial", 10)).pack(side=tk.LEFT)
+        find_var = tk.StringVar()
+        find_entry = tk.Entry(bottom_frame, textvariable=find_var, width=20)
+        find_entry.pack(side=tk.LEFT, padx=5)
+        tk.Button(bottom_frame, text="Next", command=lambda: find()).pack(side=tk.LEFT)
+        position_label = tk.Label(bottom_frame, text="", font=("Arial", 9))
+        position_label.pack(side=tk.LEFT, padx=10)
+        
         # Report content
         report_frame = tk.Frame(report_window)
-        report_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Scrolled text widget
-        report_text = scrolledtext.ScrolledText(report_frame, wrap=tk.WORD, 
-                                               font=("Courier", 10), padx=10, pady=10)
+        report_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+        
+        report_font = tkfont.Font(family="Courier", size=10)
+        report_text = tk.Text(report_frame, wrap=tk.NONE, font=report_font, padx=10, pady=10)
+        y_scroll = tk.Scrollbar(report_frame, orient=tk.VERTICAL)
+        x_scroll = tk.Scrollbar(report_frame, orient=tk.HORIZONTAL, command=report_text.xview)
+        report_text.config(xscrollcommand=x_scroll.set)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
         report_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Generate report content
-        report = self.generate_report()
-        report_text.insert(tk.END, report)
-        report_text.config(state=tk.DISABLED)
-        
-        # Close button
-        tk.Button(report_window, text="Close", command=report_window.destroy,
-                 bg="#e74c3c", fg="white", font=("Arial", 11), padx=20, pady=5).pack(pady=10)
+        view = {'top': 0, 'page': 1}
+        
+        def render():
+            page = view['page']
+            view['top'] = max(0, min(view['top'], len(lines) - page))
+            report_text.config(state=tk.NORMAL)
+            report_text.delete("1.0", tk.END)
+            report_text.insert(tk.END, "\n".join(lines[view['top']:view['top'] + page]))
+            report_text.config(state=tk.DISABLED)
+            y_scroll.set(view['top'] / len(lines), min(1.0, (view['top'] + page) / len(lines)))
+            position_label.config(text=f"Lines {view['top'] + 1:,}-{min(len(lines), view['top'] + page):,} "
+                                       f"of {len(lines):,}")
+        
+        def scroll(*args):
+            if args[0] == "moveto":
+                view['top'] = int(float(args[1]) * len(lines))
+            else:
+                view['top'] += int(args[1]) * (view['page'] if args[2] == "pages" else 3)
+            render()
+        
+        def resize(event):
+            page = max(1, (event.height - 20) // report_font.metrics("linespace"))
+            if page != view['page']:
+                view['page'] = page
+                render()
+        
+        def find(*args):
+            # Next line containing the text, wrapping around to the top
+            needle = find_var.get().strip().lower()
+            if not needle:
+                return
+            for offset in range(1, len(lines) + 1):
+                i = (view['top'] + offset) % len(lines)
+                if needle in lines[i].lower():
+                    view['top'] = i
+                    render()
+                    report_text.tag_add("found", "1.0", "1.end")
+                    report_text.tag_config("found", background="#f9e79f")
+                    return
+            position_label.config(text=f"'{find_var.get().strip()}' not found")
+        
+        y_scroll.config(command=scroll)
+        report_text.bind("<Configure>", resize)
+        report_text.bind("<MouseWheel>", lambda e: scroll("scroll", -1 if e.delta > 0 else 1, "units"))
+        report_text.bind("<Button-4>", lambda e: scroll("scroll", -1, "units"))
+        report_text.bind("<Button-5>", lambda e: scroll("scroll", 1, "units"))
+        report_text.bind("<Next>", lambda e: scroll("scroll", 1, "pages"))
+        report_text.bind("<Prior>", lambda e: scroll("scroll", -1, "pages"))
+        find_entry.bind("<Return>", find)
+        render()
+    
+    def format_path_table(self, rows, width=70):
+        """Destination / Distance / Path table for (label, distance, path labels) rows"""
+        table = f"{'Destination':<15} {'Distance':<15} {'Path':<40}\n"
+        table += "-" * width + "\n"
+        for label, distance, path in rows:
+            path_str = " → ".join(path)
+            table += f"{label:<15} {distance:<15.1f} {path_str:<40}\n"
+        return table
     
     def generate_report(self):
         report = "=" * 70 + "\n"
@@ -1631,16 +3229,7 @@ Solution: Try Reset or Clear All to restart
         report += "\n" + "-" * 70 + "\n\n"
         
         # Reachable nodes
-        reachable = []
-        unreachable = []
-        
-        for node in self.nodes:
-            if node == self.start_node:
-                continue
-            if node.distance == float('inf'):
-                unreachable.append(node)
-            else:
-                reachable.append(node)
+        reachable, unreachable = self.split_reachable()
         
         reachable.sort(key=lambda x: x.distance)
         
@@ -1648,9 +3237,7 @@ Solution: Try Reset or Clear All to restart
         report += "-" * 70 + "\n\n"
         
         if reachable:
-            report += f"{'Destination':<15} {'Distance':<15} {'Path':<40}\n"
-            report += "-" * 70 + "\n"
-            
+            rows = []
             for node in reachable:
                 # Reconstruct path
                 path = []
@@ -1659,9 +3246,8 @@ Solution: Try Reset or Clear All to restart
                     path.append(current.label)
                     current = current.previous
                 path.reverse()
-                path_str = " → ".join(path)
-                
-                report += f"{node.label:<15} {node.distance:<15.1f} {path_str:<40}\n"
+                rows.append((node.label, node.distance, path))
+            report += self.format_path_table(rows)
         else:
             report += "No reachable nodes found.\n"
         
@@ -1687,21 +3273,243 @@ Solution: Try Reset or Clear All to restart
         
         return report
     
+    def show_all_pairs(self):
+        """Shortest paths between every pair of nodes, in a report window"""
+        if len(self.nodes) < 2:
+            messagebox.showwarning("Warning", "Please add at least two nodes first")
+            return
+        
+        graph = self.build_graph()
+        
+        def done(result):
+            method = "Floyd-Warshall" if result.method == 'floyd-warshall' else "Dijkstra from every node"
+            self.info_label.config(text=f"All pairs computed in {result.elapsed:.2f}s ({method})")
+            self.show_text_window("All Pairs Shortest Paths", "All Pairs Report",
+                                  f"Method: {method} | "
+                                  f"Graph Type: {'Directed' if graph.directed else 'Undirected'}",
+                                  self.generate_all_pairs_report(graph, result))
+        
+        self.start_job(f"Computing all-pairs shortest paths for {graph.n} nodes",
+                       lambda progress, cancel: all_pairs(graph, cancel=cancel), done)
+    
+    def generate_all_pairs_report(self, graph, result):
+        """Report in the generate_report layout with one distance table per source"""
+        report = "=" * 70 + "\n"
+        report += "ALL PAIRS SHORTEST PATHS - ANALYSIS REPORT\n"
+        report += "=" * 70 + "\n\n"
+        
+        report += f"Total Nodes: {graph.n}\n"
+        report += f"Total Edges: {graph.m}\n"
+        report += f"Graph Type: {'Directed' if graph.directed else 'Undirected'}\n"
+        report += f"Method: {'Floyd-Warshall' if result.method == 'floyd-warshall' else 'Dijkstra from every node'}\n"
+        report += f"Compute Time: {result.elapsed:.4f}s\n"
+        
+        sources = range(min(graph.n, ALL_PAIRS_REPORT_SOURCES))
+        for u in sources:
+            report += "\n" + "-" * 70 + "\n\n"
+            report += f"SHORTEST DISTANCES FROM {graph.labels[u]}\n"
+            report += "-" * 70 + "\n\n"
+            
+            reachable = [v for v in range(graph.n) if v != u and result.next_hop[u][v] != -1]
+            unreachable = [graph.labels[v] for v in range(graph.n) if result.next_hop[u][v] == -1]
+            reachable.sort(key=lambda v: result.dist[u][v])
+            
+            if reachable:
+                rows = [(graph.labels[v], result.distance(u, v),
+                         [graph.labels[w] for w in result.path(u, v)]) for v in reachable]
+                report += self.format_path_table(rows)
+            else:
+                report += "No reachable nodes found.\n"
+            if unreachable:
+                report += f"\nUnreachable: {', '.join(unreachable)}\n"
+        
+        if graph.n > len(sources):
+            report += "\n" + "-" * 70 + "\n\n"
+            report += f"Showing the first {len(sources)} of {graph.n} sources.\n"
+            report += "Use parallel.py to write the full distance matrix as CSV.\n"
+        
+        report += "\n" + "=" * 70 + "\n"
+        report += "END OF REPORT\n"
+        report += "=" * 70 + "\n"
+        
+        return report
+    
+    def show_k_paths_dialog(self):
+        """Ask for a target and K, then browse the K shortest loopless paths from the source"""
+        if not self.start_node:
+            messagebox.showwarning("Warning", "Please set a source node first")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("K Shortest Paths")
+        dialog.geometry("300x170")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        tk.Label(dialog, text=f"Paths from {self.start_node.label} to:", font=("Arial", 11)).pack(pady=(10, 0))
+        target_var = tk.StringVar()
+        entry = tk.Entry(dialog, textvariable=target_var, font=("Arial", 12), width=15)
+        entry.pack(pady=5)
+        entry.focus()
+        
+        k_frame = tk.Frame(dialog)
+        k_frame.pack()
+        tk.Label(k_frame, text="Number of paths (K):", font=("Arial", 10)).pack(side=tk.LEFT)
+        k_var = tk.StringVar(value="5")
+        tk.Entry(k_frame, textvariable=k_var, width=5).pack(side=tk.LEFT, padx=5)
+        
+        def ok():
+            target = self.label_index.get(target_var.get().strip().upper())
+            if target is None:
+                messagebox.showerror("Error", f"Node '{target_var.get().strip()}' does not exist", parent=dialog)
+                return
+            if target is self.start_node:
+                messagebox.showerror("Error", "Please choose a target other than the source", parent=dialog)
+                return
+            try:
+                k = int(k_var.get())
+            except ValueError:
+                k = 0
+            if k < 1:
+                messagebox.showerror("Error", "K must be a positive whole number", parent=dialog)
+                return
+            
+            dialog.destroy()
+            self.run_k_paths(target, k)
+        
+        btn_frame = tk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        tk.Button(btn_frame, text="Find", command=ok, width=10).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Cancel", command=dialog.destroy, width=10).pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", lambda e: ok())
+    
+    def run_k_paths(self, target, k):
+        """Yen's K shortest paths to ``target`` on a worker; browse them when done"""
+        graph = self.solver_graph()
+        position = {node: i for i, node in enumerate(self.nodes)}
+        source = self.start_node
+        
+        def done(paths):
+            if not paths:
+                messagebox.showinfo("K Shortest Paths", f"No path exists from {source.label} to {target.label}")
+                return
+            self.alt_paths = [(cost, [self.nodes[i] for i in path]) for cost, path in paths]
+            self.alt_frame.pack(side=tk.RIGHT, padx=10)
+            self.show_alt_path(0)
+        
+        self.start_job(f"Finding {k} shortest paths from {source.label} to {target.label}",
+                       lambda progress, cancel: k_shortest_paths(graph, position[source], position[target],
+                                                                 k, cancel),
+                       done, self.show_run_error)
+    
+    def show_isochrone_dialog(self):
+        """Ask for a budget, then shade everything reachable from the source within it"""
+        if not self.start_node:
+            messagebox.showwarning("Warning", "Please set a source node first")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Isochrone")
+        dialog.geometry("300x130")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        tk.Label(dialog, text=f"Reachable from {self.start_node.label} within:", font=("Arial", 11)).pack(pady=(10, 0))
+        budget_var = tk.StringVar(value=str(self.isochrone_budget or 10))
+        entry = tk.Entry(dialog, textvariable=budget_var, font=("Arial", 12), width=15)
+        entry.pack(pady=5)
+        entry.focus()
+        entry.select_range(0, tk.END)
+        
+        def ok():
+            try:
+                budget = float(budget_var.get())
+            except ValueError:
+                budget = -1
+            if budget < 0:
+                messagebox.showerror("Error", "The budget must be a non-negative number", parent=dialog)
+                return
+            dialog.destroy()
+            self.run_isochrone(budget)
+        
+        btn_frame = tk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        tk.Button(btn_frame, text="Shade", command=ok, width=10).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Cancel", command=dialog.destroy, width=10).pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", lambda e: ok())
+    
+    def run_isochrone(self, budget):
+        """Radius-bounded run from the source; shades the region it reaches"""
+        self.reset_algorithm()
+        stats = RunStats()
+        graph = self.solver_graph()
+        source = self.nodes.index(self.start_node)
+        
+        def done(result):
+            dist, prev, boundary = result
+            for i, d in dist.items():
+                node = self.nodes[i]
+                node.distance = d
+                node.visited = True
+                node.previous = self.nodes[prev[i]] if prev[i] != -1 else None
+            self.isochrone_budget = budget
+            self.run_stats = stats
+            self.update_stats_panel()
+            self.info_label.config(text=f"Within {budget:g} of {self.start_node.label}: "
+                                        f"{len(dist)} of {len(self.nodes)} nodes, "
+                                        f"{len(boundary)} boundary edges")
+            self.draw_graph()
+        
+        self.start_job(f"Finding everything within {budget:g} of {self.start_node.label}",
+                       lambda progress, cancel: isochrone(graph, source, budget, stats, cancel),
+                       done, self.show_run_error)
+    
+    def show_alt_path(self, index):
+        """Highlight alternative path ``index`` (wrapping around)"""
+        if not self.alt_paths:
+            return
+        self.alt_index = index % len(self.alt_paths)
+        cost, path = self.alt_paths[self.alt_index]
+        self.info_label.config(text=f"Path {self.alt_index + 1} of {len(self.alt_paths)} "
+                                    f"(cost {cost:.1f}): {' → '.join(n.label for n in path)}")
+        self.draw_graph()
+    
+    def clear_alt_paths(self):
+        """Stop highlighting alternative paths"""
+        if self.alt_paths:
+            self.alt_paths = []
+            self.alt_index = 0
+            self.alt_frame.pack_forget()
+    
     def reset_algorithm(self):
+        self.stop_live_updates()
+        self.cancel_job()
+        self.close_timeline()
         for node in self.nodes:
             node.distance = float('inf')
             node.visited = False
             node.previous = None
         self.algorithm_complete = False
+        self.run_stats = None
+        self.regions = {}
+        self.isochrone_budget = None
+        self.clear_alt_paths()
+        self.update_stats_panel()
         self.report_btn.config(state=tk.DISABLED)
         self.info_label.config(text="Algorithm reset - Ready to run again")
         self.draw_graph()
     
     def clear_all(self):
+        self.stop_layout()
         self.save_state()
         self.nodes = []
         self.edges = []
+        self.label_index = {}
+        self.spatial = None
         self.start_node = None
+        self.facilities = []
+        self.regions = {}
+        self.selection = set()
         self.edge_start = None
         self.algorithm_complete = False
         self.report_btn.config(state=tk.DISABLED)
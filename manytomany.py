@@ -0,0 +1,296 @@
+"""Many-to-many distance tables by the bucket algorithm over a contraction hierarchy.
+
+Nodes are contracted one at a time, least important first. Removing a node
+adds a shortcut between each pair of its neighbours unless a short local
+witness search finds another path that is no longer. Afterwards every
+shortest path climbs to its most important node and back down, so a search
+only needs the edges leading to more important nodes and settles a few
+hundred nodes instead of the whole graph. A sources x targets table then
+takes one such backward search per target, whose settled nodes drop
+(target, distance) entries into per-node buckets, and one forward search
+per source that scans the buckets of the nodes it settles. Graphs without
+a small hierarchy (scale-free ones keep a large dense core that every search
+sweeps) get one plain Dijkstra per source instead:
+
+    from manytomany import ContractionHierarchy
+    table = ContractionHierarchy(graph).table(sources, targets)  # NumPy array
+
+    python manytomany.py roads.json --sources A,B,C --targets all -o table.csv
+"""
+import argparse
+import heapq
+import time
+from array import array
+
+import numpy as np
+
+from engine import INF, load_graph, shortest_paths
+from parallel import write_matrix
+
+# Nodes a witness search may settle before it gives up and keeps the shortcut
+WITNESS_SETTLE_LIMIT = 40
+# Contraction stops at the first node with more neighbours (in plus out)
+# than this; the dense rest stays an uncontracted core
+CORE_DEGREE = 64
+# Forward searches run before a table to price the bucket algorithm
+TABLE_PROBES = 8
+
+
+def _witness_search(outgoing, source, skip, targets, limit):
+    """Distances from ``source`` that avoid ``skip``, until every target is
+    settled, the distance passes ``limit`` or the settle limit is reached"""
+    dist = {source: 0.0}
+    pq = [(0.0, source)]
+    settled = 0
+    remaining = len(targets)
+    while pq and settled < WITNESS_SETTLE_LIMIT:
+        d, u = heapq.heappop(pq)
+        if d > limit:
+            break
+        if d > dist[u]:
+            continue
+        settled += 1
+        if u in targets:
+            remaining -= 1
+            if not remaining:
+                break
+        out = outgoing[u]
+        if len(out) > CORE_DEGREE:
+            continue  # Too costly to scan; a missed witness only adds a shortcut
+        for v, w in out.items():
+            nd = d + w
+            if v != skip and nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(pq, (nd, v))
+    return dist
+
+
+def _shortcuts(outgoing, incoming, v):
+    """(u, x, weight) for every path u -> v -> x that contracting v would lose"""
+    result = []
+    out = outgoing[v]
+    if not out:
+        return result
+    longest = max(out.values())
+    for u, wu in incoming[v].items():
+        dist = _witness_search(outgoing, u, v, out, wu + longest)
+        for x, wx in out.items():
+            if x != u and dist.get(x, INF) > wu + wx:
+                result.append((u, x, wu + wx))
+    return result
+
+
+def _priority(outgoing, incoming, contracted_neighbours, level, v):
+    """Edge difference of contracting v, plus its contracted neighbours and
+    its depth in the hierarchy so that contraction spreads evenly"""
+    added = _shortcuts(outgoing, incoming, v)
+    return len(added) - len(outgoing[v]) - len(incoming[v]) + contracted_neighbours[v] + level[v], added
+
+
+def _flatten(adjacency, n):
+    """Per-node {neighbour: weight} dicts -> (offsets, targets, weights) arrays"""
+    offsets, targets, weights = array('q', [0]), array('q'), array('d')
+    for v in range(n):
+        targets.extend(adjacency[v])
+        weights.extend(adjacency[v].values())
+        offsets.append(len(targets))
+    return offsets, targets, weights
+
+
+def _upward_search(csr, stall_csr, root):
+    """({node: distance} settled from ``root`` over the upward edges in ``csr``,
+    number of edges looked at).
+
+    Stall-on-demand: a node that a more important node already reaches more
+    cheaply (an edge of ``stall_csr`` into it) cannot be on a shortest path
+    through the top of the hierarchy, so it is neither kept nor expanded.
+    """
+    offsets, targets, weights = csr
+    stall_offsets, stall_sources, stall_weights = stall_csr
+    dist = {root: 0.0}
+    settled = {}
+    scanned = 0
+    pq = [(0.0, root)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if u in settled or d > dist[u]:
+            continue
+        stalled = False
+        for i in range(stall_offsets[u], stall_offsets[u + 1]):
+            if dist.get(stall_sources[i], INF) + stall_weights[i] < d:
+                stalled = True
+                break
+        scanned += stall_offsets[u + 1] - stall_offsets[u]
+        if stalled:
+            continue
+        settled[u] = d
+        scanned += offsets[u + 1] - offsets[u]
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            nd = d + weights[i]
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(pq, (nd, v))
+    return settled, scanned
+
+
+class ContractionHierarchy:
+    """Shortcut hierarchy over one graph; rebuilds itself when the graph changes"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.build()
+
+    def build(self):
+        """Contract every node (negative weights go through the potentials)"""
+        started = time.perf_counter()
+        graph = self.graph
+        n = graph.n
+        self.potentials = graph.potentials()
+        offsets, targets, weights = graph.reduced_csr()
+        outgoing = [{} for _ in range(n)]
+        incoming = [{} for _ in range(n)]
+        for u in range(n):
+            out = outgoing[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                v, w = targets[i], weights[i]
+                if v != u and w < out.get(v, INF):
+                    out[v] = w
+                    incoming[v][u] = w
+
+        # Least important first; a node's priority is recomputed when it
+        # reaches the top of the queue and whenever a neighbour is contracted
+        contracted_neighbours = [0] * n
+        level = [0] * n
+        priority = [_priority(outgoing, incoming, contracted_neighbours, level, v)[0]
+                    if len(outgoing[v]) + len(incoming[v]) <= CORE_DEGREE else INF for v in range(n)]
+        queue = [(p, v) for v, p in enumerate(priority)]
+        heapq.heapify(queue)
+        done = bytearray(n)
+        upward, downward = [None] * n, [None] * n
+        self.shortcuts = 0
+        while queue:
+            p, v = heapq.heappop(queue)
+            if done[v] or p != priority[v]:
+                continue  # Contracted already, or a stale entry
+            if len(outgoing[v]) + len(incoming[v]) > CORE_DEGREE:
+                break
+            p, added = _priority(outgoing, incoming, contracted_neighbours, level, v)
+            if queue and p > queue[0][0]:
+                priority[v] = p
+                heapq.heappush(queue, (p, v))
+                continue
+            # Every neighbour left is more important than v from now on
+            done[v] = 1
+            upward[v], downward[v] = outgoing[v], incoming[v]
+            neighbours = set(outgoing[v]) | set(incoming[v])
+            for x in outgoing[v]:
+                del incoming[x][v]
+            for u in incoming[v]:
+                del outgoing[u][v]
+            for u, x, w in added:
+                if w < outgoing[u].get(x, INF):
+                    self.shortcuts += x not in outgoing[u]
+                    outgoing[u][x] = w
+                    incoming[x][u] = w
+            for u in neighbours:
+                contracted_neighbours[u] += 1
+                deeper = max(level[u], level[v] + 1)
+                priority[u] += 1 + deeper - level[u]
+                level[u] = deeper
+                heapq.heappush(queue, (priority[u], u))
+
+        # Core nodes keep every edge between them, in both searches
+        self.core = 0
+        for v in range(n):
+            if not done[v]:
+                upward[v], downward[v] = outgoing[v], incoming[v]
+                self.core += 1
+        self.forward = _flatten(upward, n)    # u -> more important v
+        self.backward = _flatten(downward, n)  # v <- more important u, reversed
+        self.arcs = len(targets)
+        self.version = graph.version
+        self.build_time = time.perf_counter() - started
+
+    def table(self, sources, targets):
+        """len(sources) x len(targets) array of shortest distances (inf when unreachable)"""
+        if self.graph.version != self.version:
+            self.build()
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+
+        # Price a hierarchy search from a few sources against a full Dijkstra
+        # (both touch about one node or edge per unit of cost)
+        probes = [_upward_search(self.forward, self.backward, s)
+                  for s in sources[:TABLE_PROBES].tolist()]
+        cost = sum(len(space) + scanned for space, scanned in probes) / max(len(probes), 1)
+        self.used_buckets = (len(sources) + len(targets)) * cost <= len(sources) * (self.graph.n + self.arcs)
+        if not self.used_buckets:
+            return np.array([np.asarray(shortest_paths(self.graph, s)[0])[targets]
+                             for s in sources.tolist()]).reshape(len(sources), len(targets))
+
+        # Backward search from every target: (node, target column, distance) entries
+        nodes, columns, dists = array('q'), array('q'), array('d')
+        for column, t in enumerate(targets.tolist()):
+            space, _ = _upward_search(self.backward, self.forward, t)
+            nodes.extend(space)
+            columns.extend([column] * len(space))
+            dists.extend(space.values())
+        nodes, columns, dists = (np.frombuffer(a, dtype=t) for a, t in
+                                 zip((nodes, columns, dists), (np.int64, np.int64, np.float64)))
+        order = np.argsort(nodes, kind='stable')
+        nodes, columns, dists = nodes[order], columns[order], dists[order]
+        bucket_nodes, bucket_starts = np.unique(nodes, return_index=True)
+        bucket_ends = np.append(bucket_starts[1:], len(nodes))
+        bucket = {int(v): (columns[a:b], dists[a:b])
+                  for v, a, b in zip(bucket_nodes, bucket_starts, bucket_ends)}
+
+        # One forward search per source, relaxing whole buckets at once
+        result = np.full((len(sources), len(targets)), INF)
+        for row, s in enumerate(sources.tolist()):
+            best = result[row]
+            space = probes[row][0] if row < len(probes) else _upward_search(self.forward, self.backward, s)[0]
+            for u, d in space.items():
+                found = bucket.get(u)
+                if found is not None:
+                    cols, dv = found
+                    best[cols] = np.minimum(best[cols], dv + d)
+        if self.potentials is not None:
+            h = np.asarray(self.potentials)
+            result += h[targets][None, :] - h[sources][:, None]
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Many-to-many distance table for a saved graph")
+    parser.add_argument("graph", help="graph file written by File > Export Graph (or a .dgr file)")
+    parser.add_argument("--sources", default="all",
+                        help="comma separated node labels, or 'all'")
+    parser.add_argument("--targets", default=None,
+                        help="comma separated node labels, or 'all' (default: same as sources)")
+    parser.add_argument("-o", "--output", default="distance_table.csv",
+                        help="where to write the table (.csv, or .npy for a NumPy array)")
+    args = parser.parse_args(argv)
+
+    try:
+        graph = load_graph(args.graph)
+        source_labels = graph.labels if args.sources == "all" else args.sources.split(",")
+        target_labels = source_labels if args.targets is None else (
+            graph.labels if args.targets == "all" else args.targets.split(","))
+        sources = [graph.node_id(label) for label in source_labels]
+        targets = [graph.node_id(label) for label in target_labels]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        return
+    hierarchy = ContractionHierarchy(graph)
+    print(f"Contracted {graph.n} nodes with {hierarchy.shortcuts} shortcuts in {hierarchy.build_time:.2f}s")
+    started = time.perf_counter()
+    matrix = hierarchy.table(sources, targets)
+    elapsed = time.perf_counter() - started
+    write_matrix(args.output, source_labels, target_labels, matrix)
+    method = "buckets" if hierarchy.used_buckets else "one Dijkstra per source"
+    print(f"Wrote {len(sources)} x {len(targets)} distances to {args.output} ({elapsed:.3f}s, {method})")
+
+
+if __name__ == "__main__":
+    main()
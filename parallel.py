@@ -0,0 +1,190 @@
+"""Multi-source shortest paths on a process pool.
+
+The graph's CSR arrays are copied once into named shared-memory blocks.
+Worker processes attach to them when they start, so a task only carries a
+few source ids, and each worker writes its rows straight into a shared,
+preallocated distance matrix:
+
+    from parallel import distance_matrix
+    matrix = distance_matrix(graph, sources=[0, 5, 9])      # 3 x n
+    matrix = distance_matrix(graph, depots, targets=depots)  # depot x depot
+
+    python parallel.py graph.json --sources A,B,C -o matrix.csv
+"""
+import argparse
+import csv
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+from engine import INF, _numpy, _ReducedView, dijkstra, load_graph
+
+# Sources handed to a worker per task; large enough to amortise the round trip
+CHUNK_SIZE = 8
+
+
+class SharedCSR:
+    """A graph's CSR arrays copied into shared memory, readable from any process.
+
+    Negative weights are shared already reweighted (Graph.reduced_csr), so the
+    workers run plain Dijkstra and shift the distances back by the potentials.
+    """
+
+    def __init__(self, graph):
+        self.n = graph.n
+        self.blocks = []
+        self.spec = []
+        for values in graph.reduced_csr():
+            block = shared_memory.SharedMemory(create=True, size=max(len(values) * values.itemsize, 1))
+            block.buf[:len(values) * values.itemsize] = values.tobytes()
+            self.blocks.append(block)
+            self.spec.append((block.name, memoryview(values).format, len(values)))
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AttachedCSR:
+    """Graph-like view over shared CSR blocks; dijkstra reads it without copying"""
+
+    def __init__(self, n, spec):
+        self.n = n
+        self.blocks = [_attach(name) for name, _, _ in spec]
+        self.arrays = tuple(block.buf[:length * array(typecode).itemsize].cast(typecode)
+                            for block, (_, typecode, length) in zip(self.blocks, spec))
+
+    def csr(self):
+        return self.arrays
+
+
+def _attach(name):
+    # Pool workers share the parent's resource tracker, and the parent unlinks
+    # every block once the pool has shut down
+    return shared_memory.SharedMemory(name=name)
+
+
+_worker = {}
+
+
+def _init_worker(n, spec, potentials, matrix_name, rows, cols, targets):
+    _worker['graph'] = AttachedCSR(n, spec)
+    _worker['potentials'] = potentials
+    _worker['matrix_block'] = _attach(matrix_name)
+    _worker['matrix'] = _worker['matrix_block'].buf[:rows * cols * 8].cast('d')
+    _worker['cols'] = cols
+    _worker['targets'] = targets
+
+
+def _solve_rows(tasks):
+    """Run one search per (row, source) pair and write the rows into the matrix"""
+    graph, matrix, cols, targets = (_worker['graph'], _worker['matrix'],
+                                    _worker['cols'], _worker['targets'])
+    h = _worker['potentials']
+    for row, source in tasks:
+        dist, _ = dijkstra(graph, source)
+        if h is not None:
+            dist = [d if d == INF else d - h[source] + h[v] for v, d in enumerate(dist)]
+        values = array('d', dist if targets is None else [dist[t] for t in targets])
+        matrix[row * cols:(row + 1) * cols] = values
+    return [row for row, _ in tasks]
+
+
+def distance_matrix(graph, sources, targets=None, workers=None, progress=None):
+    """Shortest distances from every source to every target (all nodes by default).
+
+    Returns a len(sources) x len(targets) NumPy array when NumPy is installed,
+    otherwise a list of rows; unreachable pairs are infinite. ``progress`` is
+    called with (rows_done, rows_total) as rows stream back.
+    """
+    sources = list(sources)
+    potentials = graph.potentials()  # Raises NegativeCycleError before any work starts
+    cols = graph.n if targets is None else len(targets)
+    workers = min(workers or os.cpu_count() or 1, max(1, len(sources) // CHUNK_SIZE))
+
+    matrix_block = shared_memory.SharedMemory(create=True, size=max(len(sources) * cols * 8, 8))
+    matrix = None
+    try:
+        matrix = matrix_block.buf[:len(sources) * cols * 8].cast('d')
+        tasks = list(enumerate(sources))
+        chunks = [tasks[i:i + CHUNK_SIZE] for i in range(0, len(tasks), CHUNK_SIZE)]
+        done = 0
+
+        if workers <= 1:
+            # Not worth a pool: solve in this process against the same buffers
+            _worker.update(graph=_ReducedView(graph), potentials=potentials,
+                           matrix=matrix, cols=cols, targets=targets)
+            for chunk in chunks:
+                done += len(_solve_rows(chunk))
+                if progress:
+                    progress(done, len(sources))
+        else:
+            with SharedCSR(graph) as shared, ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker,
+                    initargs=(graph.n, shared.spec, potentials, matrix_block.name, len(sources), cols, targets)) as pool:
+                for future in as_completed([pool.submit(_solve_rows, chunk) for chunk in chunks]):
+                    done += len(future.result())
+                    if progress:
+                        progress(done, len(sources))
+
+        np = _numpy()
+        if np is not None:
+            result = np.frombuffer(matrix, dtype=np.float64).reshape(len(sources), cols).copy()
+        else:
+            result = [list(matrix[r * cols:(r + 1) * cols]) for r in range(len(sources))]
+        return result
+    finally:
+        # The view must go before the segment, or close() raises BufferError
+        # and hides whatever went wrong above
+        _worker.clear()
+        if matrix is not None:
+            matrix.release()
+        matrix_block.close()
+        matrix_block.unlink()
+
+
+def write_matrix(path, source_labels, target_labels, matrix):
+    """Save a distance matrix as CSV with label headers (blank = unreachable),
+    or as a raw NumPy array when ``path`` ends in .npy"""
+    if path.endswith(".npy"):
+        _numpy().save(path, matrix)
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([""] + list(target_labels))
+        for label, row in zip(source_labels, matrix):
+            writer.writerow([label] + ["" if d == INF else f"{d:g}" for d in row])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distance matrix for a saved graph")
+    parser.add_argument("graph", help="graph file written by File > Export Graph")
+    parser.add_argument("--sources", default="all",
+                        help="comma separated node labels, or 'all'")
+    parser.add_argument("--targets", default=None,
+                        help="comma separated node labels (default: same as sources)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("-o", "--output", default="distance_matrix.csv",
+                        help="where to write the matrix (.csv, or .npy for a NumPy array)")
+    args = parser.parse_args(argv)
+
+    graph = load_graph(args.graph)
+    source_labels = graph.labels if args.sources == "all" else args.sources.split(",")
+    target_labels = args.targets.split(",") if args.targets else source_labels
+    matrix = distance_matrix(graph, [graph.node_id(l) for l in source_labels],
+                             [graph.node_id(l) for l in target_labels], workers=args.workers)
+    write_matrix(args.output, source_labels, target_labels, matrix)
+    print(f"Wrote {len(source_labels)} x {len(target_labels)} distances to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Local HTTP/JSON shortest-path query service.
+
+Loads a saved graph once and answers queries over HTTP:
+
+    python server.py graph.json --port 8765
+
+    GET /distance?source=A&target=B
+    GET /path?source=A&target=B
+    GET /isochrone?source=A&budget=10
+    GET /stats
+
+Concurrent requests that share a source are micro-batched into a single
+single-source run, and finished runs are kept in a per-source LRU cache.
+With --hub-labels, /distance is answered from precomputed hub labels instead.
+"""
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+from engine import INF, NegativeCycleError, isochrone, load_graph, path_to, shortest_paths
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+
+class QueryService:
+    """Answers distance and path queries against one loaded graph"""
+
+    def __init__(self, graph, cache_size=64, batch_window=0.002, oracle=None):
+        self.graph = graph
+        self.oracle = oracle  # Optional HubLabels answering /distance without a search
+        self.cache_size = cache_size
+        self.batch_window = batch_window
+        self.cache = OrderedDict()  # source id -> (dist, prev)
+        self.pending = {}  # source id -> future shared by every waiting request
+        # One worker keeps runs from fighting over the GIL while the event loop stays free
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.requests = 0
+        self.runs = 0
+        self.cache_hits = 0
+
+    async def tree(self, source):
+        """Return (dist, prev) for a source id, sharing one run between concurrent callers"""
+        cached = self.cache.get(source)
+        if cached is not None:
+            self.cache.move_to_end(source)
+            self.cache_hits += 1
+            return cached
+
+        future = self.pending.get(source)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.pending[source] = future
+            asyncio.ensure_future(self._run(source, future))
+        return await asyncio.shield(future)
+
+    async def _run(self, source, future):
+        # Give other requests for the same source a moment to join this batch
+        await asyncio.sleep(self.batch_window)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, shortest_paths, self.graph, source)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            self.runs += 1
+            self.cache[source] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            future.set_result(result)
+        finally:
+            del self.pending[source]
+
+    async def dispatch(self, method, target):
+        """Route one request and return (status, payload)"""
+        if method != "GET":
+            return 405, {'error': "Only GET is supported"}
+
+        url = urlsplit(target)
+        if url.path == "/stats":
+            return 200, {'nodes': self.graph.n, 'edges': self.graph.m,
+                         'requests': self.requests, 'runs': self.runs,
+                         'cache_hits': self.cache_hits, 'cached_sources': len(self.cache),
+                         'hub_label_entries': self.oracle.size if self.oracle else None}
+        if url.path == "/isochrone":
+            return await self.isochrone(parse_qs(url.query))
+        if url.path not in ("/distance", "/path"):
+            return 404, {'error': f"Unknown endpoint {url.path}"}
+
+        params = parse_qs(url.query)
+        source_label = params.get('source', [None])[0]
+        target_label = params.get('target', [None])[0]
+        if source_label is None or target_label is None:
+            return 400, {'error': "Both 'source' and 'target' are required"}
+        for label in (source_label, target_label):
+            if label not in self.graph.index:
+                return 404, {'error': f"Unknown node '{label}'"}
+
+        self.requests += 1
+        source = self.graph.node_id(source_label)
+        target_id = self.graph.node_id(target_label)
+        if self.oracle is not None and url.path == "/distance":
+            d = self.oracle.distance(source, target_id)
+            return 200, {'source': source_label, 'target': target_label,
+                         'distance': d if d != INF else None, 'reachable': d != INF}
+        # Nodes in different components are answered without running (or caching) a search
+        components = getattr(self.graph, 'components', None)
+        reachable = components is None or components().reachable(source, target_id)
+        if reachable:
+            dist, prev = await self.tree(source)
+            reachable = dist[target_id] != INF
+        payload = {
+            'source': source_label,
+            'target': target_label,
+            'distance': dist[target_id] if reachable else None,
+            'reachable': reachable,
+        }
+        if url.path == "/path":
+            path = path_to(prev, target_id) if reachable else []
+            payload['path'] = [self.graph.labels[i] for i in path]
+        return 200, payload
+
+    async def isochrone(self, params):
+        """Nodes within a budget of the source, with the edges leaving that region"""
+        source_label = params.get('source', [None])[0]
+        try:
+            budget = float(params.get('budget', [''])[0])
+        except ValueError:
+            budget = -1
+        if source_label is None or budget < 0:
+            return 400, {'error': "'source' and a non-negative 'budget' are required"}
+        if source_label not in self.graph.index:
+            return 404, {'error': f"Unknown node '{source_label}'"}
+
+        self.requests += 1
+        # Bounded runs are cheap and budget-specific, so they skip the tree cache
+        labels = self.graph.labels
+        dist, _, boundary = await asyncio.get_running_loop().run_in_executor(
+            self.executor, isochrone, self.graph, self.graph.node_id(source_label), budget)
+        return 200, {'source': source_label, 'budget': budget,
+                     'reachable': {labels[v]: d for v, d in dist.items()},
+                     'boundary': [[labels[u], labels[v], w] for u, v, w in boundary]}
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, keeping it alive when asked"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                keep_alive = len(parts) == 3 and parts[2] == "HTTP/1.1"
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode('latin-1').partition(":")
+                    if name.strip().lower() == "connection":
+                        keep_alive = value.strip().lower() != "close"
+
+                if len(parts) != 3:
+                    status, payload = 400, {'error': "Malformed request line"}
+                else:
+                    try:
+                        status, payload = await self.dispatch(parts[0], parts[1])
+                    except Exception as e:
+                        # A failed run (e.g. a negative cycle) still gets an answer
+                        status, payload = 500, {'error': str(e) or type(e).__name__}
+
+                body = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def serve(graph, host="127.0.0.1", port=8765, cache_size=64, batch_window=0.002, oracle=None):
+    service = QueryService(graph, cache_size=cache_size, batch_window=batch_window, oracle=oracle)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving {graph.n} nodes / {graph.m} edges on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve shortest-path queries for a saved graph")
+    parser.add_argument("graph", help="graph file written by the visualizer's Export button")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=64,
+                        help="number of per-source results to keep")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="how long a new source waits for other requests to join its run")
+    parser.add_argument("--hub-labels", action="store_true",
+                        help="answer /distance from hub labels saved next to the graph (built if missing)")
+    args = parser.parse_args(argv)
+
+    graph = load_graph(args.graph)
+    try:
+        graph.potentials()  # Reweighting for negative edges is done once, before serving
+        if hasattr(graph, 'components'):
+            graph.components()
+    except NegativeCycleError as e:
+        print(f"Error: {e}")
+        return
+    oracle = None
+    if args.hub_labels:
+        from hublabels import load_or_build
+        oracle = load_or_build(graph, args.graph)
+        print(f"Hub labels: {oracle.size} entries ({oracle.sidecar})")
+    try:
+        asyncio.run(serve(graph, args.host, args.port, args.cache_size, args.batch_window_ms / 1000, oracle))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()